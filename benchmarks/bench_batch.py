@@ -0,0 +1,61 @@
+"""Compare checking and formatting many in-memory documents with the line-based API vs. the batch API.
+
+Usage:
+    python benchmarks/bench_batch.py --size 100 --pages 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import time
+import tracemalloc
+from collections.abc import Callable
+
+import corpus
+
+from dochooks.insert_whitespace_between_cn_and_en_char.batch import check_documents
+from dochooks.insert_whitespace_between_cn_and_en_char.check import check_lines
+from dochooks.insert_whitespace_between_cn_and_en_char.format import format_lines
+
+
+def line_based(documents: list[tuple[int, str]]) -> int:
+    results = []
+    for document_id, text in documents:
+        _, diagnostics = check_lines(io.StringIO(text, newline="\n"))
+        if diagnostics:
+            _, formatted, _ = format_lines(io.StringIO(text, newline="\n"))
+            results.append((document_id, diagnostics, formatted))
+    return len(results)
+
+
+def batch(documents: list[tuple[int, str]]) -> int:
+    return len(list(check_documents(documents, fix=True)))
+
+
+def measure(func: Callable[[list[tuple[int, str]]], int], documents: list[tuple[int, str]]) -> tuple[float, float, int]:
+    start = time.perf_counter()
+    changed = func(documents)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(documents)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, changed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=float, default=100, help="Total size of the documents in MB")
+    parser.add_argument("--pages", type=int, default=5000, help="Number of documents")
+    args = parser.parse_args()
+
+    documents = list(enumerate(corpus.pages(args.size, args.pages)))
+    for func in (line_based, batch):
+        elapsed, peak_mb, changed = measure(func, documents)
+        throughput = args.size / elapsed
+        print(f"{func.__name__:>10} {elapsed:8.3f} s {throughput:8.1f} MB/s peak {peak_mb:8.1f} MB changed {changed}")
+
+
+if __name__ == "__main__":
+    main()
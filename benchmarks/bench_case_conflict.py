@@ -0,0 +1,46 @@
+"""Benchmark check_case_conflict.check_files on large synthetic commits.
+
+Every run stages ``N`` paths on top of a repository tracking ``N`` other paths,
+a small fraction of which conflict, so the time should grow linearly with ``N``.
+
+Usage:
+    python benchmarks/bench_case_conflict.py --sizes 10000 100000 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import time
+from unittest.mock import patch
+
+from dochooks.check_case_conflict.check import check_files
+
+
+def generate_paths(count: int, prefix: str) -> list[str]:
+    return [f"{prefix}/dir{i % 97}/sub{i % 13}/file_{i}.md" for i in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 200_000], help="Number of paths")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        tracked = generate_paths(size, "docs")
+        staged = generate_paths(size, "api")
+        # Make one in every thousand staged files conflict with a tracked one
+        staged[::1000] = [path.upper() for path in tracked[::1000]]
+
+        with patch("dochooks.check_case_conflict.check.get_all_git_files", return_value=tracked):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                check_files(staged)
+            elapsed = time.perf_counter() - start
+        total = len(tracked) + len(staged)
+        print(f"{size:>10} staged {elapsed:8.3f} s {total / elapsed / 1e6:8.2f} M paths/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Compare the per-path cost of the case folding modes of check-case-conflict.
+
+Usage:
+    python benchmarks/bench_case_fold.py --paths 1000000 --non-ascii-ratio 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from dochooks.check_case_conflict.fold import FOLD_FUNCTIONS
+
+
+def generate_paths(count: int, non_ascii_ratio: float) -> list[str]:
+    every = int(1 / non_ascii_ratio) if non_ascii_ratio > 0 else count + 1
+    return [
+        f"docs/zh/章节{i % 100}/Straße_{i}.md" if i % every == 0 else f"docs/en/Section{i % 100}/Page_{i}.md"
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", type=int, default=1_000_000, help="Number of paths to fold")
+    parser.add_argument("--non-ascii-ratio", type=float, default=0.05, help="Ratio of non-ASCII paths")
+    args = parser.parse_args()
+
+    paths = generate_paths(args.paths, args.non_ascii_ratio)
+    baseline = None
+    for mode, fold in FOLD_FUNCTIONS.items():
+        start = time.perf_counter()
+        for path in paths:
+            fold(path)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{mode:>14} {elapsed:8.3f} s {args.paths / elapsed / 1e6:8.2f} M paths/s {elapsed / baseline:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
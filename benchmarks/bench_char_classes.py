@@ -0,0 +1,80 @@
+"""Compare the compile time and throughput of the default char classes with growing configured ones, with and
+without coalescing the configured ranges.
+
+Usage:
+    python benchmarks/bench_char_classes.py --size 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import re
+import time
+from collections.abc import Callable
+
+import corpus
+
+from dochooks.insert_whitespace_between_cn_and_en_char.check import check_buffer, check_text
+from dochooks.insert_whitespace_between_cn_and_en_char.format import format_lines
+from dochooks.insert_whitespace_between_cn_and_en_char.regex import (
+    DEFAULT_CHAR_CLASSES,
+    CharClasses,
+    char_classes_from_config,
+    make_char_classes,
+)
+
+EXTENDED_CONFIG = {
+    # CJK extension A, kana, hangul syllables and full-width letters
+    "extend-cn-chars": ["㐀-䶵", "぀-ゟ", "゠-ヿ", "가-힣"],
+    "extend-en-chars": ["Ａ-Ｚ", "ａ-ｚ", "０-９"],
+}
+# Every CJK ideograph listed as a single char, which coalesces into a single range
+FRAGMENTED_CONFIG = {"cn-chars": [chr(code) for code in range(0x4E00, 0x9FA6)]}
+
+
+def _uncoalesced(config: dict[str, list[str]]) -> CharClasses:
+    ranges = tuple((char, char) for char in config["cn-chars"])
+    return CharClasses(ranges, DEFAULT_CHAR_CLASSES.en_ranges)
+
+
+def _compile(make: Callable[[], CharClasses]) -> tuple[CharClasses, float]:
+    # Bypass the caches, so that the patterns are actually compiled
+    make_char_classes.cache_clear()
+    re.purge()
+    start = time.perf_counter()
+    char_classes = make()
+    return char_classes, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=float, default=10, help="Corpus size in MB")
+    args = parser.parse_args()
+
+    text = corpus.mixed_prose(args.size)
+    data = text.encode("utf8")
+    variants: dict[str, CharClasses] = {}
+    for name, make in {
+        "default": lambda: char_classes_from_config({}),
+        "extended": lambda: char_classes_from_config(EXTENDED_CONFIG),
+        "fragmented": lambda: char_classes_from_config(FRAGMENTED_CONFIG),
+        "uncoalesced": lambda: _uncoalesced(FRAGMENTED_CONFIG),
+    }.items():
+        variants[name], elapsed = _compile(make)
+        print(f"{'compile':>12} {name:>12} {elapsed * 1000:8.1f} ms")
+    benches = {
+        "check_text": lambda char_classes: check_text(text, char_classes=char_classes),
+        "check_buffer": lambda char_classes: check_buffer(data, char_classes=char_classes),
+        "format_lines": lambda char_classes: format_lines(io.StringIO(text, newline="\n"), char_classes=char_classes),
+    }
+    for bench_name, bench in benches.items():
+        for name, char_classes in variants.items():
+            start = time.perf_counter()
+            bench(char_classes)
+            elapsed = time.perf_counter() - start
+            print(f"{bench_name:>12} {name:>12} {elapsed:8.3f} s {args.size / elapsed:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark the CN/EN formatter on large synthetic inputs.
+
+Usage:
+    python benchmarks/bench_format_lines.py --sizes 1 10 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from collections.abc import Iterable, Iterator
+
+from dochooks.insert_whitespace_between_cn_and_en_char.format import format_lines, iter_format_lines
+
+SAMPLE_LINES = [
+    "这是一段中文and English混合的text，需要被格式化。\n",
+    "这是一段已经格式化好的中文 and English 文本。\n",
+    "Pure English line without any Chinese characters.\n",
+    "纯中文的一行，没有任何英文字符。\n",
+]
+
+
+def generate_lines(size_mb: int) -> Iterator[str]:
+    target = size_mb * 1024 * 1024
+    written = 0
+    i = 0
+    while written < target:
+        line = SAMPLE_LINES[i % len(SAMPLE_LINES)]
+        written += len(line.encode("utf8"))
+        i += 1
+        yield line
+
+
+def stream(lines: Iterable[str]) -> int:
+    size = 0
+    for _, line, _ in iter_format_lines(lines):
+        size += len(line)
+    return size
+
+
+def measure(name: str, size_mb: int, trace_memory: bool) -> None:
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if name == "format_lines":
+        format_lines(generate_lines(size_mb))
+    else:
+        stream(generate_lines(size_mb))
+    elapsed = time.perf_counter() - start
+    peak = ""
+    if trace_memory:
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak = f"{peak_bytes / 1024 / 1024:10.1f} MB"
+    print(f"{name:>18} {size_mb:>6} MB {elapsed:10.3f} s {size_mb / elapsed:10.1f} MB/s {peak}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100], help="Input sizes in MB")
+    parser.add_argument("--memory", action="store_true", help="Trace peak memory (slows down the run)")
+    args = parser.parse_args()
+
+    for size_mb in args.sizes:
+        for name in ("format_lines", "iter_format_lines"):
+            measure(name, size_mb, args.memory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Compare parsing a synthetic ``git ls-files`` listing as one decoded string vs. streaming ``-z`` output.
+
+Usage:
+    python benchmarks/bench_git_listing.py --paths 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import time
+import tracemalloc
+
+from dochooks.utils.git import iter_nul_separated
+
+
+def parse_text(listing: bytes) -> list[str]:
+    # What get_all_git_files used to do with `capture_output=True, text=True`
+    stdout = listing.replace(b"\0", b"\n").decode()
+    return stdout.strip().split("\n") if stdout.strip() else []
+
+
+def parse_stream(listing: bytes) -> list[str]:
+    return list(iter_nul_separated(io.BytesIO(listing)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", type=int, default=1_000_000, help="Number of paths in the listing")
+    args = parser.parse_args()
+
+    listing = b"".join(f"docs/section{i % 100}/page_{i}.md\0".encode() for i in range(args.paths))
+    print(f"listing size: {len(listing) / 1024 / 1024:.1f} MB")
+    for parse in (parse_text, parse_stream):
+        start = time.perf_counter()
+        paths = parse(listing)
+        elapsed = time.perf_counter() - start
+        del paths
+
+        tracemalloc.start()
+        paths = parse(listing)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del paths
+        throughput = args.paths / elapsed / 1e6
+        print(f"{parse.__name__:>14} {elapsed:8.3f} s {throughput:8.2f} M paths/s peak {peak / 1024 / 1024:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
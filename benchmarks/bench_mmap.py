@@ -0,0 +1,65 @@
+"""Compare reading and decoding a large file as a whole vs. scanning an mmap of its raw bytes.
+
+Usage:
+    python benchmarks/bench_mmap.py --size 200 --hits 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import tempfile
+import time
+import tracemalloc
+
+from dochooks.insert_whitespace_between_cn_and_en_char.check import check_buffer, check_text
+
+CLEAN_LINE = "这是一段已经格式化好的中文 and English 文本，参见 GitHub。\n"
+DIRTY_LINE = "这是一段中文and English混合的text，需要被格式化。\n"
+
+
+def write_corpus(path: str, size_mb: int, hits: int) -> None:
+    lines = size_mb * 1024 * 1024 // len(CLEAN_LINE.encode("utf8"))
+    every = lines // hits if hits else lines + 1
+    with open(path, "w", encoding="utf8") as f:
+        for i in range(lines):
+            f.write(DIRTY_LINE if i % every == every - 1 else CLEAN_LINE)
+
+
+def decode(path: str) -> int:
+    with open(path, "rb") as f:
+        return len(check_text(f.read().decode("utf8"))[1])
+
+
+def scan_mmap(path: str) -> int:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        return len(check_buffer(buf)[1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=200, help="File size in MB")
+    parser.add_argument("--hits", type=int, default=10, help="Number of lines with a boundary")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "corpus.md")
+        write_corpus(path, args.size, args.hits)
+        for bench in (decode, scan_mmap):
+            start = time.perf_counter()
+            hits = bench(path)
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            bench(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{bench.__name__:>10} {elapsed:8.3f} s {args.size / elapsed:8.1f} MB/s "
+                f"peak {peak / 1024 / 1024:8.1f} MB hits {hits}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compare printing diagnostics one by one with the batched diagnostic writers.
+
+Usage:
+    python benchmarks/bench_output.py --diagnostics 500000 > /dev/null
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+from dochooks.utils.output import OUTPUT_FORMATS, Diagnostic, make_writer
+
+FILES = 1000
+
+
+def generate_diagnostics(count: int) -> list[list[Diagnostic]]:
+    per_file = max(1, count // FILES)
+    return [
+        [
+            Diagnostic("whitespace-between-cn-and-en-char", "No spaces", f"docs/page_{i}.md", line, (3,), "中文a")
+            for line in range(1, per_file + 1)
+        ]
+        for i in range(FILES)
+    ]
+
+
+def print_each(files: list[list[Diagnostic]]) -> None:
+    for diagnostics in files:
+        for d in diagnostics:
+            print(f"{d.message}: {d.path}:{d.line}:\t{d.source}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--diagnostics", type=int, default=500_000, help="Number of diagnostics to write")
+    args = parser.parse_args()
+
+    files = generate_diagnostics(args.diagnostics)
+    benches = {"print": lambda: print_each(files)}
+    for output_format in OUTPUT_FORMATS:
+
+        def write(output_format: str = output_format) -> None:
+            with make_writer(output_format) as writer:
+                for diagnostics in files:
+                    writer.write_file(diagnostics)
+
+        benches[output_format] = write
+
+    for name, bench in benches.items():
+        start = time.perf_counter()
+        bench()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        bench()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{name:>8} {elapsed:8.3f} s {args.diagnostics / elapsed / 1e3:8.1f} K diagnostics/s "
+            f"peak {peak / 1024 / 1024:6.1f} MB",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
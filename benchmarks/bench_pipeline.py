@@ -0,0 +1,66 @@
+"""Compare processing files one after another vs. the asyncio pipeline prefetching them, on a simulated slow
+filesystem where every open takes a fixed latency, like on a network mounted CI workspace.
+
+Usage:
+    python benchmarks/bench_pipeline.py --files 500 --latency 5 --io-threads 1 4 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import builtins
+import os
+import tempfile
+import time
+from functools import partial
+
+import corpus
+
+from dochooks.insert_whitespace_between_cn_and_en_char.check import _check_content
+from dochooks.utils.pipeline import map_files_pipelined
+
+ORIGINAL_OPEN = builtins.open
+
+
+def slow_open(tmp_dir: str, latency: float):
+    def _open(file, *args, **kwargs):
+        if isinstance(file, str) and file.startswith(tmp_dir):
+            time.sleep(latency)
+        return ORIGINAL_OPEN(file, *args, **kwargs)
+
+    return _open
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=500, help="Number of files")
+    parser.add_argument("--size", type=float, default=0.05, help="Size of each file in MB")
+    parser.add_argument("--latency", type=float, default=5, help="Latency of opening a file in ms")
+    parser.add_argument("--io-threads", type=int, nargs="+", default=[1, 4, 16], help="Prefetching threads to try")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        text = corpus.mixed_prose(args.size)
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(tmp_dir, f"{i}.md")
+            with open(path, "w", encoding="utf8") as f:
+                f.write(text)
+            paths.append(path)
+
+        builtins.open = slow_open(tmp_dir, args.latency / 1000)
+        try:
+            check_content = partial(_check_content, markup="auto")
+            for io_threads in (0, *args.io_threads):
+                start = time.perf_counter()
+                for _ in map_files_pipelined(check_content, paths, jobs=1, io_threads=io_threads):
+                    pass
+                elapsed = time.perf_counter() - start
+                label = "sequential" if not io_threads else f"{io_threads} threads"
+                print(f"{label:>12} {elapsed:8.3f} s {args.files * args.size / elapsed:8.1f} MB/s")
+        finally:
+            builtins.open = ORIGINAL_OPEN
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Compare the per-line cost of ``PragmaManager.scan`` and ``scan_lines``.
+
+Usage:
+    python benchmarks/bench_pragma.py --lines 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from dochooks.insert_whitespace_between_cn_and_en_char.pragma import PragmaManager, scan_lines
+
+SAMPLE_LINES = [
+    "这是一段已经格式化好的中文 and English 文本。\n",
+    "<!-- dochooks: skip-next-line -->\n",
+    "这是一段中文and English混合的text\n",
+    "这是一段中文and English混合的text <!-- dochooks: skip-line -->\n",
+] + ["Pure English line without any pragma.\n"] * 16
+
+
+def bench_pragma_manager(lines: list[str]) -> int:
+    skipped = 0
+    pragma_manager = PragmaManager()
+    for line in lines:
+        with pragma_manager.scan(line) as skip_line:
+            skipped += skip_line
+    return skipped
+
+
+def bench_scan_lines(lines: list[str]) -> int:
+    skipped = 0
+    for _, _, skip_line in scan_lines(lines):
+        skipped += skip_line
+    return skipped
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000, help="Number of lines to scan")
+    args = parser.parse_args()
+
+    lines = (SAMPLE_LINES * (args.lines // len(SAMPLE_LINES) + 1))[: args.lines]
+    for bench in (bench_pragma_manager, bench_scan_lines):
+        start = time.perf_counter()
+        bench(lines)
+        elapsed = time.perf_counter() - start
+        print(f"{bench.__name__:>22} {elapsed:8.3f} s {args.lines / elapsed / 1e6:8.2f} M lines/s")
+
+
+if __name__ == "__main__":
+    main()
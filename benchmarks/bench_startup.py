@@ -0,0 +1,73 @@
+"""Measure the startup of every hook: wall-clock time of whole runs without files and with a single small file,
+and the import time reported by ``python -X importtime``.
+
+Usage:
+    python benchmarks/bench_startup.py --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from dochooks.entry_points import HOOKS, SUBCOMMANDS
+
+PYTHON_ENV = {**os.environ, "PYTHONDONTWRITEBYTECODE": ""}
+
+
+def run_code(hook: str, argv: list[str]) -> str:
+    func = hook.replace("-", "_")
+    return f"from dochooks.entry_points import {func}; raise SystemExit({func}({argv!r}))"
+
+
+def wall_time(code: str, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], env=PYTHON_ENV, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def import_time(module: str) -> float:
+    """Cumulative import time of the module in ms, as reported by ``-X importtime``."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], env=PYTHON_ENV, capture_output=True, text=True
+    ).stderr
+    for line in stderr.splitlines():
+        _, _, cumulative, name = (part.strip() for part in line.replace(":", "|", 1).split("|"))
+        if name == module:
+            return int(cumulative) / 1000
+    raise RuntimeError(f"{module} was not imported:\n{stderr}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per measurement, the median is reported")
+    args = parser.parse_args()
+
+    baseline = wall_time("pass", args.repeat)
+    print(f"{'interpreter':<42} {baseline * 1000:8.1f} ms")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "doc.md")
+        with open(file_path, "w", encoding="utf8") as f:
+            f.write("这是一段已经格式化好的中文 and English 文本。\n")
+        for hook, module in HOOKS.items():
+            prefix = [SUBCOMMANDS[hook]] if hook in SUBCOMMANDS else []
+            no_files = wall_time(run_code(hook, prefix), args.repeat)
+            one_file = wall_time(run_code(hook, [*prefix, file_path]), args.repeat)
+            # Warm up the bytecode cache, so that compiling isn't counted
+            import_time(module)
+            print(
+                f"{hook:<42} no files {no_files * 1000:8.1f} ms  one file {one_file * 1000:8.1f} ms  "
+                f"import {import_time(module):8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Synthetic corpora for the benchmarks, generated deterministically so that runs are comparable."""
+
+from __future__ import annotations
+
+import random
+
+MIXED_PROSE_LINES = [
+    "这是一段中文and English混合的text，需要被格式化。\n",
+    "这是一段已经格式化好的中文 and English 文本。\n",
+    "Pure English line without any Chinese characters.\n",
+    "纯中文的一行，没有任何英文字符。\n",
+    "<!-- dochooks: skip-next-line -->\n",
+    "这是一段中文and English混合的text\n",
+]
+MARKDOWN_PROSE = "这是一段已经格式化好的中文 and English 文本，参见 `dochooks` 和 [文档](https://example.com)。\n"
+MARKDOWN_CODE = [
+    "```python\n",
+    "# 计算结果result并打印\n",
+    "print(f'结果是{result}，耗时{elapsed}秒')\n",
+    "value = compute(参数a, 参数b)\n",
+    "```\n",
+]
+
+
+def _fill(chunks: list[str], size_mb: float) -> str:
+    target = int(size_mb * 1024 * 1024)
+    parts: list[str] = []
+    written = 0
+    i = 0
+    while written < target:
+        chunk = chunks[i % len(chunks)]
+        parts.append(chunk)
+        written += len(chunk.encode("utf8"))
+        i += 1
+    return "".join(parts)
+
+
+def mixed_prose(size_mb: float) -> str:
+    """Mixed CN/EN prose, a third of the lines need formatting, some of them are skipped by pragmas."""
+    return _fill(MIXED_PROSE_LINES, size_mb)
+
+
+def pages(size_mb: float, count: int) -> list[str]:
+    """Mixed CN/EN prose split into ``count`` documents, like the rendered pages of a documentation site."""
+    text = mixed_prose(size_mb)
+    lines = text.splitlines(keepends=True)
+    per_page = max(1, len(lines) // count)
+    return ["".join(lines[i : i + per_page]) for i in range(0, len(lines), per_page)]
+
+
+def code_heavy_markdown(size_mb: float, code_ratio: float = 0.8) -> str:
+    """Markdown which is mostly fenced code full of CN/EN boundaries, with clean prose in between."""
+    code_size = len("".join(MARKDOWN_CODE).encode("utf8"))
+    prose_size = len(MARKDOWN_PROSE.encode("utf8"))
+    prose_per_block = max(0, round(code_size * (1 - code_ratio) / code_ratio / prose_size))
+    return _fill(["".join(MARKDOWN_CODE) + MARKDOWN_PROSE * prose_per_block], size_mb)
+
+
+def single_line(size_mb: float) -> str:
+    """A pathological file without any newline, e.g. minified or generated content."""
+    return _fill(["中文and English混合的text，", "已经格式化好的中文 and English 文本，"], size_mb)
+
+
+def repo_listing(paths: int, conflict_every: int = 1000, seed: int = 0) -> list[str]:
+    """Paths of a large repository, one in every ``conflict_every`` of them conflicting in case with another."""
+    rng = random.Random(seed)
+    listing = [f"docs/section{i % 97}/sub{i % 13}/page_{i}.md" for i in range(paths)]
+    for i in range(0, paths, conflict_every):
+        listing[rng.randrange(paths)] = listing[i].upper()
+    return listing
@@ -0,0 +1,223 @@
+"""Run the benchmark suite and record a JSON baseline, or compare two baselines for regressions.
+
+Usage:
+    python benchmarks/suite.py run --output baseline.json
+    python benchmarks/suite.py run --output current.json --scale 0.1 -k check
+    python benchmarks/suite.py compare baseline.json current.json --threshold 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+import corpus
+
+from dochooks import __version__
+from dochooks.check_case_conflict.check import find_case_conflicts
+from dochooks.insert_whitespace_between_cn_and_en_char.batch import check_documents
+from dochooks.insert_whitespace_between_cn_and_en_char.check import check_buffer, check_lines, check_text
+from dochooks.insert_whitespace_between_cn_and_en_char.format import format_lines
+from dochooks.insert_whitespace_between_cn_and_en_char.regex import char_classes_from_config
+from dochooks.utils.git import iter_nul_separated
+
+# CJK extension A, kana, hangul and full-width alphanumerics on top of the default char classes
+EXTENDED_CHAR_CLASSES = char_classes_from_config(
+    {"extend-cn-chars": ["㐀-䶵", "぀-ヿ", "가-힣"], "extend-en-chars": ["Ａ-Ｚ", "ａ-ｚ", "０-９"]}
+)
+
+# Differences below these are noise, no matter the relative change
+MIN_SECONDS_DELTA = 0.005
+MIN_MEMORY_DELTA_MB = 1.0
+
+
+class Workload(NamedTuple):
+    run: Callable[[], object]
+    # Units processed by one run, e.g. {"MB": 10, "lines": 200000}
+    units: dict[str, float]
+
+
+def _text_workload(text: str, func: Callable[[str], object]) -> Workload:
+    size_mb = len(text.encode("utf8")) / 1024 / 1024
+    return Workload(lambda: func(text), {"MB": size_mb, "lines": text.count("\n") + 1})
+
+
+def _bytes_workload(data: bytes, func: Callable[[bytes], object]) -> Workload:
+    return Workload(lambda: func(data), {"MB": len(data) / 1024 / 1024, "lines": data.count(b"\n") + 1})
+
+
+def _lines(text: str) -> io.StringIO:
+    return io.StringIO(text, newline="\n")
+
+
+def _documents_workload(documents: list[str], func: Callable[[list[tuple[int, str]]], object]) -> Workload:
+    pairs = list(enumerate(documents))
+    size_mb = sum(len(document.encode("utf8")) for document in documents) / 1024 / 1024
+    return Workload(lambda: func(pairs), {"MB": size_mb, "documents": len(documents)})
+
+
+def _paths_workload(paths: list[str], func: Callable[[list[str]], object]) -> Workload:
+    return Workload(lambda: func(paths), {"paths": len(paths)})
+
+
+# Each benchmark builds its corpus for the given scale and returns the workload to time
+BENCHMARKS: dict[str, Callable[[float], Workload]] = {
+    "check_text/mixed_prose": lambda scale: _text_workload(corpus.mixed_prose(10 * scale), check_text),
+    "check_lines/mixed_prose": lambda scale: _text_workload(
+        corpus.mixed_prose(10 * scale), lambda text: check_lines(_lines(text))
+    ),
+    "format_lines/mixed_prose": lambda scale: _text_workload(
+        corpus.mixed_prose(10 * scale), lambda text: format_lines(_lines(text))
+    ),
+    "check_text/extended_chars": lambda scale: _text_workload(
+        corpus.mixed_prose(10 * scale), lambda text: check_text(text, char_classes=EXTENDED_CHAR_CLASSES)
+    ),
+    "check_buffer/extended_chars": lambda scale: _bytes_workload(
+        corpus.mixed_prose(10 * scale).encode("utf8"),
+        lambda data: check_buffer(data, char_classes=EXTENDED_CHAR_CLASSES),
+    ),
+    "check_text/code_heavy_markdown": lambda scale: _text_workload(
+        corpus.code_heavy_markdown(10 * scale), lambda text: check_text(text, "markdown")
+    ),
+    "format_lines/code_heavy_markdown": lambda scale: _text_workload(
+        corpus.code_heavy_markdown(10 * scale), lambda text: format_lines(_lines(text), "markdown")
+    ),
+    "check_text/single_line": lambda scale: _text_workload(corpus.single_line(2 * scale), check_text),
+    "check_buffer/single_line": lambda scale: _bytes_workload(
+        corpus.single_line(2 * scale).encode("utf8"), check_buffer
+    ),
+    "format_lines/single_line": lambda scale: _text_workload(
+        corpus.single_line(2 * scale), lambda text: format_lines(_lines(text))
+    ),
+    "check_documents/pages": lambda scale: _documents_workload(
+        corpus.pages(10 * scale, int(5000 * scale) or 1), lambda pairs: list(check_documents(pairs, fix=True))
+    ),
+    "find_case_conflicts/repo_listing": lambda scale: _paths_workload(
+        corpus.repo_listing(int(1_000_000 * scale)), find_case_conflicts
+    ),
+    "iter_nul_separated/repo_listing": lambda scale: _paths_workload(
+        corpus.repo_listing(int(1_000_000 * scale)),
+        lambda paths: list(iter_nul_separated(io.BytesIO("\0".join(paths).encode()))),
+    ),
+}
+
+
+def run_benchmark(workload: Workload, repeat: int) -> dict[str, Any]:
+    # Best of several runs, the minimum is the least noisy estimate of the actual cost
+    seconds = min(_time(workload.run) for _ in range(repeat))
+    tracemalloc.start()
+    try:
+        workload.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": seconds,
+        "throughput": {f"{unit}/s": amount / seconds for unit, amount in workload.units.items()},
+        "peak_memory_mb": peak / 1024 / 1024,
+    }
+
+
+def _time(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run(args: argparse.Namespace) -> int:
+    results: dict[str, dict[str, Any]] = {}
+    for name, make_workload in BENCHMARKS.items():
+        if args.keyword and not any(keyword in name for keyword in args.keyword):
+            continue
+        result = results[name] = run_benchmark(make_workload(args.scale), args.repeat)
+        throughput = " ".join(f"{value:12.1f} {unit}" for unit, value in result["throughput"].items())
+        print(f"{name:<36} {result['seconds']:8.3f} s {throughput}  peak {result['peak_memory_mb']:8.1f} MB")
+
+    baseline = {
+        "dochooks": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+def compare_results(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float
+) -> list[tuple[str, str, float, float]]:
+    """Find the benchmarks which got slower or use more memory than the threshold allows.
+
+    Returns:
+        Regressions as (benchmark, metric, baseline value, current value) tuples
+    """
+    if baseline.get("scale") != current.get("scale"):
+        raise ValueError(f"Can't compare runs of different scales: {baseline.get('scale')} vs {current.get('scale')}")
+    regressions: list[tuple[str, str, float, float]] = []
+    for name, current_result in current["results"].items():
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is None:
+            continue
+        for metric, min_delta in (("seconds", MIN_SECONDS_DELTA), ("peak_memory_mb", MIN_MEMORY_DELTA_MB)):
+            before, after = baseline_result[metric], current_result[metric]
+            if after > before * (1 + threshold) and after - before > min_delta:
+                regressions.append((name, metric, before, after))
+    return regressions
+
+
+def compare(args: argparse.Namespace) -> int:
+    with open(args.baseline, encoding="utf8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf8") as f:
+        current = json.load(f)
+
+    for name, result in current["results"].items():
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is None:
+            print(f"{name:<36} (new)")
+            continue
+        ratio = result["seconds"] / baseline_result["seconds"]
+        print(f"{name:<36} {baseline_result['seconds']:8.3f} s -> {result['seconds']:8.3f} s {ratio:6.2f}x")
+
+    regressions = compare_results(baseline, current, args.threshold)
+    for name, metric, before, after in regressions:
+        change = f"{after / before - 1:+.0%}" if before else "new"
+        print(f"REGRESSION {name} {metric}: {before:.3f} -> {after:.3f} ({change})", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--output", help="Write the results to this JSON file")
+    run_parser.add_argument("--scale", type=float, default=1.0, help="Scale factor of the corpus sizes")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs of each benchmark")
+    run_parser.add_argument(
+        "-k", "--keyword", action="append", help="Only run benchmarks containing this keyword, can be repeated"
+    )
+    run_parser.set_defaults(func=run)
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files, fail on regressions")
+    compare_parser.add_argument("baseline", help="Results of the reference run")
+    compare_parser.add_argument("current", help="Results of the run to check")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Allowed relative slowdown or memory growth (default: 0.1)"
+    )
+    compare_parser.set_defaults(func=compare)
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
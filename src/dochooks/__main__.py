@@ -0,0 +1,6 @@
+from __future__ import annotations
+
+from .entry_points import dochooks
+
+if __name__ == "__main__":
+    raise SystemExit(dochooks())
@@ -1,14 +1,22 @@
 from __future__ import annotations
 
 import argparse
+import itertools
 import os
-import subprocess
-from collections.abc import Sequence
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
 
 from dochooks import __version__
 
+from ..utils.git import iter_git_output
+from ..utils.output import OUTPUT_FORMATS, Diagnostic, make_writer
+from ..utils.profile import add_profile_argument, count, phase, profile_destination, profiling
 from ..utils.return_code import FAIL, PASS, ReturnCode
+from .fold import DEFAULT_FOLD_MODE, FOLD_FUNCTIONS
+from .index import CaseIndex, staged_changes
+from .trie import CaseTrie, is_directory, iter_parent_directories
 
+RULE_NAME = "case-conflict"
 DEFAULT_ERROR_MESSAGE = """\
 The following files would conflict on case-insensitive filesystems (e.g., APFS, NTFS):
 
@@ -33,60 +41,59 @@ def get_all_git_files() -> list[str]:
     Returns:
         List of all file paths in the git repository, empty list if not in a git repo
     """
+    import subprocess
+
     try:
-        result = subprocess.run(
-            ["git", "ls-files"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        return result.stdout.strip().split("\n") if result.stdout.strip() else []
+        return list(iter_git_output("ls-files", "-z"))
     except (subprocess.CalledProcessError, FileNotFoundError):
         # Not in a git repository or git is not available
         return []
 
 
-def find_case_conflicts(file_paths: Sequence[str]) -> dict[str, list[str]]:
-    """Detect case conflicts in file paths.
+def find_case_conflicts(file_paths: Iterable[str], fold: str = DEFAULT_FOLD_MODE) -> dict[str, list[str]]:
+    """Detect case conflicts in file paths, including conflicting directories (e.g. ``Docs/a.md`` and ``docs/b.md``).
 
     Args:
-        file_paths: List of file paths to check
+        file_paths: File paths to check, duplicates (after normalization) are ignored,
+            paths with a trailing separator are treated as directories
+        fold: Case folding mode, one of FOLD_FUNCTIONS
 
     Returns:
-        Dictionary mapping lowercase paths to lists of conflicting original paths
+        Dictionary mapping lowercase (folded) paths to lists of conflicting original paths,
+        directories are reported with a trailing separator
     """
-    # Build lowercase path mapping
-    path_map: dict[str, list[str]] = {}
-
+    trie = CaseTrie(fold)
     for file_path in file_paths:
         # Normalize path
         normalized_path = os.path.normpath(file_path)
-        # Convert to lowercase for comparison
-        lower_path = normalized_path.lower()
+        if is_directory(file_path):
+            normalized_path += os.sep
+        trie.add(normalized_path)
+    return trie.find_conflicts()
 
-        if lower_path not in path_map:
-            path_map[lower_path] = []
-        path_map[lower_path].append(normalized_path)
 
-    # Find conflicting paths
-    conflicts: dict[str, list[str]] = {}
-    for lower_path, original_paths in path_map.items():
-        if len(original_paths) > 1:
-            conflicts[lower_path] = original_paths
+def _with_parent_directories(paths: Iterable[str]) -> set[str]:
+    """Get the normalized paths together with all of their parent directories (with a trailing separator)."""
+    result: set[str] = set()
+    for path in paths:
+        normalized_path = os.path.normpath(path)
+        result.add(normalized_path)
+        result.update(iter_parent_directories(normalized_path))
+    return result
 
-    return conflicts
 
-
-def format_conflicts(conflicts: dict[str, list[str]], input_files: Sequence[str]) -> str:
+def format_conflicts(conflicts: dict[str, list[str]], input_files: Iterable[str]) -> str:
     """Format conflicts for display.
 
     Args:
         conflicts: Dictionary of conflicts from find_case_conflicts
-        input_files: List of files being checked (from pre-commit)
+        input_files: Files being checked (from pre-commit)
 
     Returns:
         Formatted string showing the conflicts
     """
+    # Directories are marked as well if the current commit touches any file inside of them
+    input_paths = _with_parent_directories(input_files)
     lines: list[str] = []
     for lower_path, original_paths in conflicts.items():
         lines.append(f"Conflict group (lowercase: {lower_path}):")
@@ -94,8 +101,8 @@ def format_conflicts(conflicts: dict[str, list[str]], input_files: Sequence[str]
         sorted_paths = sorted(original_paths, key=lambda p: (p.lower() != p, p))
 
         for path in sorted_paths:
-            # Mark files from current commit
-            is_new = path in input_files
+            # Mark files (or directories) from current commit
+            is_new = path in input_paths
             marker = " [current commit]" if is_new else ""
             lines.append(f"  - {path}{marker}")
 
@@ -104,41 +111,113 @@ def format_conflicts(conflicts: dict[str, list[str]], input_files: Sequence[str]
     return "\n".join(lines)
 
 
-def check_files(file_paths: Sequence[str], error_message: str = DEFAULT_ERROR_MESSAGE) -> ReturnCode:
+def get_candidate_files(input_paths: Iterable[str], fold: str = DEFAULT_FOLD_MODE) -> list[str] | None:
+    """Get the tracked files which may conflict with the input files from the persistent case-fold index.
+
+    Args:
+        input_paths: Normalized paths of the files being checked
+        fold: Case folding mode, one of FOLD_FUNCTIONS
+
+    Returns:
+        Tracked files and directories (with a trailing separator) equal to any input file or any of its parent
+        directories ignoring case, None if the index is not available. Files and directories are both looked up
+        for each name, so that a file conflicting with a directory (e.g. ``readme`` and ``README/x.md``) is found.
+        The index only covers HEAD, so all files added in the git index are included as well: pre-commit may
+        pass two new conflicting files to different hook runs.
+    """
+    index = CaseIndex.open(fold)
+    if index is None:
+        return None
+    try:
+        input_dirs = {directory for input_path in input_paths for directory in iter_parent_directories(input_path)}
+        added_paths, deleted_paths = staged_changes()
+        # Files added in the git index aren't in the index of HEAD yet
+        candidates = added_paths
+        candidates.extend(
+            path
+            for name in itertools.chain(input_paths, (directory.rstrip(os.sep) for directory in input_dirs))
+            for path in index.lookup(name)
+            if path not in deleted_paths
+        )
+        # A directory is gone if all files inside of it are deleted, e.g. when renaming `Docs/` to `docs/`
+        deleted_dir_counts = Counter(
+            directory for path in deleted_paths for directory in iter_parent_directories(os.path.normpath(path))
+        )
+        for name in itertools.chain(input_dirs, (input_path + os.sep for input_path in input_paths)):
+            candidates.extend(
+                directory for directory, count in index.lookup_directory(name) if count > deleted_dir_counts[directory]
+            )
+        return candidates
+    finally:
+        index.close()
+
+
+def iter_conflict_diagnostics(conflicts: dict[str, list[str]], input_files: Iterable[str]) -> Iterator[Diagnostic]:
+    """Yield one diagnostic for each path of the current commit involved in a conflict."""
+    input_paths = _with_parent_directories(input_files)
+    for original_paths in conflicts.values():
+        for path in original_paths:
+            if path in input_paths:
+                others = ", ".join(sorted(other for other in original_paths if other != path))
+                yield Diagnostic(RULE_NAME, f"Case conflict with {others}", path)
+
+
+def check_files(
+    file_paths: Sequence[str],
+    error_message: str = DEFAULT_ERROR_MESSAGE,
+    use_index: bool = False,
+    fold: str = DEFAULT_FOLD_MODE,
+    output_format: str = "text",
+) -> ReturnCode:
     """Check file list for case conflicts.
 
     Args:
         file_paths: List of file paths to check (usually files from pre-commit)
         error_message: Custom error message template, use {conflicts} as placeholder
+        use_index: Look up tracked files in the persistent case-fold index instead of listing all of them
+        fold: Case folding mode, one of FOLD_FUNCTIONS
+        output_format: One of OUTPUT_FORMATS, the error message is only used by the text format
 
     Returns:
         FAIL if conflicts found, PASS otherwise
     """
-    # Get all tracked files in git repository
-    all_git_files = get_all_git_files()
+    # Normalize input files once, so that they can be looked up in constant time
+    input_paths = {os.path.normpath(path) for path in file_paths}
 
-    # Merge input files and git files, remove duplicates
-    all_files = list(set(file_paths) | set(all_git_files))
+    with phase("list"):
+        tracked_files = get_candidate_files(input_paths, fold) if use_index else None
+        if tracked_files is None:
+            tracked_files = get_all_git_files()
+    count("paths_checked", len(input_paths) + len(tracked_files))
 
-    # Check for conflicts
-    conflicts = find_case_conflicts(all_files)
+    # Check input files together with tracked files in git repository,
+    # find_case_conflicts drops the duplicates between them
+    with phase("conflicts"):
+        conflicts = find_case_conflicts(itertools.chain(input_paths, tracked_files), fold)
 
     if not conflicts:
         return PASS
 
-    # Filter to only conflicts involving input files
+    # Filter to only conflicts involving input files, or directories containing them
+    input_paths_and_parents = _with_parent_directories(input_paths)
     relevant_conflicts: dict[str, list[str]] = {}
     for lower_path, original_paths in conflicts.items():
         # Check if conflict group contains any input files
-        has_input_file = any(path in file_paths for path in original_paths)
+        has_input_file = any(path in input_paths_and_parents for path in original_paths)
         if has_input_file:
             relevant_conflicts[lower_path] = original_paths
 
     if not relevant_conflicts:
         return PASS
 
+    if output_format != "text":
+        with make_writer(output_format) as writer:
+            for diagnostic in iter_conflict_diagnostics(relevant_conflicts, input_paths):
+                writer.write_file([diagnostic])
+        return FAIL
+
     # Format and display conflicts
-    conflicts_text = format_conflicts(relevant_conflicts, file_paths)
+    conflicts_text = format_conflicts(relevant_conflicts, input_paths)
     print(error_message.format(conflicts=conflicts_text.rstrip()))
 
     return FAIL
@@ -155,13 +234,38 @@ def main(argv: Sequence[str] | None = None) -> ReturnCode:
         default=DEFAULT_ERROR_MESSAGE,
         help="Custom error message template (use {conflicts} as placeholder)",
     )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Don't use the persistent case-fold index under .git/, list all tracked files instead",
+    )
+    parser.add_argument(
+        "--fold",
+        choices=FOLD_FUNCTIONS.keys(),
+        default=DEFAULT_FOLD_MODE,
+        help=(
+            "How to compare paths: lower (str.lower), casefold (full Unicode case folding), "
+            "casefold-nfc (case folding ignoring NFC/NFD differences), apfs or ntfs (filesystem approximations)"
+        ),
+    )
+    parser.add_argument(
+        "--output-format", choices=OUTPUT_FORMATS, default="text", help="Format of the diagnostics (default: text)"
+    )
+    add_profile_argument(parser)
     parser.add_argument("filenames", nargs="*", help="Filenames to check")
     args = parser.parse_args(argv)
 
     if not args.filenames:
         return PASS
 
-    return check_files(args.filenames, error_message=args.error_message)
+    with profiling(profile_destination(args)):
+        return check_files(
+            args.filenames,
+            error_message=args.error_message,
+            use_index=not args.no_index,
+            fold=args.fold,
+            output_format=args.output_format,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import unicodedata
+from collections.abc import Callable
+from typing import Final
+
+FoldFunction = Callable[[str], str]
+
+
+class _CharTable(dict[int, str]):
+    """Translation table for ``str.translate`` mapping each char lazily, so every char is only computed once."""
+
+    def __init__(self, map_char: FoldFunction):
+        super().__init__()
+        self.map_char = map_char
+
+    def __missing__(self, codepoint: int) -> str:
+        mapped = self[codepoint] = self.map_char(chr(codepoint))
+        return mapped
+
+
+def _simple_case_fold(char: str) -> str:
+    # Only 1:1 mappings, e.g. "ß" is kept instead of being expanded to "ss"
+    folded = char.casefold()
+    return folded if len(folded) == 1 else char
+
+
+def _upcase(char: str) -> str:
+    upper = char.upper()
+    return upper if len(upper) == 1 else char
+
+
+_SIMPLE_CASE_FOLD_TABLE = _CharTable(_simple_case_fold)
+_UPCASE_TABLE = _CharTable(_upcase)
+
+
+def fold_lower(path: str) -> str:
+    return path.lower()
+
+
+def fold_casefold(path: str) -> str:
+    if path.isascii():
+        return path.lower()
+    return path.casefold()
+
+
+def fold_casefold_nfc(path: str) -> str:
+    """Canonical caseless matching, i.e. equal after case folding, no matter if composed (NFC) or decomposed (NFD)."""
+    if path.isascii():
+        return path.lower()
+    return unicodedata.normalize("NFC", unicodedata.normalize("NFD", path).casefold())
+
+
+def fold_apfs(path: str) -> str:
+    """Approximate APFS case-insensitive volumes: normalization-insensitive with simple (1:1) case folding."""
+    if path.isascii():
+        return path.lower()
+    path = unicodedata.normalize("NFD", path)
+    folded = path.casefold()
+    # Same length means there was no 1:n mapping, so full case folding gave the same result as simple case folding
+    return folded if len(folded) == len(path) else path.translate(_SIMPLE_CASE_FOLD_TABLE)
+
+
+def fold_ntfs(path: str) -> str:
+    """Approximate NTFS: per-char upcase table lookup, without any normalization."""
+    upper = path.upper()
+    # Same length means there was no 1:n mapping, which a per-char table can't express
+    return upper if len(upper) == len(path) else path.translate(_UPCASE_TABLE)
+
+
+FOLD_FUNCTIONS: Final[dict[str, FoldFunction]] = {
+    "lower": fold_lower,
+    "casefold": fold_casefold,
+    "casefold-nfc": fold_casefold_nfc,
+    "apfs": fold_apfs,
+    "ntfs": fold_ntfs,
+}
+DEFAULT_FOLD_MODE: Final[str] = "lower"
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import os
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from typing import Final
+
+from ..utils.git import iter_git_output, run_git
+from .fold import DEFAULT_FOLD_MODE, FOLD_FUNCTIONS
+from .trie import iter_parent_directories
+
+INDEX_FILENAME_TEMPLATE: Final[str] = "dochooks-case-index-{fold}.sqlite3"
+SCHEMA_VERSION: Final[str] = "2"
+
+
+class CaseIndex:
+    """Persistent index of the case-folded paths tracked in HEAD, stored in an SQLite database under the git dir.
+
+    The index is keyed on the tree id of HEAD. When HEAD moves, it is updated incrementally from
+    ``git diff-tree`` between the indexed tree and the current one, and only rebuilt from scratch when
+    that isn't possible (first run, schema change, indexed tree no longer available). Looking up a path
+    is a single indexed query, so checking a commit costs time proportional to the number of staged files.
+
+    Directories are indexed as well, together with the number of files inside of them, so that directory
+    level conflicts can be looked up the same way. Each folding mode has its own database, so hooks configured
+    with different modes don't invalidate each other.
+
+    Note that the index reflects HEAD, not the git index: files deleted in the current commit should be
+    excluded and files added in it checked along, see ``staged_changes``.
+    """
+
+    def __init__(self, db_path: str, fold: str = DEFAULT_FOLD_MODE):
+        # Like subprocess, only imported once the index is opened, so that runs with --no-index don't pay for it
+        import sqlite3
+
+        self.fold_function = FOLD_FUNCTIONS[fold]
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS paths (path TEXT PRIMARY KEY, folded TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS paths_folded ON paths (folded);
+            CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, folded TEXT NOT NULL, count INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS dirs_folded ON dirs (folded);
+            """
+        )
+
+    @classmethod
+    def open(cls, fold: str = DEFAULT_FOLD_MODE) -> CaseIndex | None:
+        """Open the index of the current git repository and bring it up to date with HEAD.
+
+        Returns:
+            The index, None if not in a git repository, HEAD is unborn, or the index can't be used
+        """
+        import sqlite3
+        import subprocess
+
+        try:
+            git_dir, tree = run_git("rev-parse", "--git-dir", "HEAD^{tree}").decode().splitlines()
+            index = cls(os.path.join(git_dir, INDEX_FILENAME_TEMPLATE.format(fold=fold)), fold)
+            index.sync(tree)
+        except (subprocess.CalledProcessError, FileNotFoundError, ValueError, sqlite3.Error):
+            return None
+        return index
+
+    def _get_meta(self, key: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _fold(self, path: str) -> str:
+        return self.fold_function(os.path.normpath(path))
+
+    def _add(self, paths: Iterable[str]) -> None:
+        dir_counts: Counter[str] = Counter()
+
+        def iter_rows() -> Iterator[tuple[str, str]]:
+            for path in paths:
+                dir_counts.update(iter_parent_directories(os.path.normpath(path)))
+                yield path, self._fold(path)
+
+        self.conn.executemany("INSERT OR REPLACE INTO paths (path, folded) VALUES (?, ?)", iter_rows())
+        self.conn.executemany(
+            """
+            INSERT INTO dirs (path, folded, count) VALUES (?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET count = count + excluded.count
+            """,
+            ((path, self.fold_function(path), count) for path, count in dir_counts.items()),
+        )
+
+    def _remove(self, paths: Iterable[str]) -> None:
+        dir_counts: Counter[str] = Counter()
+        for path in paths:
+            dir_counts.update(iter_parent_directories(os.path.normpath(path)))
+            self.conn.execute("DELETE FROM paths WHERE path = ?", (path,))
+        self.conn.executemany(
+            "UPDATE dirs SET count = count - ? WHERE path = ?", ((count, path) for path, count in dir_counts.items())
+        )
+        self.conn.execute("DELETE FROM dirs WHERE count <= 0")
+
+    def sync(self, tree: str) -> None:
+        """Update the index to match ``tree``."""
+        # Hold the write lock while checking staleness, so concurrent hook processes don't rebuild twice
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            indexed_tree = self._get_meta("tree")
+            schema = self._get_meta("schema")
+            if indexed_tree == tree and schema == SCHEMA_VERSION:
+                self.conn.execute("COMMIT")
+                return
+            if indexed_tree is None or schema != SCHEMA_VERSION or not self._update(indexed_tree, tree):
+                self._rebuild(tree)
+            self._set_meta("tree", tree)
+            self._set_meta("schema", SCHEMA_VERSION)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _update(self, old_tree: str, new_tree: str) -> bool:
+        import subprocess
+
+        try:
+            fields = list(iter_git_output("diff-tree", "-r", "-z", "--no-renames", "--name-status", old_tree, new_tree))
+        except subprocess.CalledProcessError:
+            return False
+        added: list[str] = []
+        deleted: list[str] = []
+        for status, path in zip(fields[::2], fields[1::2]):
+            if status == "D":
+                deleted.append(path)
+            elif status == "A":
+                added.append(path)
+        self._remove(deleted)
+        self._add(added)
+        return True
+
+    def _rebuild(self, tree: str) -> None:
+        self.conn.execute("DELETE FROM paths")
+        self.conn.execute("DELETE FROM dirs")
+        self._add(iter_git_output("ls-tree", "-r", "-z", "--name-only", "--full-tree", tree))
+
+    def lookup(self, path: str) -> list[str]:
+        """Get all indexed paths which are equal to ``path`` ignoring case."""
+        rows = self.conn.execute("SELECT path FROM paths WHERE folded = ?", (self._fold(path),))
+        return [row[0] for row in rows]
+
+    def lookup_directory(self, path: str) -> list[tuple[str, int]]:
+        """Get all indexed directories which are equal to ``path`` (with a trailing separator) ignoring case.
+
+        Returns:
+            Tuples of (directory, number of files inside of it)
+        """
+        rows = self.conn.execute("SELECT path, count FROM dirs WHERE folded = ?", (self.fold_function(path),))
+        return [(row[0], row[1]) for row in rows]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def staged_changes() -> tuple[list[str], set[str]]:
+    """Get the files added and deleted in the git index compared to HEAD, with a single git call.
+
+    Returns:
+        The added files and the deleted files, both empty if git fails
+    """
+    import subprocess
+
+    try:
+        fields = list(
+            iter_git_output("diff-index", "--cached", "-z", "--no-renames", "--name-status", "--diff-filter=AD", "HEAD")
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return [], set()
+    added: list[str] = []
+    deleted: set[str] = set()
+    for status, path in zip(fields[::2], fields[1::2]):
+        if status == "A":
+            added.append(path)
+        else:
+            deleted.add(path)
+    return added, deleted
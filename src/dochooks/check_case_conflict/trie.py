@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Iterator
+
+from .fold import DEFAULT_FOLD_MODE, FOLD_FUNCTIONS
+
+
+def is_directory(path: str) -> bool:
+    return path.endswith(("/", os.sep))
+
+
+def iter_parent_directories(path: str) -> Iterator[str]:
+    """Yield all parent directories of a normalized path, with a trailing separator, e.g. ``a/`` and ``a/b/``."""
+    end = path.find(os.sep)
+    while end >= 0:
+        yield path[: end + 1]
+        end = path.find(os.sep, end + 1)
+
+
+class _Node:
+    __slots__ = ("children", "dir_spellings", "file_spellings")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        # Original component spelling -> full original path, directories with a trailing separator
+        self.dir_spellings: dict[str, str] = {}
+        self.file_spellings: dict[str, str] = {}
+
+
+class CaseTrie:
+    """Trie over case-folded path components, detecting case conflicts of files and directories at any level.
+
+    Paths sharing a folded prefix share the trie nodes of that prefix. Every node remembers each distinct
+    original spelling of its component once, so ``Docs/a.md`` and ``docs/b.md`` end up as two spellings of
+    the same ``docs`` node, while files deeper down in a conflicting directory aren't reported again unless
+    their own spellings differ.
+    """
+
+    def __init__(self, fold: str = DEFAULT_FOLD_MODE):
+        self.fold_function = FOLD_FUNCTIONS[fold]
+        self.root = _Node()
+
+    def add(self, path: str) -> None:
+        """Add a normalized path, a trailing separator marks it as a directory."""
+        is_dir = is_directory(path)
+        if is_dir:
+            path = path.rstrip("/" + os.sep)
+        parts = path.split(os.sep)
+        # Folding never produces or removes separators, so both lists line up
+        folded_parts = self.fold_function(path).split(os.sep)
+        last = len(parts) - 1
+        node = self.root
+        end = -1
+        for i, part in enumerate(parts):
+            end += len(part) + 1
+            child = node.children.get(folded_parts[i])
+            if child is None:
+                child = node.children[folded_parts[i]] = _Node()
+            node = child
+            if i < last or is_dir:
+                if part not in node.dir_spellings:
+                    node.dir_spellings[part] = path[:end] + os.sep
+            elif part not in node.file_spellings:
+                node.file_spellings[part] = path
+
+    def find_conflicts(self) -> dict[str, list[str]]:
+        """Find all groups of paths which are equal ignoring case.
+
+        Returns:
+            Dictionary mapping folded paths (directories with a trailing separator) to conflicting original paths
+        """
+        conflicts: dict[str, list[str]] = {}
+        stack: list[tuple[str, _Node]] = [("", self.root)]
+        while stack:
+            folded_prefix, node = stack.pop()
+            for folded_part, child in node.children.items():
+                if child.children:
+                    stack.append((folded_prefix + folded_part + os.sep, child))
+                if len(child.dir_spellings) + len(child.file_spellings) < 2:
+                    continue
+                if len(child.dir_spellings.keys() | child.file_spellings.keys()) < 2:
+                    # Same spelling used both as a file and a directory
+                    continue
+                folded_path = folded_prefix + folded_part
+                if child.file_spellings:
+                    conflicts[folded_path] = [*child.file_spellings.values(), *child.dir_spellings.values()]
+                else:
+                    conflicts[folded_path + os.sep] = list(child.dir_spellings.values())
+        return conflicts
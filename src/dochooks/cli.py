@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import argparse
+import io
+from collections.abc import Sequence
+from functools import partial
+
+from dochooks import __version__
+
+from .insert_whitespace_between_cn_and_en_char.check import get_file_changed_lines, resolve_syntax
+from .insert_whitespace_between_cn_and_en_char.markup import MARKUP_SYNTAXES, check_prose, format_prose, make_scanner
+from .insert_whitespace_between_cn_and_en_char.pragma import scan_lines
+from .rules import Rule, load_builtin_rules
+from .utils.config import Config, ConfigError, load_config
+from .utils.diff import LineRange, LineSelector, get_staged_changed_lines
+from .utils.output import Diagnostic, add_output_arguments, make_writer, skipped_file
+from .utils.pipeline import add_io_argument, map_files_pipelined, write_file
+from .utils.profile import add_profile_argument, count, phase, profile_destination, profiling
+from .utils.return_code import FAIL, PASS, ReturnCode
+from .utils.sniff import NOT_UTF8, add_max_size_argument, sniff
+
+
+def run_rules(
+    text: str,
+    rules: Sequence[Rule],
+    fix: bool = False,
+    syntax: str = "none",
+    changed_lines: Sequence[LineRange] | None = None,
+) -> tuple[list[tuple[int, Rule, str]], str | None]:
+    """Run all rules over one decoded file buffer, scanning pragmas and markup only once.
+
+    Args:
+        text: The file content
+        rules: Rules to run, in order, each rule sees the line as fixed by the previous ones
+        fix: Whether to fix the lines violating fixable rules
+        syntax: Markup syntax, rules only see the prose spans of lines, code blocks are skipped entirely
+        changed_lines: If given, only lines in these (first, last) ranges are checked
+
+    Returns:
+        Diagnostics as (lineno, rule, line) tuples, the line being the fixed one in fix mode,
+        and the fixed text if anything changed, None otherwise
+    """
+    active_rules = [rule for rule in rules if not rule.is_clean(text)]
+    if not active_rules:
+        return [], None
+
+    diagnostics: list[tuple[int, Rule, str]] = []
+    chunks: list[str] = []
+    changed = False
+    scanner = make_scanner(syntax)
+    selector = None if changed_lines is None else LineSelector(changed_lines)
+    for lineno, line, skip_line in scan_lines(io.StringIO(text, newline="\n")):
+        if not scanner.in_code_block(line) and not skip_line and (selector is None or selector.selects(lineno)):
+            for rule in active_rules:
+                if rule.check_line(line):
+                    continue
+                # Only tokenize lines which some rule rejects as a whole
+                spans = scanner.prose_spans(line)
+                if check_prose(line, spans, rule.check_line):
+                    continue
+                if fix and rule.fixable:
+                    line = format_prose(line, spans, rule.fix_line)
+                    changed = True
+                diagnostics.append((lineno, rule, line))
+        chunks.append(line)
+    return diagnostics, "".join(chunks) if changed else None
+
+
+def _run_file(
+    file_path: str,
+    rule_names: Sequence[str],
+    fix: bool,
+    markup: str = "none",
+    changed_lines: dict[str, list[LineRange]] | None = None,
+    config: Config | None = None,
+    max_file_size: int | None = None,
+) -> tuple[ReturnCode, list[Diagnostic]]:
+    if get_file_changed_lines(file_path, changed_lines) == []:
+        return PASS, []
+    count("files_read")
+    with phase("read"), open(file_path, "rb") as f:
+        content = f.read()
+    result, fixed_text = _run_content(file_path, content, rule_names, fix, markup, changed_lines, config, max_file_size)
+    if fixed_text is not None:
+        count("files_rewritten")
+        write_file(file_path, fixed_text)
+    return result
+
+
+def _run_content(
+    file_path: str,
+    content: bytes | None,
+    rule_names: Sequence[str],
+    fix: bool,
+    markup: str = "none",
+    changed_lines: dict[str, list[LineRange]] | None = None,
+    config: Config | None = None,
+    max_file_size: int | None = None,
+) -> tuple[tuple[ReturnCode, list[Diagnostic]], str | None]:
+    """Pipeline stage of ``_run_file``, running the rules over the prefetched content and returning the fixed text."""
+    if content is None:
+        return _run_file(file_path, rule_names, fix, markup, changed_lines, config, max_file_size), None
+    file_changed_lines = get_file_changed_lines(file_path, changed_lines)
+    if file_changed_lines == []:
+        return (PASS, []), None
+    skip_reason = sniff(content, max_file_size)
+    if skip_reason is None:
+        try:
+            text = content.decode("utf8")
+        except UnicodeDecodeError:
+            skip_reason = NOT_UTF8
+    if skip_reason is not None:
+        count("files_skipped")
+        return (PASS, [skipped_file(file_path, skip_reason)]), None
+    return _run_text(file_path, text, rule_names, fix, markup, file_changed_lines, config)
+
+
+def _run_text(
+    file_path: str,
+    text: str,
+    rule_names: Sequence[str],
+    fix: bool,
+    markup: str = "none",
+    changed_lines: Sequence[LineRange] | None = None,
+    config: Config | None = None,
+) -> tuple[tuple[ReturnCode, list[Diagnostic]], str | None]:
+    # Looked up by name, so that worker processes don't need to pickle rule instances
+    all_rules = load_builtin_rules()
+    rules = [all_rules[name].with_config(config or {}) for name in rule_names]
+    syntax = resolve_syntax(file_path, markup)
+    count("bytes_scanned", len(text))
+    with phase("scan"):
+        diagnostics, fixed_text = run_rules(text, rules, fix, syntax, changed_lines)
+    count("lines_with_hits", len(diagnostics))
+
+    scanner = make_scanner(syntax)
+    file_diagnostics = [
+        Diagnostic(rule.name, rule.fix_message, file_path, lineno, source=line.strip())
+        if fix and rule.fixable
+        # Columns only make sense for the original line, i.e. when nothing was fixed
+        else Diagnostic(
+            rule.name,
+            rule.check_message,
+            file_path,
+            lineno,
+            rule.find_columns(line, scanner.prose_spans(line)),
+            line.strip(),
+        )
+        for lineno, rule, line in diagnostics
+    ]
+    return (FAIL if diagnostics else PASS, file_diagnostics), fixed_text
+
+
+def main(argv: Sequence[str] | None = None) -> ReturnCode:
+    all_rules = load_builtin_rules()
+    parser = argparse.ArgumentParser(prog="dochooks", description="pre-commit hooks for documentation")
+    parser.add_argument("-v", "--version", action="version", version=__version__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Run rules over files, reading each file only once")
+    run_parser.add_argument("--fix", action="store_true", help="Fix violations of fixable rules in place")
+    run_parser.add_argument(
+        "--rule",
+        dest="rules",
+        action="append",
+        choices=all_rules.keys(),
+        help="Rule to run, can be given multiple times (default: all rules)",
+    )
+    run_parser.add_argument(
+        "--markup",
+        choices=["auto", *MARKUP_SYNTAXES],
+        default="auto",
+        help="Markup syntax whose code, URLs and link targets are skipped (default: auto, by file extension)",
+    )
+    run_parser.add_argument(
+        "--changed-lines-only",
+        action="store_true",
+        help="Only check the lines changed in the staged diff (all lines outside of a git repository)",
+    )
+    run_parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="Number of worker processes (default: number of CPUs)"
+    )
+    add_output_arguments(run_parser)
+    add_io_argument(run_parser)
+    add_max_size_argument(run_parser)
+    add_profile_argument(run_parser)
+    run_parser.add_argument("filenames", nargs="*", help="Filenames to check")
+    args = parser.parse_args(argv)
+    rule_names = args.rules or list(all_rules)
+    try:
+        config = load_config()
+        # Fail early on invalid options, instead of in every worker
+        for name in rule_names:
+            all_rules[name].with_config(config)
+    except ConfigError as e:
+        parser.error(str(e))
+
+    with profiling(profile_destination(args)):
+        changed_lines = get_staged_changed_lines(args.filenames) if args.changed_lines_only and args.filenames else None
+        run_content = partial(
+            _run_content,
+            rule_names=rule_names,
+            fix=args.fix,
+            markup=args.markup,
+            changed_lines=changed_lines,
+            config=config,
+            max_file_size=args.max_file_size,
+        )
+        ret_code: ReturnCode = PASS
+        with make_writer(args.output_format, args.max_diagnostics_per_file) as writer:
+            for file_ret_code, diagnostics in map_files_pipelined(
+                run_content, args.filenames, args.jobs, args.io_threads
+            ):
+                writer.write_file(diagnostics)
+                ret_code |= file_ret_code
+    return ret_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
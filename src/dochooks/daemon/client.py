@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+from collections.abc import Sequence
+from typing import Any, Final
+
+from dochooks import __version__
+
+from ..entry_points import HOOKS, has_no_filenames, run_hook
+from ..utils.return_code import PASS, ReturnCode
+
+SOCKET_ENV: Final[str] = "DOCHOOKS_DAEMON_SOCKET"
+# Environment variables the hooks depend on, sent along with each request as the daemon has its own environment.
+# pre-commit points GIT_INDEX_FILE at a temporary index when committing only some of the changes.
+FORWARDED_ENV: Final[tuple[str, ...]] = (
+    "GIT_DIR",
+    "GIT_INDEX_FILE",
+    "GIT_WORK_TREE",
+    "XDG_CACHE_HOME",
+    "DOCHOOKS_PROFILE",
+)
+
+
+def default_socket_path() -> str:
+    if socket_path := os.environ.get(SOCKET_ENV):
+        return socket_path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(runtime_dir, f"dochooks-{uid}.sock")
+
+
+def send_request(request: dict[str, Any], socket_path: str, timeout: float | None = None) -> dict[str, Any] | None:
+    """Send a request to the daemon and wait for its response.
+
+    Returns:
+        The response, None if the daemon is not running (or not supported on this platform) or didn't answer
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+        return json.loads(line) if line else None
+    except (OSError, ValueError):
+        return None
+
+
+def run_in_process(hook: str, argv: Sequence[str]) -> ReturnCode:
+    return run_hook(hook, argv)
+
+
+def run(hook: str, argv: Sequence[str], socket_path: str | None = None) -> ReturnCode:
+    """Run a hook in the daemon if it is running, in this process otherwise."""
+    request = {
+        "version": __version__,
+        "hook": hook,
+        "argv": list(argv),
+        "cwd": os.getcwd(),
+        "env": {name: os.environ.get(name) for name in FORWARDED_ENV},
+    }
+    response = send_request(request, socket_path or default_socket_path())
+    if response is None or "error" in response:
+        return run_in_process(hook, argv)
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["code"]
+
+
+def main(argv: Sequence[str] | None = None) -> ReturnCode:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in HOOKS:
+        print(f"usage: dochooks-client {{{','.join(HOOKS)}}} [args ...]", file=sys.stderr)
+        return 2
+    # Not worth a round trip to the daemon
+    if has_no_filenames(argv[0], argv[1:]):
+        return PASS
+    return run(argv[0], argv[1:])
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
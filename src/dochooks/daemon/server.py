@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import sys
+import traceback
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any
+
+from dochooks import __version__
+
+from ..utils.return_code import PASS, ReturnCode
+from .client import FORWARDED_ENV, HOOKS, default_socket_path, run_in_process, send_request
+
+
+@contextlib.contextmanager
+def request_environment(cwd: str, env: Mapping[str, str | None]) -> Iterator[None]:
+    """Switch to the working directory and the forwarded environment of the client for the enclosed request."""
+    old_cwd = os.getcwd()
+    old_env = {name: os.environ.get(name) for name in FORWARDED_ENV}
+    os.chdir(cwd)
+    try:
+        for name in FORWARDED_ENV:
+            _set_env(name, env.get(name))
+        yield
+    finally:
+        for name, value in old_env.items():
+            _set_env(name, value)
+        os.chdir(old_cwd)
+
+
+def _set_env(name: str, value: str | None) -> None:
+    if value is None:
+        os.environ.pop(name, None)
+    else:
+        os.environ[name] = value
+
+
+def run_hook(hook: str, argv: Sequence[str]) -> dict[str, Any]:
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            code = run_in_process(hook, argv)
+        except SystemExit as e:
+            # argparse exits on --help, --version and usage errors, handled the way the interpreter would
+            if e.code is None or isinstance(e.code, int):
+                code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except Exception:
+            # Report a crash the way the interpreter would, the hook may already have rewritten files,
+            # so the client must not run it again
+            traceback.print_exc()
+            code = 1
+    return {"code": code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def handle_request(request: dict[str, Any]) -> dict[str, Any]:
+    """Answer a request.
+
+    Returns:
+        The status of the daemon, or the return code and output of the requested hook run. Requests which
+        can't be run respond with an error instead, so that the client runs the hook itself.
+    """
+    if request.get("command") == "status":
+        return {"version": __version__, "pid": os.getpid()}
+    if request.get("version") != __version__:
+        return {"error": f"version mismatch, daemon is running dochooks {__version__}"}
+    hook = request.get("hook")
+    if hook not in HOOKS:
+        return {"error": f"unknown hook {hook!r}"}
+    argv = request.get("argv")
+    if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+        return {"error": "invalid request: argv must be a list of strings"}
+    try:
+        with request_environment(request["cwd"], request.get("env", {})):
+            return run_hook(hook, argv)
+    except Exception as e:
+        return {"error": f"invalid request: {e!r}"}
+
+
+def read_request(line: bytes) -> dict[str, Any]:
+    """Parse a request line.
+
+    Raises:
+        ValueError: The line isn't a JSON object
+    """
+    request = json.loads(line or "{}")
+    if not isinstance(request, dict):
+        raise ValueError("request is not a JSON object")
+    return request
+
+
+def serve(socket_path: str, idle_timeout: float | None = None) -> None:
+    """Serve hook requests on a Unix socket until shut down or idle for ``idle_timeout`` seconds.
+
+    Requests are handled one at a time, as hooks change the working directory and redirect stdout.
+    Everything imported by the hooks (compiled patterns, the result cache and the case-fold index modules)
+    stays loaded between requests, so each request skips interpreter startup and import costs.
+    """
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(socket_path)
+        finally:
+            os.umask(old_umask)
+        server.listen()
+        server.settimeout(idle_timeout)
+        try:
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except TimeoutError:
+                    break
+                # A client going away mid-request mustn't take the daemon down
+                with conn, conn.makefile("rb") as f, contextlib.suppress(OSError):
+                    conn.settimeout(None)
+                    try:
+                        request = read_request(f.readline())
+                    except ValueError as e:
+                        response = {"error": f"invalid request: {e}"}
+                    else:
+                        if request.get("command") == "shutdown":
+                            conn.sendall(b"{}\n")
+                            break
+                        response = handle_request(request)
+                    conn.sendall(json.dumps(response).encode() + b"\n")
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(socket_path)
+
+
+def main(argv: Sequence[str] | None = None) -> ReturnCode:
+    parser = argparse.ArgumentParser(
+        prog="dochooks-daemon", description="Serve dochooks hooks from a long-running process"
+    )
+    parser.add_argument("-v", "--version", action="version", version=__version__)
+    parser.add_argument("command", choices=["serve", "stop", "status"], help="What to do")
+    parser.add_argument(
+        "--socket",
+        default=None,
+        help="Unix socket path (default: $DOCHOOKS_DAEMON_SOCKET, or dochooks-<uid>.sock in $XDG_RUNTIME_DIR)",
+    )
+    parser.add_argument(
+        "--idle-timeout", type=float, default=None, help="Exit after this many seconds without requests"
+    )
+    args = parser.parse_args(argv)
+
+    socket_path = args.socket or default_socket_path()
+    if args.command == "serve":
+        serve(socket_path, args.idle_timeout)
+    elif args.command == "stop":
+        if send_request({"command": "shutdown"}, socket_path) is None:
+            print("dochooks daemon is not running")
+    else:
+        response = send_request({"command": "status"}, socket_path)
+        if response is None:
+            print(f"dochooks daemon is not running on {socket_path}")
+        else:
+            print(f"dochooks daemon {response['version']} is running on {socket_path} (pid {response['pid']})")
+    return PASS
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
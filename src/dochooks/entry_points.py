@@ -0,0 +1,80 @@
+"""Console entry points of the hooks.
+
+pre-commit may start a hook many times per commit, also with nothing to check, so this module imports nothing
+beyond what the interpreter has loaded anyway: runs without filenames return right away, and the hook module
+(with its argument parser, patterns and helpers) is only imported when there is something to do.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+from .utils.return_code import PASS, ReturnCode
+
+# Saves importing typing
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+# Hook ids and the modules whose ``main`` runs them
+HOOKS: dict[str, str] = {
+    "dochooks": "dochooks.cli",
+    "check-whitespace-between-cn-and-en-char": "dochooks.insert_whitespace_between_cn_and_en_char.check",
+    "insert-whitespace-between-cn-and-en-char": "dochooks.insert_whitespace_between_cn_and_en_char.format",
+    "check-case-conflict": "dochooks.check_case_conflict.check",
+}
+# Leading subcommand of hooks with subcommands, only runs of that subcommand can be skipped
+SUBCOMMANDS: dict[str, str] = {"dochooks": "run"}
+# Options which take no value and don't change the output of a run without files. Any other argument is left to
+# the argument parser of the hook, which may have to print help, reject an option or write an (empty) report.
+NO_VALUE_FLAGS: dict[str, frozenset[str]] = {
+    "dochooks": frozenset({"--fix", "--changed-lines-only"}),
+    "check-whitespace-between-cn-and-en-char": frozenset({"--changed-lines-only", "--no-cache"}),
+    "insert-whitespace-between-cn-and-en-char": frozenset({"--changed-lines-only", "--no-cache"}),
+    "check-case-conflict": frozenset({"--no-index"}),
+}
+# Same as dochooks.utils.profile.PROFILE_ENV, profiled runs always report, even without files
+_PROFILE_ENV = "DOCHOOKS_PROFILE"
+
+
+def has_no_filenames(hook: str, argv: Sequence[str]) -> bool:
+    """Whether the arguments surely contain no filename, so that running the hook would do nothing."""
+    if os.environ.get(_PROFILE_ENV):
+        return False
+    if hook in SUBCOMMANDS:
+        if not argv or argv[0] != SUBCOMMANDS[hook]:
+            return False
+        argv = argv[1:]
+    flags = NO_VALUE_FLAGS[hook]
+    for i, arg in enumerate(argv):
+        if arg == "--":
+            return i == len(argv) - 1
+        if arg not in flags:
+            return False
+    return True
+
+
+def run_hook(hook: str, argv: Sequence[str] | None = None) -> ReturnCode:
+    argv = sys.argv[1:] if argv is None else argv
+    if has_no_filenames(hook, argv):
+        return PASS
+    import importlib
+
+    return importlib.import_module(HOOKS[hook]).main(argv)
+
+
+def dochooks(argv: Sequence[str] | None = None) -> ReturnCode:
+    return run_hook("dochooks", argv)
+
+
+def check_whitespace_between_cn_and_en_char(argv: Sequence[str] | None = None) -> ReturnCode:
+    return run_hook("check-whitespace-between-cn-and-en-char", argv)
+
+
+def insert_whitespace_between_cn_and_en_char(argv: Sequence[str] | None = None) -> ReturnCode:
+    return run_hook("insert-whitespace-between-cn-and-en-char", argv)
+
+
+def check_case_conflict(argv: Sequence[str] | None = None) -> ReturnCode:
+    return run_hook("check-case-conflict", argv)
@@ -0,0 +1,99 @@
+"""Check and format many in-memory documents at once, e.g. rendered pages of a documentation build.
+
+Results are reported as offsets into the documents instead of copies of the offending lines, so that a
+batch stays compact no matter how large the documents are.
+"""
+
+from __future__ import annotations
+
+import io
+from array import array
+from collections.abc import Hashable, Iterable, Iterator
+from functools import partial
+from typing import NamedTuple
+
+from ..utils.parallel import map_files
+from .markup import make_scanner
+from .pragma import PRAGMA_PREFIX, scan_lines
+from .regex import DEFAULT_CHAR_CLASSES, CharClasses
+
+Document = tuple[Hashable, str | bytes]
+
+
+class DocumentResult(NamedTuple):
+    id: Hashable
+    # Offsets into the (decoded) document at which a space is missing, in increasing order
+    offsets: array[int]
+    # The document with the missing spaces inserted, if fixing was requested
+    formatted: str | None = None
+
+
+def find_boundary_offsets(
+    text: str, syntax: str = "none", char_classes: CharClasses = DEFAULT_CHAR_CLASSES
+) -> array[int]:
+    """Find the offsets of all CN/EN boundaries of a document, honoring pragmas and markup like ``check_lines``.
+
+    Documents without pragmas and markup are searched as a whole, without slicing out any lines.
+    """
+    offsets = array("q")
+    if char_classes.is_clean(text):
+        return offsets
+    if PRAGMA_PREFIX not in text and syntax == "none":
+        offsets.extend(match.end() for match in char_classes.boundary.finditer(text))
+        return offsets
+
+    scanner = make_scanner(syntax)
+    line_start = 0
+    for _, line, skip_line in scan_lines(io.StringIO(text, newline="\n")):
+        # The scanner has to see every line to keep track of code blocks
+        if not scanner.in_code_block(line) and not skip_line and not char_classes.is_clean(line):
+            for start, end in scanner.prose_spans(line):
+                matches = char_classes.boundary.finditer(line, start, end)
+                offsets.extend(line_start + match.end() for match in matches)
+        line_start += len(line)
+    return offsets
+
+
+def insert_spaces_at(text: str, offsets: Iterable[int]) -> str:
+    chunks: list[str] = []
+    last = 0
+    for offset in offsets:
+        chunks.append(text[last:offset])
+        last = offset
+    chunks.append(text[last:])
+    return " ".join(chunks)
+
+
+def check_document(
+    document: Document, syntax: str = "none", fix: bool = False, char_classes: CharClasses = DEFAULT_CHAR_CLASSES
+) -> DocumentResult:
+    document_id, content = document
+    text = content.decode("utf8") if isinstance(content, bytes) else content
+    offsets = find_boundary_offsets(text, syntax, char_classes)
+    return DocumentResult(document_id, offsets, insert_spaces_at(text, offsets) if fix and offsets else None)
+
+
+def check_documents(
+    documents: Iterable[Document],
+    syntax: str = "none",
+    fix: bool = False,
+    char_classes: CharClasses = DEFAULT_CHAR_CLASSES,
+    jobs: int | None = 1,
+) -> Iterator[DocumentResult]:
+    """Check a batch of documents, without touching the disk.
+
+    Args:
+        documents: (id, content) pairs, bytes are decoded as UTF-8, offsets always refer to the decoded text
+        syntax: Markup syntax of all documents
+        fix: Whether to return the formatted text of the documents which need formatting
+        char_classes: CN and EN chars to separate
+        jobs: Number of worker processes, ``None`` for the CPU count, documents are only pickled to workers if not 1
+
+    Yields:
+        Results of the documents which need formatting, in the same order as ``documents``
+    """
+    check = partial(check_document, syntax=syntax, fix=fix, char_classes=char_classes)
+    results = map(check, documents) if jobs == 1 else map_files(check, list(documents), jobs)
+    for result in results:
+        if result.offsets:
+            yield result
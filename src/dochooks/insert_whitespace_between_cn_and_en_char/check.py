@@ -1,53 +1,330 @@
 from __future__ import annotations
 
 import argparse
-from collections.abc import Iterable, Sequence
+import io
+import itertools
+import mmap
+import os
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from typing import Final
 
 from dochooks import __version__
 
+from ..utils.cache import ResultCache, default_cache_dir
+from ..utils.config import ConfigError, load_config
+from ..utils.diff import LineRange, LineSelector, get_staged_changed_lines
+from ..utils.output import Diagnostic, add_output_arguments, make_writer, skipped_file
+from ..utils.pipeline import add_io_argument, map_files_pipelined
+from ..utils.profile import add_profile_argument, count, phase, profile_destination, profiling
 from ..utils.return_code import FAIL, PASS, ReturnCode
-from .pragma import PragmaManager
-from .regex import REGEX_CN_WITH_EN, REGEX_EN_WITH_CN
+from ..utils.sniff import NOT_UTF8, add_max_size_argument, sniff
+from .markup import MARKUP_SYNTAXES, MarkupScanner, Spans, check_prose, detect_syntax, make_scanner
+from .pragma import PRAGMA_PREFIX, scan_lines
+from .regex import DEFAULT_CHAR_CLASSES, CharClasses, char_classes_from_config
+from .scan import Buffer, count_newlines, iter_hit_lines, iter_lines
 
+RULE_NAME: Final[str] = "whitespace-between-cn-and-en-char"
+CHECK_MESSAGE: Final[str] = "No spaces between EN and CN chars detected at"
 
-def check(string: str) -> bool:
-    if REGEX_CN_WITH_EN.search(string) or REGEX_EN_WITH_CN.search(string):
-        return False
-    return True
+# Files at least this large are mmapped and scanned as raw bytes instead of being read and decoded
+MMAP_THRESHOLD: Final[int] = 8 << 20
 
 
-def check_lines(lines: Iterable[str]) -> tuple[bool, list[tuple[int, str]]]:
+def check(string: str, char_classes: CharClasses = DEFAULT_CHAR_CLASSES) -> bool:
+    return char_classes.is_clean(string)
+
+
+def find_boundary_columns(
+    line: str, spans: Spans | None = None, char_classes: CharClasses = DEFAULT_CHAR_CLASSES
+) -> tuple[int, ...]:
+    """Find the 1-based columns of the chars which need a space inserted before them."""
+    if spans is None:
+        spans = [(0, len(line))]
+    return tuple(match.end() + 1 for start, end in spans for match in char_classes.boundary.finditer(line, start, end))
+
+
+def check_markup_line(line: str, scanner: MarkupScanner, char_classes: CharClasses = DEFAULT_CHAR_CLASSES) -> bool:
+    """Check only the prose of a line, tokenizing it only if the whole line doesn't pass."""
+    return char_classes.is_clean(line) or check_prose(line, scanner.prose_spans(line), char_classes.is_clean)
+
+
+def check_lines(
+    lines: Iterable[str],
+    syntax: str = "none",
+    changed_lines: Sequence[LineRange] | None = None,
+    char_classes: CharClasses = DEFAULT_CHAR_CLASSES,
+) -> tuple[bool, list[tuple[int, str]]]:
+    diagnostics: list[tuple[int, str]] = []
+    scanner = make_scanner(syntax)
+    selector = None if changed_lines is None else LineSelector(changed_lines)
+    for lineno, line, skip_line in scan_lines(lines):
+        # The scanner has to see every line to keep track of code blocks, same for pragmas
+        if scanner.in_code_block(line) or skip_line:
+            continue
+        if selector is not None and not selector.selects(lineno):
+            continue
+        if not check_markup_line(line, scanner, char_classes):
+            diagnostics.append((lineno, line))
+    return bool(diagnostics), diagnostics
+
+
+def check_text(
+    text: str,
+    syntax: str = "none",
+    changed_lines: Sequence[LineRange] | None = None,
+    char_classes: CharClasses = DEFAULT_CHAR_CLASSES,
+) -> tuple[bool, list[tuple[int, str]]]:
+    """Check a whole file buffer, same as ``check_lines`` but much faster for clean files.
+
+    The whole buffer is scanned at once, and only the lines around boundary hits are sliced out.
+    Line-level processing is only needed when the text contains a pragma or markup has to be tokenized.
+    """
+    if char_classes.is_clean(text):
+        # Pragmas, markup and changed lines can only exclude text from checking,
+        # so a buffer without any boundary passes
+        return False, []
+    if PRAGMA_PREFIX in text or syntax != "none":
+        return check_lines(io.StringIO(text, newline="\n"), syntax, changed_lines, char_classes)
+
+    selector = None if changed_lines is None else LineSelector(changed_lines)
+    diagnostics: list[tuple[int, str]] = []
+    lineno = 1
+    last_pos = 0
+    line_end = 0
+    for match in char_classes.boundary.finditer(text):
+        pos = match.start()
+        if pos < line_end:
+            # Already reported this line
+            continue
+        lineno += text.count("\n", last_pos, pos)
+        last_pos = pos
+        line_start = text.rfind("\n", 0, pos) + 1
+        line_end = text.find("\n", pos) + 1 or len(text)
+        if selector is None or selector.selects(lineno):
+            diagnostics.append((lineno, text[line_start:line_end]))
+    return bool(diagnostics), diagnostics
+
+
+def check_buffer(
+    buf: Buffer,
+    syntax: str = "none",
+    changed_lines: Sequence[LineRange] | None = None,
+    char_classes: CharClasses = DEFAULT_CHAR_CLASSES,
+) -> tuple[bool, list[tuple[int, str]]]:
+    """Same as ``check_text`` for raw UTF-8 content, e.g. an mmap of a huge file, without decoding all of it.
+
+    Only the lines containing a boundary are decoded. Files containing a pragma or markup still need
+    line-level processing, but only once they turn out to contain a boundary at all.
+    """
+    hits = iter_hit_lines(buf, char_classes)
+    first_hit = next(hits, None)
+    if first_hit is None:
+        return False, []
+    if syntax != "none" or buf.find(PRAGMA_PREFIX.encode()) >= 0:
+        return check_lines(iter_lines(buf), syntax, changed_lines, char_classes)
+
+    selector = None if changed_lines is None else LineSelector(changed_lines)
     diagnostics: list[tuple[int, str]] = []
-    need_format = False
-    pragma_manager = PragmaManager()
-    for lineno, line in enumerate(lines, 1):
-        with pragma_manager.scan(line) as skip_line:
-            if skip_line:
-                continue
-            if not check(line):
-                need_format = True
-                diagnostics.append((lineno, line))
+    lineno = 1
+    last_pos = 0
+    for line_start, line in itertools.chain([first_hit], hits):
+        lineno += count_newlines(buf, last_pos, line_start)
+        last_pos = line_start
+        if selector is None or selector.selects(lineno):
+            diagnostics.append((lineno, line))
+    return bool(diagnostics), diagnostics
+
+
+def make_result_cache(
+    cache_dir: str | None, syntax: str = "none", char_classes: CharClasses = DEFAULT_CHAR_CLASSES
+) -> ResultCache | None:
+    if cache_dir is None:
+        return None
+    # The char ranges rather than the patterns, which don't need to be compiled for files found in the cache
+    config = "\0".join([repr(char_classes.cn_ranges), repr(char_classes.en_ranges), PRAGMA_PREFIX, syntax])
+    return ResultCache(cache_dir, RULE_NAME, config)
+
+
+def resolve_syntax(file_path: str, markup: str) -> str:
+    return detect_syntax(file_path) if markup == "auto" else markup
+
+
+def check_file_content(
+    content: Buffer,
+    cache: ResultCache | None = None,
+    syntax: str = "none",
+    changed_lines: Sequence[LineRange] | None = None,
+    char_classes: CharClasses = DEFAULT_CHAR_CLASSES,
+) -> tuple[bool, list[tuple[int, str]]]:
+    """Same as ``check_text`` for raw file content, skipping files the cache already knows to be clean.
+
+    Bytes are decoded as a whole, mmaps are scanned with ``check_buffer``.
+    """
+    if cache is not None:
+        with phase("cache"):
+            is_clean = cache.is_clean(content)
+        if is_clean:
+            count("cache_hits")
+            return False, []
+    count("bytes_scanned", len(content))
+    with phase("scan"):
+        if isinstance(content, bytes):
+            need_format, diagnostics = check_text(content.decode("utf8"), syntax, changed_lines, char_classes)
+        else:
+            need_format, diagnostics = check_buffer(content, syntax, changed_lines, char_classes)
+    count("lines_with_hits", len(diagnostics))
+    # Only a check of all lines can tell that the whole content is clean
+    if not need_format and cache is not None and changed_lines is None:
+        with phase("cache"):
+            cache.mark_clean(content)
     return need_format, diagnostics
 
 
-def _check_file(file_path: str) -> ReturnCode:
-    with open(file_path, encoding="utf8", newline="\n") as f:
-        need_format, diagnostics = check_lines(f)
-    if need_format:
-        for lineno, line in diagnostics:
-            print(f"No spaces between EN and CN chars detected at: {file_path}:{lineno}:\t{line.strip()}")
-    return FAIL if need_format else PASS
+def sniff_and_check(
+    content: Buffer,
+    cache: ResultCache | None = None,
+    syntax: str = "none",
+    changed_lines: Sequence[LineRange] | None = None,
+    char_classes: CharClasses = DEFAULT_CHAR_CLASSES,
+    max_file_size: int | None = None,
+) -> tuple[str | None, bool, list[tuple[int, str]]]:
+    """Same as ``check_file_content``, for content which may be binary, in another encoding or too large.
+
+    Returns:
+        Why the file was skipped (None if it was checked), whether it needs formatting and the diagnostics
+    """
+    skip_reason = sniff(content, max_file_size)
+    if skip_reason is None:
+        try:
+            return None, *check_file_content(content, cache, syntax, changed_lines, char_classes)
+        except UnicodeDecodeError:
+            # Invalid UTF-8 beyond the sniffed part
+            skip_reason = NOT_UTF8
+    count("files_skipped")
+    return skip_reason, False, []
+
+
+@contextmanager
+def open_content(file_path: str) -> Iterator[Buffer]:
+    """Read a file, or mmap it if it's at least ``MMAP_THRESHOLD`` bytes large."""
+    count("files_read")
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+            with phase("read"):
+                content = f.read()
+            yield content
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield buf
+
+
+def get_file_changed_lines(file_path: str, changed_lines: dict[str, list[LineRange]] | None) -> list[LineRange] | None:
+    if changed_lines is None:
+        return None
+    return changed_lines.get(os.path.normpath(file_path), [])
+
+
+def _check_file(
+    file_path: str,
+    cache_dir: str | None = None,
+    markup: str = "none",
+    changed_lines: dict[str, list[LineRange]] | None = None,
+    content: bytes | None = None,
+    char_classes: CharClasses = DEFAULT_CHAR_CLASSES,
+    max_file_size: int | None = None,
+) -> tuple[ReturnCode, list[Diagnostic]]:
+    syntax = resolve_syntax(file_path, markup)
+    file_changed_lines = get_file_changed_lines(file_path, changed_lines)
+    if file_changed_lines == []:
+        return PASS, []
+    with open_content(file_path) if content is None else nullcontext(content) as file_content:
+        skip_reason, need_format, diagnostics = sniff_and_check(
+            file_content,
+            make_result_cache(cache_dir, syntax, char_classes),
+            syntax,
+            file_changed_lines,
+            char_classes,
+            max_file_size,
+        )
+    if skip_reason is not None:
+        return PASS, [skipped_file(file_path, skip_reason)]
+    scanner = make_scanner(syntax)
+    return FAIL if need_format else PASS, [
+        Diagnostic(
+            RULE_NAME,
+            CHECK_MESSAGE,
+            file_path,
+            lineno,
+            find_boundary_columns(line, scanner.prose_spans(line), char_classes),
+            line.strip(),
+        )
+        for lineno, line in diagnostics
+    ]
+
+
+def _check_content(
+    file_path: str,
+    content: bytes | None,
+    cache_dir: str | None = None,
+    markup: str = "none",
+    changed_lines: dict[str, list[LineRange]] | None = None,
+    char_classes: CharClasses = DEFAULT_CHAR_CLASSES,
+    max_file_size: int | None = None,
+) -> tuple[tuple[ReturnCode, list[Diagnostic]], None]:
+    """Pipeline stage of ``_check_file``, checking the prefetched content if any, checks never rewrite files."""
+    return _check_file(file_path, cache_dir, markup, changed_lines, content, char_classes, max_file_size), None
 
 
 def main(argv: Sequence[str] | None = None) -> ReturnCode:
     parser = argparse.ArgumentParser(prog="dochooks", description="pre-commit hooks for documentation")
     parser.add_argument("-v", "--version", action="version", version=__version__)
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="Number of worker processes (default: number of CPUs)"
+    )
+    parser.add_argument("--cache-dir", default=default_cache_dir(), help="Directory to cache clean files in")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the result cache")
+    parser.add_argument(
+        "--markup",
+        choices=["auto", *MARKUP_SYNTAXES],
+        default="auto",
+        help="Markup syntax whose code, URLs and link targets are skipped (default: auto, by file extension)",
+    )
+    parser.add_argument(
+        "--changed-lines-only",
+        action="store_true",
+        help="Only check the lines changed in the staged diff (all lines outside of a git repository)",
+    )
+    add_output_arguments(parser)
+    add_io_argument(parser)
+    add_max_size_argument(parser)
+    add_profile_argument(parser)
     parser.add_argument("filenames", nargs="*", help="Filenames to check")
     args = parser.parse_args(argv)
+    try:
+        char_classes = char_classes_from_config(load_config())
+    except ConfigError as e:
+        parser.error(str(e))
 
-    ret_code: ReturnCode = PASS
-    for filename in args.filenames:
-        ret_code |= _check_file(filename)
+    with profiling(profile_destination(args)):
+        check_content = partial(
+            _check_content,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            char_classes=char_classes,
+            max_file_size=args.max_file_size,
+            markup=args.markup,
+            changed_lines=(
+                get_staged_changed_lines(args.filenames) if args.changed_lines_only and args.filenames else None
+            ),
+        )
+        ret_code: ReturnCode = PASS
+        with make_writer(args.output_format, args.max_diagnostics_per_file) as writer:
+            for file_ret_code, diagnostics in map_files_pipelined(
+                check_content, args.filenames, args.jobs, args.io_threads, prefetch_limit=MMAP_THRESHOLD
+            ):
+                writer.write_file(diagnostics)
+                ret_code |= file_ret_code
     return ret_code
 
 
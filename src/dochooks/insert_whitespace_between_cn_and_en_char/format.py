@@ -1,63 +1,230 @@
 from __future__ import annotations
 
 import argparse
-from collections.abc import Iterable, Sequence
+import io
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from functools import partial
+from typing import Final
 
 from dochooks import __version__
 
+from ..utils.cache import default_cache_dir
+from ..utils.config import ConfigError, load_config
+from ..utils.diff import LineRange, LineSelector, get_staged_changed_lines
+from ..utils.fs import atomic_write
+from ..utils.output import Diagnostic, add_output_arguments, make_writer, skipped_file
+from ..utils.pipeline import add_io_argument, map_files_pipelined
+from ..utils.profile import add_profile_argument, count, phase, profile_destination, profiling
 from ..utils.return_code import FAIL, PASS, ReturnCode
-from .check import check
-from .pragma import PragmaManager
-from .regex import REGEX_CN_WITH_EN, REGEX_EN_WITH_CN
-
-
-def format(text: str) -> str:
-    text = REGEX_CN_WITH_EN.sub(r"\g<cn> \g<en>", text)
-    text = REGEX_EN_WITH_CN.sub(r"\g<en> \g<cn>", text)
-    return text
-
-
-def format_lines(lines: Iterable[str]) -> tuple[bool, str, list[tuple[int, str]]]:
-    formatted_text: str = ""
+from ..utils.sniff import NOT_UTF8, add_max_size_argument
+from .check import (
+    MMAP_THRESHOLD,
+    RULE_NAME,
+    get_file_changed_lines,
+    make_result_cache,
+    open_content,
+    resolve_syntax,
+    sniff_and_check,
+)
+from .markup import MARKUP_SYNTAXES, format_prose, make_scanner
+from .pragma import scan_lines
+from .regex import DEFAULT_CHAR_CLASSES, CharClasses, char_classes_from_config
+
+FIX_MESSAGE: Final[str] = "Add spaces between EN and CN chars in"
+
+
+def format(text: str, char_classes: CharClasses = DEFAULT_CHAR_CLASSES) -> str:
+    return char_classes.insert_spaces(text)
+
+
+def iter_format_lines(
+    lines: Iterable[str],
+    syntax: str = "none",
+    changed_lines: Sequence[LineRange] | None = None,
+    char_classes: CharClasses = DEFAULT_CHAR_CLASSES,
+) -> Iterator[tuple[int, str, bool]]:
+    """Format lines lazily, one line at a time, only touching the prose of the given markup syntax.
+
+    Args:
+        lines: Lines to format
+        syntax: Markup syntax
+        changed_lines: If given, only lines in these (first, last) ranges are formatted
+        char_classes: CN and EN chars to separate
+
+    Yields:
+        Tuples of (lineno, formatted line, whether the line was changed)
+    """
+    scanner = make_scanner(syntax)
+    selector = None if changed_lines is None else LineSelector(changed_lines)
+    for lineno, line, skip_line in scan_lines(lines):
+        if (
+            scanner.in_code_block(line)
+            or skip_line
+            or (selector is not None and not selector.selects(lineno))
+            or char_classes.is_clean(line)
+        ):
+            yield lineno, line, False
+            continue
+        spans = scanner.prose_spans(line)
+        formatted = format_prose(line, spans, char_classes.insert_spaces)
+        yield lineno, formatted, formatted != line
+
+
+def format_lines(
+    lines: Iterable[str],
+    syntax: str = "none",
+    changed_lines: Sequence[LineRange] | None = None,
+    char_classes: CharClasses = DEFAULT_CHAR_CLASSES,
+) -> tuple[bool, str, list[tuple[int, str]]]:
+    chunks: list[str] = []
     diagnostics: list[tuple[int, str]] = []
-    need_format = False
-    pragma_manager = PragmaManager()
-    for lineno, line in enumerate(lines, 1):
-        with pragma_manager.scan(line) as skip_line:
-            if skip_line:
-                formatted_text += line
-                continue
-            if not check(line):
-                line = format(line)
-                need_format = True
-                diagnostics.append((lineno, line))
-            formatted_text += line
-    return need_format, formatted_text, diagnostics
-
-
-def _format_file(file_path: str) -> ReturnCode:
-    with open(file_path, encoding="utf8", newline="\n") as f:
-        need_format, formatted_text, diagnostics = format_lines(f)
-
-    if formatted_text:
-        with open(file_path, "w", encoding="utf8", newline="\n") as f:
-            f.write(formatted_text)
-        for lineno, line in diagnostics:
-            print(f"Add spaces between EN and CN chars in: {file_path}:{lineno}:\t{line.strip()}")
-    return FAIL if need_format else PASS
+    for lineno, line, changed in iter_format_lines(lines, syntax, changed_lines, char_classes):
+        chunks.append(line)
+        if changed:
+            diagnostics.append((lineno, line))
+    return bool(diagnostics), "".join(chunks), diagnostics
+
+
+def _format_file(
+    file_path: str,
+    cache_dir: str | None = None,
+    markup: str = "none",
+    changed_lines: dict[str, list[LineRange]] | None = None,
+    char_classes: CharClasses = DEFAULT_CHAR_CLASSES,
+    max_file_size: int | None = None,
+) -> tuple[ReturnCode, list[Diagnostic]]:
+    syntax = resolve_syntax(file_path, markup)
+    file_changed_lines = get_file_changed_lines(file_path, changed_lines)
+    if file_changed_lines == []:
+        return PASS, []
+    # Most files are already formatted, check them first so that they are never opened for writing
+    with open_content(file_path) as content:
+        skip_reason, need_format, _ = sniff_and_check(
+            content,
+            make_result_cache(cache_dir, syntax, char_classes),
+            syntax,
+            file_changed_lines,
+            char_classes,
+            max_file_size,
+        )
+    if skip_reason is not None:
+        return PASS, [skipped_file(file_path, skip_reason)]
+    if not need_format:
+        return PASS, []
+
+    try:
+        with phase("write"), atomic_write(file_path) as dst, open(file_path, encoding="utf8", newline="\n") as src:
+            diagnostics = _write_formatted(src, dst.write, file_path, syntax, file_changed_lines, char_classes)
+    except UnicodeDecodeError:
+        # Large files are only decoded around their hits while checking, the original is left untouched
+        count("files_skipped")
+        return PASS, [skipped_file(file_path, NOT_UTF8)]
+    count("files_rewritten")
+    return FAIL, diagnostics
+
+
+def _format_content(
+    file_path: str,
+    content: bytes | None,
+    cache_dir: str | None = None,
+    markup: str = "none",
+    changed_lines: dict[str, list[LineRange]] | None = None,
+    char_classes: CharClasses = DEFAULT_CHAR_CLASSES,
+    max_file_size: int | None = None,
+) -> tuple[tuple[ReturnCode, list[Diagnostic]], str | None]:
+    """Pipeline stage of ``_format_file``, formatting prefetched content in memory for the pipeline to write back."""
+    if content is None:
+        return _format_file(file_path, cache_dir, markup, changed_lines, char_classes, max_file_size), None
+    syntax = resolve_syntax(file_path, markup)
+    file_changed_lines = get_file_changed_lines(file_path, changed_lines)
+    if file_changed_lines == []:
+        return (PASS, []), None
+    skip_reason, need_format, _ = sniff_and_check(
+        content,
+        make_result_cache(cache_dir, syntax, char_classes),
+        syntax,
+        file_changed_lines,
+        char_classes,
+        max_file_size,
+    )
+    if skip_reason is not None:
+        return (PASS, [skipped_file(file_path, skip_reason)]), None
+    if not need_format:
+        return (PASS, []), None
+
+    chunks: list[str] = []
+    src = io.StringIO(content.decode("utf8"), newline="\n")
+    diagnostics = _write_formatted(src, chunks.append, file_path, syntax, file_changed_lines, char_classes)
+    return (FAIL, diagnostics), "".join(chunks)
+
+
+def _write_formatted(
+    src: Iterable[str],
+    write: Callable[[str], object],
+    file_path: str,
+    syntax: str,
+    changed_lines: Sequence[LineRange] | None,
+    char_classes: CharClasses,
+) -> list[Diagnostic]:
+    diagnostics: list[Diagnostic] = []
+    for lineno, line, changed in iter_format_lines(src, syntax, changed_lines, char_classes):
+        write(line)
+        if changed:
+            diagnostics.append(Diagnostic(RULE_NAME, FIX_MESSAGE, file_path, lineno, source=line.strip()))
+    return diagnostics
 
 
 def main(argv: Sequence[str] | None = None) -> ReturnCode:
     parser = argparse.ArgumentParser(prog="dochooks", description="pre-commit hooks for documentation")
     parser.add_argument("-v", "--version", action="version", version=__version__)
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="Number of worker processes (default: number of CPUs)"
+    )
+    parser.add_argument("--cache-dir", default=default_cache_dir(), help="Directory to cache clean files in")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the result cache")
+    parser.add_argument(
+        "--markup",
+        choices=["auto", *MARKUP_SYNTAXES],
+        default="auto",
+        help="Markup syntax whose code, URLs and link targets are left alone (default: auto, by file extension)",
+    )
+    parser.add_argument(
+        "--changed-lines-only",
+        action="store_true",
+        help="Only format the lines changed in the staged diff (all lines outside of a git repository)",
+    )
+    add_output_arguments(parser)
+    add_io_argument(parser)
+    add_max_size_argument(parser)
+    add_profile_argument(parser)
     parser.add_argument("filenames", nargs="*", help="Filenames to check")
     args = parser.parse_args(argv)
-
-    ret_code: ReturnCode = PASS
-    for filename in args.filenames:
-        ret_code |= _format_file(filename)
-
-    if ret_code != PASS:
+    try:
+        char_classes = char_classes_from_config(load_config())
+    except ConfigError as e:
+        parser.error(str(e))
+
+    with profiling(profile_destination(args)):
+        format_content = partial(
+            _format_content,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            char_classes=char_classes,
+            max_file_size=args.max_file_size,
+            markup=args.markup,
+            changed_lines=(
+                get_staged_changed_lines(args.filenames) if args.changed_lines_only and args.filenames else None
+            ),
+        )
+        ret_code: ReturnCode = PASS
+        with make_writer(args.output_format, args.max_diagnostics_per_file) as writer:
+            for file_ret_code, diagnostics in map_files_pipelined(
+                format_content, args.filenames, args.jobs, args.io_threads, prefetch_limit=MMAP_THRESHOLD
+            ):
+                writer.write_file(diagnostics)
+                ret_code |= file_ret_code
+
+    # Anything else would break machine-readable output
+    if ret_code != PASS and args.output_format == "text":
         print("")
         print("Snuged en and cn chars have been separated by a space. Now aborting the commit.")
         print('You can check the changes made. Then simply "git add --update ." and re-commit')
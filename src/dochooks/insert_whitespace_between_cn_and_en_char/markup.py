@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import os
+import re
+from collections.abc import Callable
+from re import Pattern
+from typing import Final
+
+MARKUP_SYNTAXES: Final[list[str]] = ["none", "markdown", "rst"]
+MARKUP_EXTENSIONS: Final[dict[str, str]] = {
+    ".md": "markdown",
+    ".markdown": "markdown",
+    ".mdx": "markdown",
+    ".rst": "rst",
+    ".rest": "rst",
+}
+
+Spans = list[tuple[int, int]]
+
+# Only compiled by the scanners of the syntax in use, re caches them from then on
+_URL: Final[str] = r"(?P<url>https?://[A-Za-z0-9\-._~:/?#@!$&'*+,;=%]+)"
+_MARKDOWN_IGNORE: Final[str] = "|".join(
+    [
+        # Inline code, closed by a backtick run of the same length
+        r"(?P<ticks>`+).+?(?<!`)(?P=ticks)(?!`)",
+        # Link and image targets
+        r"\]\([^)\n]*\)",
+        # HTML tags with their attributes, HTML comments and autolinks
+        r"<[A-Za-z/!][^>\n]*>",
+        _URL,
+    ]
+)
+_MARKDOWN_FENCE: Final[str] = r" {0,3}(?P<fence>`{3,}|~{3,})"
+_RST_IGNORE: Final[str] = "|".join(
+    [
+        # Inline literals
+        r"``.+?``",
+        # Code-like roles
+        r":(?:code|math|file|samp|kbd|command|program|envvar|option):`[^`\n]*`",
+        # Hyperlink targets of references, e.g. `text <https://...>`_
+        r"<[^<>\n]+>`_{1,2}",
+        # Explicit hyperlink targets, e.g. .. _label: https://...
+        r"^\s*\.\. _.*$",
+        _URL,
+    ]
+)
+_RST_CODE_DIRECTIVE: Final[str] = r"\s*\.\.\s+(?:code|code-block|sourcecode|highlight|math|raw|parsed-literal)::"
+
+_PATTERNS: Final[dict[str, str]] = {
+    "REGEX_MARKDOWN_IGNORE": _MARKDOWN_IGNORE,
+    "REGEX_MARKDOWN_FENCE": _MARKDOWN_FENCE,
+    "REGEX_RST_IGNORE": _RST_IGNORE,
+    "REGEX_RST_CODE_DIRECTIVE": _RST_CODE_DIRECTIVE,
+}
+
+
+def __getattr__(name: str) -> Pattern[str]:
+    if name in _PATTERNS:
+        return re.compile(_PATTERNS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def detect_syntax(file_path: str) -> str:
+    return MARKUP_EXTENSIONS.get(os.path.splitext(file_path)[1].lower(), "none")
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" \t"))
+
+
+class MarkupScanner:
+    """Streaming, line-based tokenizer telling which parts of a document are prose.
+
+    ``in_code_block`` must be called for every line in order to track multi-line constructs, it is cheap and
+    returns True for lines which are entirely code. ``prose_spans`` is only needed for lines which may contain
+    a violation, it returns the (start, end) spans left after removing inline code, URLs, link targets and such.
+    The base class treats everything as prose.
+
+    Bare URLs are part of the sentence around them, so the spans keep their first and last char: a boundary
+    between a URL and the prose next to it (``访问https://example.com获取``) is found, one inside it is not.
+    """
+
+    ignore_pattern: Pattern[str] | None = None
+
+    def in_code_block(self, line: str) -> bool:
+        return False
+
+    def prose_spans(self, line: str) -> Spans:
+        if self.ignore_pattern is None:
+            return [(0, len(line))]
+        spans: Spans = []
+        start = 0
+        for match in self.ignore_pattern.finditer(line):
+            ignore_start, ignore_end = match.span()
+            if match.lastgroup == "url":
+                ignore_start += 1
+                ignore_end -= 1
+            if ignore_start > start:
+                spans.append((start, ignore_start))
+            start = ignore_end
+        if start < len(line):
+            spans.append((start, len(line)))
+        return spans
+
+
+class MarkdownScanner(MarkupScanner):
+    def __init__(self) -> None:
+        self.ignore_pattern = re.compile(_MARKDOWN_IGNORE)
+        self.fence_pattern = re.compile(_MARKDOWN_FENCE)
+        self.fence: str | None = None
+
+    def in_code_block(self, line: str) -> bool:
+        if self.fence is not None:
+            stripped = line.strip()
+            if stripped.startswith(self.fence) and not stripped.strip(self.fence[0]):
+                self.fence = None
+            return True
+        if "```" in line or "~~~" in line:
+            match = self.fence_pattern.match(line)
+            if match is not None:
+                self.fence = match.group("fence")
+                return True
+        return False
+
+
+class RstScanner(MarkupScanner):
+    def __init__(self) -> None:
+        self.ignore_pattern = re.compile(_RST_IGNORE)
+        self.code_directive_pattern = re.compile(_RST_CODE_DIRECTIVE)
+        # Indent of the line introducing the current literal block, None if not in a literal block
+        self.block_indent: int | None = None
+
+    def in_code_block(self, line: str) -> bool:
+        if self.block_indent is not None:
+            if not line.strip() or _indent(line) > self.block_indent:
+                return True
+            self.block_indent = None
+        if "::" not in line:
+            return False
+        if self.code_directive_pattern.match(line):
+            self.block_indent = _indent(line)
+            return True
+        stripped = line.rstrip()
+        if stripped.endswith("::") and not stripped.lstrip().startswith(".."):
+            # A paragraph ending with "::" introduces a literal block, the paragraph itself is still prose
+            self.block_indent = _indent(line)
+        return False
+
+
+SCANNERS: Final[dict[str, Callable[[], MarkupScanner]]] = {
+    "none": MarkupScanner,
+    "markdown": MarkdownScanner,
+    "rst": RstScanner,
+}
+
+
+def make_scanner(syntax: str) -> MarkupScanner:
+    return SCANNERS[syntax]()
+
+
+def check_prose(line: str, spans: Spans, check: Callable[[str], bool]) -> bool:
+    return all(check(line[start:end]) for start, end in spans)
+
+
+def format_prose(line: str, spans: Spans, format: Callable[[str], str]) -> str:
+    chunks: list[str] = []
+    last = 0
+    for start, end in spans:
+        chunks.append(line[last:start])
+        chunks.append(format(line[start:end]))
+        last = end
+    chunks.append(line[last:])
+    return "".join(chunks)
@@ -1,7 +1,14 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Iterator
 from contextlib import contextmanager
 from enum import Enum
+from typing import Final
+
+from ..utils.profile import count
+
+# Common prefix of all pragmas, a text without it can't contain any pragma
+PRAGMA_PREFIX: Final[str] = "dochooks:"
 
 
 class Pragma(Enum):
@@ -21,3 +28,28 @@ class PragmaManager:
         self.skip_line = False
         if Pragma.SKIP_NEXT_LINE.value in line:
             self.skip_line = True
+
+
+_SKIP_NEXT_LINE: Final[str] = Pragma.SKIP_NEXT_LINE.value
+_SKIP_LINE: Final[str] = Pragma.SKIP_LINE.value
+
+
+def scan_lines(lines: Iterable[str]) -> Iterator[tuple[int, str, bool]]:
+    """Same as ``PragmaManager.scan`` but as a plain iterator adapter, which is much cheaper per line.
+
+    Yields:
+        Tuples of (lineno, line, whether the line should be skipped)
+    """
+    skip_next_line = False
+    for lineno, line in enumerate(lines, 1):
+        if PRAGMA_PREFIX not in line:
+            if skip_next_line:
+                count("lines_skipped_by_pragma")
+            yield lineno, line, skip_next_line
+            skip_next_line = False
+            continue
+        skip_line = skip_next_line or _SKIP_LINE in line
+        if skip_line:
+            count("lines_skipped_by_pragma")
+        yield lineno, line, skip_line
+        skip_next_line = _SKIP_NEXT_LINE in line
@@ -1,11 +1,136 @@
 from __future__ import annotations
 
 import re
+from collections.abc import Iterable
+from functools import cache, cached_property
 from re import Pattern
-from typing import Final
+from typing import Any, Final
+
+from ..utils.config import Config, ConfigError
 
 REGEX_CN_CHAR_STR: Final[str] = r"[\u4e00-\u9fa5]"
 REGEX_EN_CHAR_STR: Final[str] = r"[a-zA-Z0-9]"
 
-REGEX_CN_WITH_EN: Pattern[str] = re.compile(f"(?P<cn>{REGEX_CN_CHAR_STR})(?P<en>{REGEX_EN_CHAR_STR})")
-REGEX_EN_WITH_CN: Pattern[str] = re.compile(f"(?P<en>{REGEX_EN_CHAR_STR})(?P<cn>{REGEX_CN_CHAR_STR})")
+# Char classes as sorted (first, last) ranges, the defaults being the same as the patterns above
+CharRanges = tuple[tuple[str, str], ...]
+DEFAULT_CN_RANGES: Final[CharRanges] = (("\u4e00", "\u9fa5"),)
+DEFAULT_EN_RANGES: Final[CharRanges] = (("0", "9"), ("A", "Z"), ("a", "z"))
+
+
+def coalesce_ranges(ranges: Iterable[tuple[str, str]]) -> CharRanges:
+    """Sort the ranges and merge overlapping or adjacent ones, so that the compiled char class stays minimal."""
+    merged: list[tuple[str, str]] = []
+    for first, last in sorted(ranges):
+        if merged and ord(first) <= ord(merged[-1][1]) + 1:
+            merged[-1] = (merged[-1][0], max(last, merged[-1][1]))
+        else:
+            merged.append((first, last))
+    return tuple(merged)
+
+
+def _char_class(ranges: CharRanges) -> str:
+    return "[" + "".join(re.escape(a) if a == b else f"{re.escape(a)}-{re.escape(b)}" for a, b in ranges) + "]"
+
+
+class CharClasses:
+    """The CN and EN char classes, compiled into the patterns finding the boundaries between them.
+
+    Use ``make_char_classes``, which compiles every configuration only once per process, also when
+    instances are pickled to worker processes. The patterns are compiled on first use, so that hook runs which
+    never scan a line (or use other char classes) don't pay for them.
+    """
+
+    def __init__(self, cn_ranges: CharRanges, en_ranges: CharRanges):
+        self.cn_ranges = cn_ranges
+        self.en_ranges = en_ranges
+        self._cn_char = _char_class(cn_ranges)
+        self._en_char = _char_class(en_ranges)
+
+    @cached_property
+    def cn_with_en(self) -> Pattern[str]:
+        return re.compile(f"(?P<cn>{self._cn_char})(?P<en>{self._en_char})")
+
+    @cached_property
+    def en_with_cn(self) -> Pattern[str]:
+        return re.compile(f"(?P<en>{self._en_char})(?P<cn>{self._cn_char})")
+
+    @cached_property
+    def boundary(self) -> Pattern[str]:
+        # A single pass alternative to the two patterns above: matches the char right before every CN/EN boundary,
+        # so a space can be inserted with one substitution via ``\g<0> ``.
+        return re.compile(f"{self._cn_char}(?={self._en_char})|{self._en_char}(?={self._cn_char})")
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return make_char_classes, (self.cn_ranges, self.en_ranges)
+
+    def is_clean(self, text: str) -> bool:
+        # Two plain searches beat a single boundary search here, since CPython's re can only use
+        # its fast charset prefix scan on patterns that don't start with an alternation.
+        return not (self.cn_with_en.search(text) or self.en_with_cn.search(text))
+
+    def insert_spaces(self, text: str) -> str:
+        return self.boundary.sub(r"\g<0> ", text)
+
+    @property
+    def byte_scannable(self) -> bool:
+        """Whether CN chars are multi-byte and EN chars single bytes in UTF-8, as byte-level scanning needs."""
+        return self.cn_ranges[0][0] >= "\x80" and self.en_ranges[-1][1] < "\x80"
+
+
+@cache
+def make_char_classes(cn_ranges: CharRanges, en_ranges: CharRanges) -> CharClasses:
+    return CharClasses(coalesce_ranges(cn_ranges), coalesce_ranges(en_ranges))
+
+
+def parse_char_ranges(specs: object, option: str) -> CharRanges:
+    """Parse a list of single chars and ranges like ``"a-z"``."""
+    if not isinstance(specs, list):
+        raise ConfigError(f'{option} must be a list of chars or ranges like "a-z", got {specs!r}')
+    ranges: list[tuple[str, str]] = []
+    for spec in specs:
+        if isinstance(spec, str) and len(spec) == 1:
+            ranges.append((spec, spec))
+        elif isinstance(spec, str) and len(spec) == 3 and spec[1] == "-" and spec[0] <= spec[2]:
+            ranges.append((spec[0], spec[2]))
+        else:
+            raise ConfigError(f'Invalid char range {spec!r} in {option}, expected a char or a range like "a-z"')
+    return tuple(ranges)
+
+
+def char_classes_from_config(config: Config) -> CharClasses:
+    """Build the char classes from the project config.
+
+    ``cn-chars`` and ``en-chars`` replace the default classes, ``extend-cn-chars`` and ``extend-en-chars``
+    add to them.
+
+    Raises:
+        ConfigError: If a range is invalid, a class is empty or the classes overlap
+    """
+    cn_ranges = parse_char_ranges(config["cn-chars"], "cn-chars") if "cn-chars" in config else DEFAULT_CN_RANGES
+    cn_ranges += parse_char_ranges(config.get("extend-cn-chars", []), "extend-cn-chars")
+    en_ranges = parse_char_ranges(config["en-chars"], "en-chars") if "en-chars" in config else DEFAULT_EN_RANGES
+    en_ranges += parse_char_ranges(config.get("extend-en-chars", []), "extend-en-chars")
+    if not cn_ranges or not en_ranges:
+        raise ConfigError("cn-chars and en-chars must not be empty")
+    char_classes = make_char_classes(cn_ranges, en_ranges)
+    for cn_first, cn_last in char_classes.cn_ranges:
+        for en_first, en_last in char_classes.en_ranges:
+            if cn_first <= en_last and en_first <= cn_last:
+                raise ConfigError(f"CN chars {cn_first}-{cn_last} overlap with EN chars {en_first}-{en_last}")
+    return char_classes
+
+
+DEFAULT_CHAR_CLASSES: Final[CharClasses] = make_char_classes(DEFAULT_CN_RANGES, DEFAULT_EN_RANGES)
+
+# The patterns of the default char classes, looked up (and compiled) on first access
+_DEFAULT_PATTERNS: Final[dict[str, str]] = {
+    "REGEX_CN_WITH_EN": "cn_with_en",
+    "REGEX_EN_WITH_CN": "en_with_cn",
+    "REGEX_CN_EN_BOUNDARY": "boundary",
+}
+
+
+def __getattr__(name: str) -> Pattern[str]:
+    if name in _DEFAULT_PATTERNS:
+        return getattr(DEFAULT_CHAR_CLASSES, _DEFAULT_PATTERNS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
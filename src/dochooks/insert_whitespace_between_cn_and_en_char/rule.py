@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from ..rules import Rule, register_rule
+from ..utils.config import Config
+from .check import CHECK_MESSAGE, RULE_NAME, find_boundary_columns
+from .format import FIX_MESSAGE
+from .markup import Spans
+from .regex import DEFAULT_CHAR_CLASSES, CharClasses, char_classes_from_config
+
+
+@register_rule
+class WhitespaceBetweenCnAndEnChar(Rule):
+    name = RULE_NAME
+    check_message = CHECK_MESSAGE
+    fix_message = FIX_MESSAGE
+    fixable = True
+
+    def __init__(self, char_classes: CharClasses = DEFAULT_CHAR_CLASSES):
+        self.char_classes = char_classes
+
+    def with_config(self, config: Config) -> Rule:
+        char_classes = char_classes_from_config(config)
+        return self if char_classes is self.char_classes else WhitespaceBetweenCnAndEnChar(char_classes)
+
+    def is_clean(self, text: str) -> bool:
+        # Pragmas can only skip lines, so a buffer without any boundary passes no matter which pragmas it has
+        return self.char_classes.is_clean(text)
+
+    def check_line(self, line: str) -> bool:
+        return self.char_classes.is_clean(line)
+
+    def fix_line(self, line: str) -> str:
+        return self.char_classes.insert_spaces(line)
+
+    def find_columns(self, line: str, spans: Spans) -> tuple[int, ...]:
+        return find_boundary_columns(line, spans, self.char_classes)
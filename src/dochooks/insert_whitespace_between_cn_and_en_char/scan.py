@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import mmap
+from collections.abc import Iterator
+from functools import cache
+from typing import Final
+
+from .regex import DEFAULT_CHAR_CLASSES, CharClasses
+
+# Both support slicing, find and rfind, which is all the byte-level scanning needs
+Buffer = bytes | mmap.mmap
+
+CHUNK_SIZE: Final[int] = 1 << 20
+
+# Every byte is mapped to a marker of its class, so that a CN/EN boundary shows up as one of two fixed byte
+# pairs: in UTF-8 a CN char starts with a lead byte and ends with a continuation byte.
+_CONTINUATION: Final[int] = ord("c")
+_CN_LEAD: Final[int] = ord("C")
+_EN: Final[int] = ord("A")
+_CN_THEN_EN: Final[bytes] = bytes([_CONTINUATION, _EN])
+_EN_THEN_CN: Final[bytes] = bytes([_EN, _CN_LEAD])
+
+
+@cache
+def make_byte_class_table(char_classes: CharClasses) -> bytes | None:
+    """Build the table classifying bytes for the given char classes, None if they can't be told apart by bytes."""
+    if not char_classes.byte_scannable:
+        return None
+    table = bytearray(b" " * 256)
+    for byte in range(0x80, 0xC0):
+        table[byte] = _CONTINUATION
+    for first, last in char_classes.cn_ranges:
+        for byte in range(first.encode("utf8")[0], last.encode("utf8")[0] + 1):
+            table[byte] = _CN_LEAD
+    for first, last in char_classes.en_ranges:
+        for byte in range(ord(first), ord(last) + 1):
+            table[byte] = _EN
+    return bytes(table)
+
+
+def _iter_candidates(buf: Buffer, table: bytes, start: int = 0) -> Iterator[int]:
+    """Yield the offsets of all byte pairs which may be a CN/EN boundary, in order.
+
+    The buffer is classified chunk by chunk with ``bytes.translate`` and searched with ``bytes.find``,
+    so nothing is decoded and memory stays bounded by the chunk size. Candidates are a superset of
+    the boundaries, e.g. a full-width comma followed by a letter is a candidate as well.
+    """
+    for chunk_start in range(start, len(buf), CHUNK_SIZE):
+        # One extra byte, so that pairs crossing the chunk end are found as well
+        classes = buf[chunk_start : chunk_start + CHUNK_SIZE + 1].translate(table)
+        cn_then_en = classes.find(_CN_THEN_EN)
+        en_then_cn = classes.find(_EN_THEN_CN)
+        while cn_then_en >= 0 or en_then_cn >= 0:
+            if en_then_cn < 0 or 0 <= cn_then_en < en_then_cn:
+                yield chunk_start + cn_then_en
+                cn_then_en = classes.find(_CN_THEN_EN, cn_then_en + 1)
+            else:
+                yield chunk_start + en_then_cn
+                en_then_cn = classes.find(_EN_THEN_CN, en_then_cn + 1)
+
+
+def iter_hit_lines(buf: Buffer, char_classes: CharClasses = DEFAULT_CHAR_CLASSES) -> Iterator[tuple[int, str]]:
+    """Yield (offset, decoded line) for every line containing a CN/EN boundary.
+
+    Only the lines around candidates are decoded, and each of them only once. Char classes which can't be
+    told apart by bytes fall back to decoding and checking every line.
+    """
+    table = make_byte_class_table(char_classes)
+    if table is None:
+        line_start = 0
+        while line_start < len(buf):
+            line_end = buf.find(b"\n", line_start) + 1 or len(buf)
+            line = buf[line_start:line_end].decode("utf8")
+            if not char_classes.is_clean(line):
+                yield line_start, line
+            line_start = line_end
+        return
+
+    start = 0
+    line_end = 0
+    while True:
+        for pos in _iter_candidates(buf, table, start):
+            if pos < line_end:
+                continue
+            line_start = buf.rfind(b"\n", 0, pos) + 1
+            line_end = buf.find(b"\n", pos) + 1 or len(buf)
+            line = buf[line_start:line_end].decode("utf8")
+            if not char_classes.is_clean(line):
+                yield line_start, line
+            if line_end - pos > CHUNK_SIZE:
+                # Don't classify the rest of a huge line which has already been checked as a whole
+                start = line_end
+                break
+        else:
+            return
+
+
+def count_newlines(buf: Buffer, start: int, end: int) -> int:
+    return sum(
+        buf[chunk_start : min(chunk_start + CHUNK_SIZE, end)].count(b"\n")
+        for chunk_start in range(start, end, CHUNK_SIZE)
+    )
+
+
+def iter_lines(buf: Buffer) -> Iterator[str]:
+    start = 0
+    while start < len(buf):
+        end = buf.find(b"\n", start) + 1 or len(buf)
+        yield buf[start:end].decode("utf8")
+        start = end
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import abc
+from typing import ClassVar, TypeVar
+
+from .utils.config import Config
+
+RULES: dict[str, Rule] = {}
+
+# Modules defining the builtin rules, imported on demand by ``load_builtin_rules``
+BUILTIN_RULE_MODULES: list[str] = [
+    "dochooks.insert_whitespace_between_cn_and_en_char.rule",
+]
+
+
+class Rule(abc.ABC):
+    """A line-based rule which can be run by ``dochooks run`` together with other rules over a shared buffer.
+
+    Subclasses are registered with ``register_rule`` and must define ``name`` and ``check_line``,
+    fixable rules also override ``fix_line``.
+    """
+
+    name: ClassVar[str]
+    check_message: ClassVar[str] = "Rule violated at"
+    fix_message: ClassVar[str] = "Fixed rule violation in"
+    fixable: ClassVar[bool] = False
+
+    def with_config(self, config: Config) -> Rule:
+        """Return the rule as configured by the project config, rules without options return themselves.
+
+        Raises:
+            ConfigError: If the rule's options are invalid
+        """
+        return self
+
+    def is_clean(self, text: str) -> bool:
+        """Cheaply tell if a whole file buffer passes, so that scanning it line by line can be skipped.
+
+        Returning False is always safe, the buffer is then checked line by line.
+        """
+        return False
+
+    @abc.abstractmethod
+    def check_line(self, line: str) -> bool:
+        """Check a line, return True if it passes."""
+
+    def fix_line(self, line: str) -> str:
+        """Fix a line which doesn't pass ``check_line``."""
+        return line
+
+    def find_columns(self, line: str, spans: list[tuple[int, int]]) -> tuple[int, ...]:
+        """Find the 1-based columns of the violations within the given (start, end) spans of a line."""
+        return ()
+
+
+R = TypeVar("R", bound=Rule)
+
+
+def register_rule(rule_class: type[R]) -> type[R]:
+    RULES[rule_class.name] = rule_class()
+    return rule_class
+
+
+def load_builtin_rules() -> dict[str, Rule]:
+    import importlib
+
+    for module in BUILTIN_RULE_MODULES:
+        importlib.import_module(module)
+    return RULES
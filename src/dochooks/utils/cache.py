@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+from typing import Final
+
+from dochooks import __version__
+
+DEFAULT_MAX_ENTRIES: Final[int] = 65536
+# Entries are spread over this many shard directories, each one bounded on its own,
+# so that eviction only ever lists a small directory.
+NUM_SHARDS: Final[int] = 256
+
+
+def default_cache_dir() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "dochooks")
+
+
+class ResultCache:
+    """On-disk set of file contents known to be clean, stored as one empty file per content hash.
+
+    Entries live in a namespace derived from the hook name, the dochooks version and the rule configuration,
+    so changing any of them never reuses stale verdicts. Each shard keeps at most ``max_entries / NUM_SHARDS``
+    entries, evicting the least recently used ones.
+    """
+
+    def __init__(self, cache_dir: str, name: str, config: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        namespace = hashlib.blake2b(f"{name}\0{__version__}\0{config}".encode(), digest_size=8).hexdigest()
+        self.root = os.path.join(cache_dir, namespace)
+        self.max_entries_per_shard = max(1, max_entries // NUM_SHARDS)
+
+    def _entry_path(self, content: bytes | mmap.mmap) -> str:
+        key = hashlib.blake2b(content, digest_size=16).hexdigest()
+        return os.path.join(self.root, key[:2], key)
+
+    def is_clean(self, content: bytes | mmap.mmap) -> bool:
+        entry_path = self._entry_path(content)
+        try:
+            # Refresh mtime to keep the entry alive during eviction
+            os.utime(entry_path)
+        except OSError:
+            return False
+        return True
+
+    def mark_clean(self, content: bytes | mmap.mmap) -> None:
+        entry_path = self._entry_path(content)
+        shard = os.path.dirname(entry_path)
+        try:
+            os.makedirs(shard, exist_ok=True)
+            with open(entry_path, "wb"):
+                pass
+            self._evict(shard)
+        except OSError:
+            # The cache is only an optimization, never fail the hook because of it
+            pass
+
+    def _evict(self, shard: str) -> None:
+        with os.scandir(shard) as it:
+            entries = list(it)
+        if len(entries) <= self.max_entries_per_shard:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in entries[: len(entries) - self.max_entries_per_shard]:
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+import sys
+from typing import Any, Final
+
+# Looked up in the working directory, which pre-commit sets to the repository root. The first one found wins,
+# pyproject.toml only counts if it has a [tool.dochooks] table.
+CONFIG_FILE: Final[str] = ".dochooks.toml"
+PYPROJECT_FILE: Final[str] = "pyproject.toml"
+# A [tool.dochooks] table header, or a dotted key defining the table, at the start of a line
+_PYPROJECT_TABLE: Final[bytes] = rb"^[ \t]*\[?[ \t]*tool[ \t]*\.[ \t]*dochooks\b"
+
+Config = dict[str, Any]
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def load_config(directory: str = ".") -> Config:
+    """Load the dochooks config of the project in ``directory``, an empty config if there is none.
+
+    Raises:
+        ConfigError: If the config file is not valid TOML, pyproject.toml only counts as a config file if it has
+            a [tool.dochooks] table, so that a broken pyproject.toml doesn't fail unrelated commits
+    """
+    config_path = os.path.join(directory, CONFIG_FILE)
+    if os.path.isfile(config_path):
+        with open(config_path, "rb") as f:
+            return _parse_toml(f.read(), config_path)
+    pyproject_path = os.path.join(directory, PYPROJECT_FILE)
+    if os.path.isfile(pyproject_path):
+        return _load_pyproject(pyproject_path)
+    return {}
+
+
+def _load_pyproject(path: str) -> Config:
+    with open(path, "rb") as f:
+        content = f.read()
+    # Most projects have no dochooks config, their pyproject.toml isn't even parsed
+    if b"dochooks" not in content:
+        return {}
+    try:
+        return _parse_toml(content, path).get("tool", {}).get("dochooks", {})
+    except ConfigError:
+        import re
+
+        if re.search(_PYPROJECT_TABLE, content, re.MULTILINE):
+            raise
+        return {}
+
+
+def _parse_toml(content: bytes, path: str) -> Config:
+    # Only imported for projects which have a config file
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        import tomli as tomllib
+
+    try:
+        return tomllib.loads(content.decode("utf8"))
+    except (tomllib.TOMLDecodeError, UnicodeDecodeError) as e:
+        raise ConfigError(f"Invalid config file {path}: {e}") from e
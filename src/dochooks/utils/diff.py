@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import codecs
+import os
+import re
+from collections.abc import Iterable, Sequence
+from re import Pattern
+
+from .git import run_git
+
+LineRange = tuple[int, int]
+
+REGEX_HUNK_HEADER: Pattern[bytes] = re.compile(rb"@@ -\d+(?:,\d+)? \+(?P<start>\d+)(?:,(?P<count>\d+))? @@")
+
+
+def _unquote_path(path: bytes) -> str:
+    # Git C-quotes paths with special chars, e.g. "a\tb" or "\344\270\255" for non-ASCII bytes
+    if path.startswith(b'"') and path.endswith(b'"'):
+        path = codecs.escape_decode(path[1:-1])[0]
+    elif path.endswith(b"\t"):
+        # Unquoted paths with spaces are terminated by a tab
+        path = path[:-1]
+    return os.path.normpath(os.fsdecode(path))
+
+
+def parse_changed_lines(diff: bytes) -> dict[str, list[LineRange]]:
+    """Parse the new-side line ranges of every hunk of a ``git diff -U0`` output.
+
+    Returns:
+        Dictionary mapping normalized paths to sorted, inclusive (first, last) line ranges
+    """
+    changed_lines: dict[str, list[LineRange]] = {}
+    ranges: list[LineRange] | None = None
+    # Hunk bodies may contain lines looking like file headers, e.g. an added line "++ x" shows up as "+++ x"
+    in_header = False
+    for line in diff.split(b"\n"):
+        if line.startswith(b"diff --git "):
+            in_header = True
+            ranges = None
+        elif in_header and line.startswith(b"+++ "):
+            target = line[4:]
+            if target == b"/dev/null":
+                ranges = None
+            else:
+                # The "b/" prefix, quoted paths keep it inside the quotes
+                target = b'"' + target[3:] if target.startswith(b'"b/') else target[2:]
+                ranges = changed_lines.setdefault(_unquote_path(target), [])
+        elif line.startswith(b"@@ "):
+            in_header = False
+            match = REGEX_HUNK_HEADER.match(line)
+            if match is None or ranges is None:
+                continue
+            start = int(match.group("start"))
+            count = int(match.group("count") or 1)
+            if count:
+                ranges.append((start, start + count - 1))
+    return changed_lines
+
+
+def get_staged_changed_lines(file_paths: Sequence[str]) -> dict[str, list[LineRange]] | None:
+    """Get the line ranges of the staged changes of the given files, None if not in a git repository."""
+    import subprocess
+
+    try:
+        diff = run_git(
+            "-c",
+            "core.quotePath=false",
+            "diff",
+            "--cached",
+            "-U0",
+            "--no-color",
+            "--no-ext-diff",
+            "--relative",
+            "--src-prefix=a/",
+            "--dst-prefix=b/",
+            "--",
+            *file_paths,
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    return parse_changed_lines(diff)
+
+
+class LineSelector:
+    """Tell whether lines are within a set of ranges, for line numbers visited in increasing order.
+
+    Each query is amortized O(1), since ranges behind the current line are never looked at again.
+    """
+
+    def __init__(self, ranges: Iterable[LineRange]):
+        self.ranges = sorted(ranges)
+        self.index = 0
+
+    def selects(self, lineno: int) -> bool:
+        while self.index < len(self.ranges) and self.ranges[self.index][1] < lineno:
+            self.index += 1
+        return self.index < len(self.ranges) and self.ranges[self.index][0] <= lineno
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TextIO
+
+
+@contextmanager
+def atomic_write(file_path: str) -> Iterator[TextIO]:
+    """Open a temporary file next to ``file_path`` and atomically replace ``file_path`` with it on success.
+
+    The original file mode is preserved, and the original file is left untouched if an error occurs. Symlinks
+    are followed, so that their target is rewritten, and hardlinked files are rewritten in place (after the
+    content has been written completely), so that all of their links see the new content.
+    """
+    # Only imported by runs which rewrite files
+    import shutil
+    import tempfile
+
+    real_path = os.path.realpath(file_path)
+    dirname, basename = os.path.split(real_path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{basename}.", suffix=".tmp", dir=dirname)
+    try:
+        with open(fd, "w", encoding="utf8", newline="\n") as f:
+            yield f
+        if os.stat(real_path).st_nlink > 1:
+            # Replacing the file would detach it from its other links
+            shutil.copyfile(tmp_path, real_path)
+            os.unlink(tmp_path)
+            return
+        shutil.copymode(real_path, tmp_path)
+        os.replace(tmp_path, real_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
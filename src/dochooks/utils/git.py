@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Iterator
+from typing import IO, Final
+
+from .profile import count, phase
+
+READ_CHUNK_SIZE: Final[int] = 1 << 16
+
+
+def iter_nul_separated(stream: IO[bytes], chunk_size: int = READ_CHUNK_SIZE) -> Iterator[str]:
+    """Incrementally parse a NUL separated stream of paths (e.g. from ``git ls-files -z``).
+
+    Paths are decoded chunk by chunk with the filesystem encoding, so paths with newlines or
+    non-ASCII characters survive unchanged, and the whole listing is never held as a single string.
+    """
+    pending = b""
+    while chunk := stream.read(chunk_size):
+        buffer = pending + chunk
+        # Only decode complete paths, a multi-byte char may be split across chunks
+        end = buffer.rfind(b"\0")
+        if end < 0:
+            pending = buffer
+            continue
+        pending = buffer[end + 1 :]
+        for path in os.fsdecode(buffer[:end]).split("\0"):
+            if path:
+                yield path
+    if pending:
+        yield os.fsdecode(pending)
+
+
+def iter_git_output(*args: str) -> Iterator[str]:
+    """Run a git command with NUL separated output and stream the paths it prints.
+
+    Raises:
+        subprocess.CalledProcessError: If git exits with a non-zero status
+        FileNotFoundError: If git is not available
+    """
+    import subprocess
+
+    count("git_subprocesses")
+    # Includes the time the consumer spends on the streamed paths
+    with phase("git"), subprocess.Popen(["git", *args], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
+        assert proc.stdout is not None
+        yield from iter_nul_separated(proc.stdout)
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+
+def run_git(*args: str) -> bytes:
+    import subprocess
+
+    count("git_subprocesses")
+    with phase("git"):
+        return subprocess.run(["git", *args], capture_output=True, check=True).stdout
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import abc
+import argparse
+import json
+import sys
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Final, NamedTuple, TextIO
+
+from dochooks import __version__
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+OUTPUT_FORMATS: Final[list[str]] = ["text", "json", "sarif", "github"]
+# Output is written to the stream in batches of about this many chars
+FLUSH_SIZE: Final[int] = 1 << 16
+
+SARIF_SCHEMA: Final[str] = "https://json.schemastore.org/sarif-2.1.0.json"
+
+# Rule of the diagnostics reporting that a file was skipped without being checked, e.g. because it's binary
+SKIPPED_RULE: Final[str] = "skipped"
+
+
+class Diagnostic(NamedTuple):
+    rule: str
+    message: str
+    path: str
+    # 1-based, 0 if the diagnostic is about the whole file
+    line: int = 0
+    # 1-based columns of every hit within the line
+    columns: tuple[int, ...] = ()
+    # The offending line, stripped
+    source: str = ""
+
+
+def _count(count: int, noun: str) -> str:
+    """Format a count with the noun in singular or plural, e.g. ``1 file`` and ``2 files``."""
+    return f"{count} {noun}" if count == 1 else f"{count} {noun}s"
+
+
+def skipped_file(path: str, reason: str) -> Diagnostic:
+    return Diagnostic(SKIPPED_RULE, f"Skipped ({reason})", path)
+
+
+class DiagnosticWriter(abc.ABC):
+    """Stream diagnostics in batches, never holding more than one batch and one file's diagnostics in memory.
+
+    Subclasses define how a single diagnostic is rendered, plus an optional header and footer. Use as a
+    context manager, the footer is written and everything flushed on exit.
+    """
+
+    def __init__(self, stream: TextIO | None = None, max_per_file: int | None = None):
+        self.stream = stream if stream is not None else sys.stdout
+        self.max_per_file = max_per_file
+        self.num_files = 0
+        self.num_diagnostics = 0
+        self.num_omitted = 0
+        self.num_skipped = 0
+        self._chunks: list[str] = []
+        self._buffered = 0
+
+    def __enter__(self) -> Self:
+        self._write(self.header())
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._write(self.footer())
+        self.flush()
+
+    def write_file(self, diagnostics: Iterable[Diagnostic]) -> None:
+        """Write the diagnostics of one file, the ones beyond ``max_per_file`` are only counted.
+
+        A skipped file has a single ``SKIPPED_RULE`` diagnostic, which is counted on its own.
+        """
+        count = 0
+        path = ""
+        for diagnostic in diagnostics:
+            if diagnostic.rule == SKIPPED_RULE:
+                self.num_skipped += 1
+                self._write(self.format_skipped(diagnostic))
+                return
+            count += 1
+            path = diagnostic.path
+            if self.max_per_file is None or count <= self.max_per_file:
+                self._write(self.format_diagnostic(diagnostic))
+        if not count:
+            return
+        self.num_files += 1
+        self.num_diagnostics += count
+        if self.max_per_file is not None and count > self.max_per_file:
+            omitted = count - self.max_per_file
+            self.num_omitted += omitted
+            self._write(self.format_omitted(path, omitted))
+
+    def header(self) -> str:
+        return ""
+
+    def footer(self) -> str:
+        return ""
+
+    @abc.abstractmethod
+    def format_diagnostic(self, diagnostic: Diagnostic) -> str: ...
+
+    def format_omitted(self, path: str, count: int) -> str:
+        return ""
+
+    def format_skipped(self, diagnostic: Diagnostic) -> str:
+        return ""
+
+    def summary(self) -> dict[str, int]:
+        return {
+            "files": self.num_files,
+            "diagnostics": self.num_diagnostics,
+            "omitted": self.num_omitted,
+            "skipped": self.num_skipped,
+        }
+
+    def _write(self, chunk: str) -> None:
+        if not chunk:
+            return
+        self._chunks.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        self.stream.write("".join(self._chunks))
+        self.stream.flush()
+        self._chunks.clear()
+        self._buffered = 0
+
+
+class TextWriter(DiagnosticWriter):
+    def format_diagnostic(self, diagnostic: Diagnostic) -> str:
+        if not diagnostic.line:
+            return f"{diagnostic.message}: {diagnostic.path}\n"
+        return f"{diagnostic.message}: {diagnostic.path}:{diagnostic.line}:\t{diagnostic.source}\n"
+
+    def format_omitted(self, path: str, count: int) -> str:
+        return f"... {_count(count, 'more diagnostic')} omitted for {path}\n"
+
+    def format_skipped(self, diagnostic: Diagnostic) -> str:
+        return f"{diagnostic.message}: {diagnostic.path}\n"
+
+    def footer(self) -> str:
+        return f"{_count(self.num_skipped, 'file')} skipped\n" if self.num_skipped else ""
+
+
+class JsonWriter(DiagnosticWriter):
+    """JSON Lines, one object per diagnostic, followed by a summary object."""
+
+    def format_diagnostic(self, diagnostic: Diagnostic) -> str:
+        return json.dumps(diagnostic._asdict(), ensure_ascii=False) + "\n"
+
+    def format_omitted(self, path: str, count: int) -> str:
+        return json.dumps({"omitted": {"path": path, "count": count}}, ensure_ascii=False) + "\n"
+
+    def format_skipped(self, diagnostic: Diagnostic) -> str:
+        skipped = {"path": diagnostic.path, "message": diagnostic.message}
+        return json.dumps({"skipped": skipped}, ensure_ascii=False) + "\n"
+
+    def footer(self) -> str:
+        return json.dumps({"summary": self.summary()}) + "\n"
+
+
+class SarifWriter(DiagnosticWriter):
+    """A single SARIF 2.1.0 log, written incrementally: the results come first, the tool and rules last."""
+
+    def __init__(self, stream: TextIO | None = None, max_per_file: int | None = None):
+        super().__init__(stream, max_per_file)
+        self.rules: dict[str, None] = {}
+        self._separator = ""
+
+    def header(self) -> str:
+        return f'{{"$schema": "{SARIF_SCHEMA}", "version": "2.1.0", "runs": [{{"results": [\n'
+
+    def format_diagnostic(self, diagnostic: Diagnostic) -> str:
+        self.rules[diagnostic.rule] = None
+        location: dict[str, object] = {"artifactLocation": {"uri": diagnostic.path}}
+        if diagnostic.line:
+            region: dict[str, object] = {"startLine": diagnostic.line}
+            if diagnostic.columns:
+                region["startColumn"] = diagnostic.columns[0]
+            if diagnostic.source:
+                region["snippet"] = {"text": diagnostic.source}
+            location["region"] = region
+        result = {
+            "ruleId": diagnostic.rule,
+            "level": "error",
+            "message": {"text": diagnostic.message},
+            "locations": [{"physicalLocation": location}],
+        }
+        if len(diagnostic.columns) > 1:
+            result["properties"] = {"columns": list(diagnostic.columns)}
+        chunk = self._separator + json.dumps(result, ensure_ascii=False)
+        self._separator = ",\n"
+        return chunk
+
+    def footer(self) -> str:
+        tool = {
+            "driver": {
+                "name": "dochooks",
+                "version": __version__,
+                "informationUri": "https://github.com/ShigureLab/dochooks",
+                "rules": [{"id": rule} for rule in self.rules],
+            }
+        }
+        return (
+            f'\n], "tool": {json.dumps(tool)}, "columnKind": "unicodeCodePoints", '
+            f'"properties": {json.dumps(self.summary())}}}]}}\n'
+        )
+
+
+def _escape_github_data(value: str) -> str:
+    return value.replace("%", "%25").replace("\r", "%0D").replace("\n", "%0A")
+
+
+def _escape_github_property(value: str) -> str:
+    return _escape_github_data(value).replace(":", "%3A").replace(",", "%2C")
+
+
+class GithubWriter(DiagnosticWriter):
+    """GitHub Actions workflow commands, shown as annotations on the changed files."""
+
+    def format_diagnostic(self, diagnostic: Diagnostic) -> str:
+        properties = f"file={_escape_github_property(diagnostic.path)}"
+        if diagnostic.line:
+            properties += f",line={diagnostic.line}"
+        if diagnostic.columns:
+            properties += f",col={diagnostic.columns[0]}"
+        properties += f",title={_escape_github_property(diagnostic.rule)}"
+        return f"::error {properties}::{_escape_github_data(diagnostic.message)}\n"
+
+    def format_omitted(self, path: str, count: int) -> str:
+        return f"::warning file={_escape_github_property(path)}::{_count(count, 'more diagnostic')} omitted\n"
+
+    def format_skipped(self, diagnostic: Diagnostic) -> str:
+        return f"::notice file={_escape_github_property(diagnostic.path)}::{_escape_github_data(diagnostic.message)}\n"
+
+
+WRITERS: Final[dict[str, type[DiagnosticWriter]]] = {
+    "text": TextWriter,
+    "json": JsonWriter,
+    "sarif": SarifWriter,
+    "github": GithubWriter,
+}
+
+
+def make_writer(output_format: str, max_per_file: int | None = None, stream: TextIO | None = None) -> DiagnosticWriter:
+    return WRITERS[output_format](stream, max_per_file)
+
+
+def add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--output-format", choices=OUTPUT_FORMATS, default="text", help="Format of the diagnostics (default: text)"
+    )
+    parser.add_argument(
+        "--max-diagnostics-per-file",
+        type=int,
+        default=None,
+        help="Only show this many diagnostics per file, and how many more were omitted (default: no limit)",
+    )
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Callable, Iterator, Sequence
+from typing import Final, TypeVar
+
+from .profile import ProfiledCall, get_profiler
+
+A = TypeVar("A")
+T = TypeVar("T")
+
+# Each worker receives roughly this many batches, so that a few slow files don't leave other workers idle.
+BATCHES_PER_WORKER = 4
+# Without an explicit number of jobs, fewer files than this, or fewer bytes in total, are processed in process:
+# starting a pool costs more than it saves, and pre-commit already runs one hook process per CPU.
+MIN_PARALLEL_FILES: Final[int] = 16
+MIN_PARALLEL_BYTES: Final[int] = 1 << 20
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+def _total_size_at_least(filenames: Sequence[str], limit: int) -> bool:
+    total = 0
+    for file_path in filenames:
+        try:
+            total += os.stat(file_path).st_size
+        except OSError:
+            # Reported once the file is processed
+            continue
+        if total >= limit:
+            return True
+    return False
+
+
+def jobs_for_files(filenames: Sequence[str], jobs: int | None = None) -> int:
+    """Number of worker processes for the files, ``jobs`` if given, else the CPU count unless the run is small."""
+    if jobs is not None:
+        return jobs
+    if len(filenames) < MIN_PARALLEL_FILES or not _total_size_at_least(filenames, MIN_PARALLEL_BYTES):
+        return 1
+    return default_jobs()
+
+
+def split_batches(filenames: Sequence[str], num_batches: int) -> list[Sequence[str]]:
+    """Split the files into at most ``num_batches`` contiguous batches of about the same size."""
+    size = -(-len(filenames) // max(1, num_batches))
+    return [filenames[start : start + size] for start in range(0, len(filenames), size)] if filenames else []
+
+
+def map_files(func: Callable[[A], T], filenames: Sequence[A], jobs: int | None = None) -> Iterator[T]:
+    """Apply ``func`` to every file, optionally fanning out over a process pool.
+
+    Args:
+        func: A picklable (module-level) function taking a file path (or a batch of them)
+        filenames: Files (or batches of files) to process
+        jobs: Number of worker processes, defaults to the CPU count, ``1`` disables the pool
+
+    Returns:
+        An iterator over the results, in the same order as ``filenames``
+    """
+    if jobs is None:
+        jobs = default_jobs()
+    jobs = min(jobs, len(filenames))
+    if jobs <= 1:
+        yield from map(func, filenames)
+        return
+
+    # Only imported when needed, it takes longer than most runs without a pool
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(filenames) // (jobs * BATCHES_PER_WORKER))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        profiler = get_profiler()
+        if profiler is None:
+            yield from executor.map(func, filenames, chunksize=chunksize)
+            return
+        for result, snapshot in executor.map(ProfiledCall(func), filenames, chunksize=chunksize):
+            profiler.merge(snapshot)
+            yield result
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import argparse
+import os
+from collections.abc import AsyncGenerator, Callable, Generator, Iterator, Sequence
+from typing import TYPE_CHECKING, Final, Generic, TypeVar
+
+from .fs import atomic_write
+from .parallel import BATCHES_PER_WORKER, jobs_for_files, map_files, split_batches
+from .profile import count, phase
+
+# asyncio and concurrent.futures take longer to import than most hook runs, they are only imported once the
+# pipeline actually starts
+if TYPE_CHECKING:
+    import asyncio
+
+T = TypeVar("T")
+
+# Number of threads prefetching the upcoming files of each process
+IO_THREADS: Final[int] = 4
+# Prefetching pauses while this many bytes have been read but not yet scanned (or written back)
+MAX_IN_FLIGHT_BYTES: Final[int] = 64 << 20
+# Larger files are not prefetched, but left to the stage function, which can mmap them
+PREFETCH_LIMIT: Final[int] = 8 << 20
+
+# Processes one file given its prefetched content, or None if the file wasn't prefetched and has to be read (and
+# written) by the function itself. Returns the result, and the new text of the file if it has to be rewritten.
+ProcessFile = Callable[[str, bytes | None], tuple[T, str | None]]
+
+
+def read_file(file_path: str, limit: int = PREFETCH_LIMIT) -> bytes | None:
+    """Read a whole file, or return None without reading it if it's at least ``limit`` bytes large."""
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size >= limit:
+            return None
+        count("files_read")
+        with phase("read"):
+            return f.read()
+
+
+def write_file(file_path: str, text: str) -> None:
+    with phase("write"), atomic_write(file_path) as f:
+        f.write(text)
+
+
+class _ByteBudget:
+    """Backpressure on the bytes held by the pipeline, the limit may be exceeded by the reads already started."""
+
+    def __init__(self, limit: int):
+        import asyncio
+
+        self.limit = limit
+        self.used = 0
+        self._available = asyncio.Event()
+        self._available.set()
+
+    def acquire(self, amount: int) -> None:
+        self.used += amount
+        if self.used >= self.limit:
+            self._available.clear()
+
+    def release(self, amount: int) -> None:
+        self.used -= amount
+        if self.used < self.limit:
+            self._available.set()
+
+    async def wait(self) -> None:
+        await self._available.wait()
+
+
+async def _pipeline(
+    process: ProcessFile[T],
+    filenames: Sequence[str],
+    io_threads: int,
+    max_in_flight_bytes: int,
+    prefetch_limit: int,
+) -> AsyncGenerator[T, None]:
+    """Read files ahead on a thread pool, process them in order on the event loop and write them back on a thread.
+
+    Prefetching stays at most ``io_threads`` files and about ``max_in_flight_bytes`` ahead of processing.
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    loop = asyncio.get_running_loop()
+    budget = _ByteBudget(max_in_flight_bytes)
+    prefetched: asyncio.Queue[tuple[str, asyncio.Task[bytes | None]] | None] = asyncio.Queue(maxsize=io_threads)
+
+    async def read(file_path: str) -> bytes | None:
+        content = await loop.run_in_executor(readers, read_file, file_path, prefetch_limit)
+        budget.acquire(len(content or b""))
+        return content
+
+    async def prefetch() -> None:
+        for file_path in filenames:
+            await budget.wait()
+            await prefetched.put((file_path, asyncio.create_task(read(file_path))))
+        await prefetched.put(None)
+
+    # A single writer thread, so that rewriting files never competes with prefetching for threads
+    with ThreadPoolExecutor(io_threads) as readers, ThreadPoolExecutor(1) as writer:
+        prefetcher = asyncio.create_task(prefetch())
+        writes: list[asyncio.Future[None]] = []
+        try:
+            while (item := await prefetched.get()) is not None:
+                file_path, content_task = item
+                content = await content_task
+                result, text = process(file_path, content)
+                size = len(content or b"")
+                if text is None:
+                    budget.release(size)
+                else:
+                    count("files_rewritten")
+                    write = loop.run_in_executor(writer, write_file, file_path, text)
+                    write.add_done_callback(lambda _, size=size: budget.release(size))
+                    writes.append(write)
+                yield result
+                # Let the prefetcher start the next reads before processing the next file
+                await asyncio.sleep(0)
+            await asyncio.gather(*writes)
+        finally:
+            prefetcher.cancel()
+            while not prefetched.empty():
+                item = prefetched.get_nowait()
+                if item is not None:
+                    item[1].cancel()
+
+
+def iter_pipeline(
+    process: ProcessFile[T],
+    filenames: Sequence[str],
+    io_threads: int = IO_THREADS,
+    max_in_flight_bytes: int = MAX_IN_FLIGHT_BYTES,
+    prefetch_limit: int = PREFETCH_LIMIT,
+) -> Generator[T, None, None]:
+    """Run the asyncio pipeline over the files, yielding the results in the same order as ``filenames``.
+
+    The event loop only runs while the next result is awaited, the reads and writes on threads go on meanwhile.
+    Closing the generator early stops the pipeline, waiting for the reads and writes already started.
+    """
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    results = _pipeline(process, filenames, io_threads, max_in_flight_bytes, prefetch_limit)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(results.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(results.aclose())
+        loop.close()
+
+
+class PipelinedBatch(Generic[T]):
+    """Picklable function running the pipeline over a batch of files in a worker process."""
+
+    def __init__(self, process: ProcessFile[T], io_threads: int, max_in_flight_bytes: int, prefetch_limit: int):
+        self.process = process
+        self.io_threads = io_threads
+        self.max_in_flight_bytes = max_in_flight_bytes
+        self.prefetch_limit = prefetch_limit
+
+    def __call__(self, filenames: Sequence[str]) -> list[T]:
+        return list(
+            iter_pipeline(self.process, filenames, self.io_threads, self.max_in_flight_bytes, self.prefetch_limit)
+        )
+
+
+class Unpipelined(Generic[T]):
+    """Picklable function processing a file without prefetching, the process function reads and writes it."""
+
+    def __init__(self, process: ProcessFile[T]):
+        self.process = process
+
+    def __call__(self, file_path: str) -> T:
+        result, _ = self.process(file_path, None)
+        return result
+
+
+def map_files_pipelined(
+    process: ProcessFile[T],
+    filenames: Sequence[str],
+    jobs: int | None = None,
+    io_threads: int = IO_THREADS,
+    max_in_flight_bytes: int = MAX_IN_FLIGHT_BYTES,
+    prefetch_limit: int = PREFETCH_LIMIT,
+) -> Iterator[T]:
+    """Same as ``map_files``, but overlapping the reads, processing and writes of the files within each process.
+
+    Args:
+        process: A picklable (module-level) function, see ``ProcessFile``
+        filenames: Files to process
+        jobs: Number of worker processes, defaults to the CPU count for runs of at least ``MIN_PARALLEL_FILES``
+            files and ``MIN_PARALLEL_BYTES`` bytes, ``1`` disables the pool
+        io_threads: Number of files read ahead in each process, ``0`` disables the pipeline, which is also skipped
+            for a single file, as there is nothing to overlap
+        max_in_flight_bytes: Bytes read ahead in each process at most, roughly
+        prefetch_limit: Files at least this large are read by ``process`` itself
+
+    Returns:
+        An iterator over the results, in the same order as ``filenames``
+    """
+    jobs = jobs_for_files(filenames, jobs)
+    if io_threads <= 0 or len(filenames) <= 1:
+        yield from map_files(Unpipelined(process), filenames, jobs)
+        return
+    # Each worker runs its own pipeline over contiguous batches, which keeps the results in order
+    batches = split_batches(filenames, jobs * BATCHES_PER_WORKER)
+    jobs = min(jobs, len(batches))
+    if jobs <= 1:
+        yield from iter_pipeline(process, filenames, io_threads, max_in_flight_bytes, prefetch_limit)
+        return
+    batch = PipelinedBatch(process, io_threads, max_in_flight_bytes, prefetch_limit)
+    for results in map_files(batch, batches, jobs):
+        yield from results
+
+
+def add_io_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=IO_THREADS,
+        help=f"Number of files read ahead while scanning, per process, 0 disables prefetching (default: {IO_THREADS})",
+    )
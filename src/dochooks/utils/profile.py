@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import Final, Generic, TypeVar
+
+A = TypeVar("A")
+T = TypeVar("T")
+
+# "text" or "json" to print the report to stderr (like --profile), anything else is a path to write it to
+# (like --profile-output)
+PROFILE_ENV: Final[str] = "DOCHOOKS_PROFILE"
+PROFILE_FORMATS: Final[list[str]] = ["text", "json"]
+
+_NULL_CONTEXT: Final[AbstractContextManager[None]] = nullcontext()
+
+
+class Profiler:
+    """Wall-clock time per phase and event counters of a hook run."""
+
+    def __init__(self) -> None:
+        self.timings: Counter[str] = Counter()
+        self.counters: Counter[str] = Counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - start
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        return {"timings": dict(self.timings), "counters": dict(self.counters)}
+
+    def merge(self, snapshot: dict[str, dict[str, float]]) -> None:
+        self.timings.update(snapshot["timings"])
+        self.counters.update(snapshot["counters"])
+
+    def format_summary(self) -> str:
+        lines = ["dochooks profile:"]
+        lines.extend(f"  {name:<24} {seconds * 1000:10.1f} ms" for name, seconds in sorted(self.timings.items()))
+        lines.extend(f"  {name:<24} {count:10}" for name, count in sorted(self.counters.items()))
+        return "\n".join(lines)
+
+
+# The profiler of the current process, None when profiling is disabled, which every helper checks first,
+# so that instrumentation costs a single global lookup when disabled.
+_profiler: Profiler | None = None
+
+
+def get_profiler() -> Profiler | None:
+    return _profiler
+
+
+def enable() -> Profiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+    return _profiler
+
+
+def disable() -> None:
+    global _profiler
+    _profiler = None
+
+
+def phase(name: str) -> AbstractContextManager[None]:
+    """Time a phase, the time of all phases with the same name is summed up.
+
+    Time spent in worker processes is added as well, so phases may add up to more than the total.
+    """
+    if _profiler is None:
+        return _NULL_CONTEXT
+    return _profiler.phase(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    if _profiler is not None:
+        _profiler.counters[name] += amount
+
+
+class ProfiledCall(Generic[A, T]):
+    """Picklable wrapper running a function in a worker process with a fresh profiler.
+
+    Returns the result together with the snapshot of the worker's profiler, to be merged by the parent.
+    """
+
+    def __init__(self, func: Callable[[A], T]):
+        self.func = func
+
+    def __call__(self, arg: A) -> tuple[T, dict[str, dict[str, float]]]:
+        disable()
+        profiler = enable()
+        try:
+            return self.func(arg), profiler.snapshot()
+        finally:
+            disable()
+
+
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    # --profile takes no value, so that it can't swallow the first filename
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"Print per-phase timings and counters to stderr (default: ${PROFILE_ENV})",
+    )
+    parser.add_argument(
+        "--profile-format",
+        choices=PROFILE_FORMATS,
+        default="text",
+        help="Format of the --profile report (default: text)",
+    )
+    parser.add_argument(
+        "--profile-output", default=None, metavar="PATH", help="Profile the run and write the report to a JSON file"
+    )
+
+
+def profile_destination(args: argparse.Namespace) -> str | None:
+    """Where the arguments added by ``add_profile_argument`` ask to report to, in the form of ``PROFILE_ENV``.
+
+    Returns:
+        "text" or "json" for stderr, the absolute path of the report file, None if profiling wasn't requested
+    """
+    if args.profile_output is not None:
+        # Absolute, so that a report file named like a format is still written to
+        return os.path.abspath(args.profile_output)
+    if args.profile:
+        return args.profile_format
+    return None
+
+
+def _report(profiler: Profiler, destination: str) -> None:
+    if destination == "text":
+        print(profiler.format_summary(), file=sys.stderr)
+    elif destination == "json":
+        print(json.dumps(profiler.snapshot()), file=sys.stderr)
+    else:
+        with open(destination, "w", encoding="utf8") as f:
+            json.dump(profiler.snapshot(), f, indent=2)
+            f.write("\n")
+
+
+@contextmanager
+def profiling(destination: str | None) -> Iterator[Profiler | None]:
+    """Profile the enclosed hook run if requested on the command line or by the environment, and report afterwards.
+
+    Args:
+        destination: Usually from ``profile_destination``, falls back to ``PROFILE_ENV`` if None
+    """
+    destination = destination or os.environ.get(PROFILE_ENV) or None
+    if destination is None:
+        yield None
+        return
+    if destination in ("1", "true", "yes", "on"):
+        destination = "text"
+    disable()
+    profiler = enable()
+    try:
+        with profiler.phase("total"):
+            yield profiler
+    finally:
+        disable()
+        _report(profiler, destination)
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import argparse
+import codecs
+import mmap
+from typing import Final
+
+# Only this much of a file is looked at, which is enough to tell binaries and other encodings from UTF-8 text
+SNIFF_SIZE: Final[int] = 8 << 10
+
+BINARY: Final[str] = "binary"
+NOT_UTF8: Final[str] = "not UTF-8 encoded"
+
+# BOMs of encodings the hooks can't scan, the UTF-32 ones first, as they start like the UTF-16 ones
+_FOREIGN_BOMS: Final[list[tuple[bytes, str]]] = [
+    (codecs.BOM_UTF32_LE, "UTF-32"),
+    (codecs.BOM_UTF32_BE, "UTF-32"),
+    (codecs.BOM_UTF16_LE, "UTF-16"),
+    (codecs.BOM_UTF16_BE, "UTF-16"),
+]
+
+
+def sniff(content: bytes | mmap.mmap, max_size: int | None = None) -> str | None:
+    """Tell from the start of a file whether it can be scanned as UTF-8 text.
+
+    A NUL byte marks a binary file, since text in any encoding the hooks could scan has none. Files with
+    another encoding are told by their BOM, or by invalid UTF-8 in the sniffed part.
+
+    Args:
+        content: The whole content of the file, only its first ``SNIFF_SIZE`` bytes are looked at
+        max_size: Files larger than this many bytes are skipped
+
+    Returns:
+        Why the file has to be skipped, None if it can be scanned
+    """
+    if max_size is not None and len(content) > max_size:
+        return f"larger than {max_size} bytes"
+    head = content[:SNIFF_SIZE]
+    for bom, encoding in _FOREIGN_BOMS:
+        if head.startswith(bom):
+            return f"{encoding} encoded"
+    if b"\0" in head:
+        return BINARY
+    try:
+        # A multi-byte char may be cut off at the end of the sniffed part
+        codecs.getincrementaldecoder("utf8")().decode(head, final=len(content) <= SNIFF_SIZE)
+    except UnicodeDecodeError:
+        return NOT_UTF8
+    return None
+
+
+def add_max_size_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--max-file-size",
+        type=int,
+        default=None,
+        metavar="BYTES",
+        help="Skip files larger than this, binary and non UTF-8 files are always skipped (default: no limit)",
+    )
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def unscannable_files(tmp_path: Path) -> dict[str, str]:
+    """Files every hook has to skip, mapped to the reason reported for them."""
+    files = {
+        "image.png": (b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR", "binary"),
+        "gbk.md": ("中文English\n".encode("gbk"), "not UTF-8 encoded"),
+        "utf16.md": ("﻿中文English\n".encode("utf-16-le"), "UTF-16 encoded"),
+        "bad.md": ("中文English\n".encode() + b"\xff\n", "not UTF-8 encoded"),
+    }
+    reasons: dict[str, str] = {}
+    for name, (content, reason) in files.items():
+        (tmp_path / name).write_bytes(content)
+        reasons[str(tmp_path / name)] = reason
+    return reasons
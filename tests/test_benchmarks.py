@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import importlib
+import json
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+
+BENCHMARKS_DIR = Path(__file__).parent.parent / "benchmarks"
+
+
+@pytest.fixture
+def suite(monkeypatch: pytest.MonkeyPatch) -> ModuleType:
+    # The benchmarks are scripts rather than a package, they import each other as top-level modules
+    monkeypatch.syspath_prepend(str(BENCHMARKS_DIR))
+    return importlib.import_module("suite")
+
+
+def test_suite_run_and_compare(suite: ModuleType, tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    baseline = tmp_path / "baseline.json"
+    assert suite.main(["run", "--scale", "0.001", "--repeat", "1", "--output", str(baseline)]) == 0
+    results = json.loads(baseline.read_text())["results"]
+    assert results.keys() == suite.BENCHMARKS.keys()
+    assert results["check_text/mixed_prose"]["throughput"].keys() == {"MB/s", "lines/s"}
+    assert suite.main(["compare", str(baseline), str(baseline)]) == 0
+
+
+def test_compare_results(suite: ModuleType):
+    def results(seconds: float, peak_memory_mb: float) -> dict:
+        return {"scale": 1.0, "results": {"bench": {"seconds": seconds, "peak_memory_mb": peak_memory_mb}}}
+
+    assert suite.compare_results(results(1.0, 100.0), results(1.05, 105.0), 0.1) == []
+    assert suite.compare_results(results(1.0, 100.0), results(1.2, 100.0), 0.1) == [("bench", "seconds", 1.0, 1.2)]
+    assert suite.compare_results(results(1.0, 100.0), results(1.0, 200.0), 0.1) == [
+        ("bench", "peak_memory_mb", 100.0, 200.0)
+    ]
+    # Tiny absolute changes are noise
+    assert suite.compare_results(results(0.001, 0.1), results(0.002, 0.5), 0.1) == []
+    with pytest.raises(ValueError):
+        suite.compare_results(results(1.0, 1.0), {**results(1.0, 1.0), "scale": 2.0}, 0.1)
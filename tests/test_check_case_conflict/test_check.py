@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import io
+import json
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -13,31 +15,44 @@ from dochooks.check_case_conflict.check import (
 from dochooks.utils.return_code import FAIL, PASS
 
 
+def mock_popen(stdout: bytes, returncode: int = 0) -> MagicMock:
+    proc = MagicMock()
+    proc.stdout = io.BytesIO(stdout)
+    proc.returncode = returncode
+    popen = MagicMock()
+    popen.return_value.__enter__.return_value = proc
+    return popen
+
+
 class TestGetAllGitFiles:
     def test_get_git_files_success(self) -> None:
         """Test successfully getting git file list"""
-        mock_result = MagicMock()
-        mock_result.stdout = "file1.txt\nfile2.txt\ndir/file3.txt\n"
-
-        with patch("subprocess.run", return_value=mock_result) as mock_run:
+        with patch("subprocess.Popen", mock_popen(b"file1.txt\0file2.txt\0dir/file3.txt\0")) as popen:
             files = get_all_git_files()
             assert files == ["file1.txt", "file2.txt", "dir/file3.txt"]
-            mock_run.assert_called_once()
+            popen.assert_called_once()
+            assert "-z" in popen.call_args.args[0]
 
     def test_get_git_files_empty_repo(self) -> None:
         """Test empty repository"""
-        mock_result = MagicMock()
-        mock_result.stdout = ""
-
-        with patch("subprocess.run", return_value=mock_result):
+        with patch("subprocess.Popen", mock_popen(b"")):
             files = get_all_git_files()
             assert files == []
 
     def test_get_git_files_not_a_repo(self) -> None:
         """Test not in a git repository"""
-        with patch("subprocess.run", side_effect=FileNotFoundError()):
+        with patch("subprocess.Popen", side_effect=FileNotFoundError()):
             files = get_all_git_files()
             assert files == []
+        with patch("subprocess.Popen", mock_popen(b"", returncode=128)):
+            files = get_all_git_files()
+            assert files == []
+
+    def test_get_git_files_unusual_paths(self) -> None:
+        """Test paths with newlines and non-ASCII chars are kept intact"""
+        with patch("subprocess.Popen", mock_popen("a\nb.txt\0中文.md\0".encode())):
+            files = get_all_git_files()
+            assert files == ["a\nb.txt", "中文.md"]
 
 
 class TestFindCaseConflicts:
@@ -188,3 +203,84 @@ class TestCheckFiles:
         assert result == PASS
         captured = capsys.readouterr()
         assert captured.out == ""
+
+    @patch("dochooks.check_case_conflict.check.get_all_git_files")
+    def test_input_file_already_tracked(self, mock_git_files: MagicMock, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test modified file which is also tracked doesn't conflict with itself"""
+        mock_git_files.return_value = ["docs/File.txt", "other.txt"]
+        result = check_files(["docs/File.txt", "./docs/File.txt"])
+        assert result == PASS
+        captured = capsys.readouterr()
+        assert captured.out == ""
+
+    @patch("dochooks.check_case_conflict.check.get_all_git_files")
+    def test_unnormalized_input_file(self, mock_git_files: MagicMock, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test un-normalized input paths are matched against normalized paths"""
+        mock_git_files.return_value = ["file.txt"]
+        result = check_files(["./File.txt"])
+        assert result == FAIL
+        captured = capsys.readouterr()
+        assert "File.txt [current commit]" in captured.out
+
+
+class TestDirectoryConflicts:
+    def test_directory_conflict(self) -> None:
+        """Test directories differing only in case"""
+        conflicts = find_case_conflicts(["Docs/a.md", "docs/b.md", "docs/c.md"])
+        assert conflicts == {"docs/": ["Docs/", "docs/"]}
+
+    def test_nested_directory_conflict(self) -> None:
+        """Test conflict of a nested directory, reported only at the level where spellings differ"""
+        conflicts = find_case_conflicts(["a/B/c/x.md", "a/b/c/y.md"])
+        assert conflicts == {"a/b/": ["a/B/", "a/b/"]}
+        conflicts = find_case_conflicts(["a/B/c/x.md", "a/b/C/y.md"])
+        assert conflicts == {"a/b/": ["a/B/", "a/b/"], "a/b/c/": ["a/B/c/", "a/b/C/"]}
+
+    def test_file_and_directory_conflicts(self) -> None:
+        """Test file and directory conflicts are reported together"""
+        conflicts = find_case_conflicts(["Docs/a.md", "docs/A.md", "docs/b.md"])
+        assert conflicts == {"docs/": ["Docs/", "docs/"], "docs/a.md": ["Docs/a.md", "docs/A.md"]}
+
+    def test_file_conflicts_with_directory(self) -> None:
+        """Test file with the same name as a directory differing in case"""
+        conflicts = find_case_conflicts(["docs", "Docs/a.md"])
+        assert conflicts == {"docs": ["docs", "Docs/"]}
+
+    @patch("dochooks.check_case_conflict.check.get_all_git_files")
+    def test_check_files_directory_conflict(
+        self, mock_git_files: MagicMock, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Test new file in a directory conflicting with an existing directory"""
+        mock_git_files.return_value = ["Docs/a.md", "other/Docs/b.md"]
+        result = check_files(["docs/new.md"])
+        assert result == FAIL
+        captured = capsys.readouterr()
+        assert "Conflict group (lowercase: docs/):" in captured.out
+        assert "docs/ [current commit]" in captured.out
+        assert "other/Docs" not in captured.out
+
+    @patch("dochooks.check_case_conflict.check.get_all_git_files")
+    def test_check_files_existing_directory_conflict_not_in_input(self, mock_git_files: MagicMock) -> None:
+        """Test existing directory conflict not touched by current commit"""
+        mock_git_files.return_value = ["Docs/a.md", "docs/b.md"]
+        result = check_files(["other/new.md"])
+        assert result == PASS
+
+    @patch("dochooks.check_case_conflict.check.get_all_git_files")
+    def test_check_files_json_output(self, mock_git_files: MagicMock, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test conflicts reported as one JSON diagnostic per path of the current commit"""
+        mock_git_files.return_value = ["README.md"]
+        result = check_files(["readme.md"], output_format="json")
+        assert result == FAIL
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert records == [
+            {
+                "rule": "case-conflict",
+                "message": "Case conflict with README.md",
+                "path": "readme.md",
+                "line": 0,
+                "columns": [],
+                "source": "",
+            },
+            {"summary": {"files": 1, "diagnostics": 1, "omitted": 0, "skipped": 0}},
+        ]
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import unicodedata
+
+import pytest
+
+from dochooks.check_case_conflict.check import find_case_conflicts
+from dochooks.check_case_conflict.fold import FOLD_FUNCTIONS
+
+NFC_NAME = unicodedata.normalize("NFC", "café.md")
+NFD_NAME = unicodedata.normalize("NFD", "café.md")
+
+
+@pytest.mark.parametrize(
+    "paths, conflicting_modes",
+    [
+        (["README.md", "readme.md"], {"lower", "casefold", "casefold-nfc", "apfs", "ntfs"}),
+        (["Straße.md", "STRASSE.md"], {"casefold", "casefold-nfc"}),
+        ([NFC_NAME, NFD_NAME], {"casefold-nfc", "apfs"}),
+        ([NFC_NAME.upper(), NFD_NAME], {"casefold-nfc", "apfs"}),
+        # str.lower() can't tell the final sigma here, as it is followed by ".md"
+        (["ΣΊΣΥΦΟΣ.md", "σίσυφος.md"], {"casefold", "casefold-nfc", "apfs", "ntfs"}),
+        (["ı.md", "I.md"], {"ntfs"}),
+        (["中文.md", "中文.MD"], {"lower", "casefold", "casefold-nfc", "apfs", "ntfs"}),
+        (["a.md", "b.md", "中文.md"], set()),
+    ],
+)
+def test_fold_modes(paths: list[str], conflicting_modes: set[str]):
+    for mode in FOLD_FUNCTIONS:
+        has_conflict = bool(find_case_conflicts(paths, fold=mode))
+        assert has_conflict == (mode in conflicting_modes), mode
+
+
+@pytest.mark.parametrize("mode", FOLD_FUNCTIONS.keys())
+def test_ascii_fast_path_is_consistent(mode: str):
+    fold = FOLD_FUNCTIONS[mode]
+    # An ASCII path must fold to the same key whether or not the fast path is taken
+    assert fold("Docs/README.md") == fold("Docs/README.md" + "中")[:-1]
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from dochooks.check_case_conflict.check import check_files
+from dochooks.check_case_conflict.index import INDEX_FILENAME_TEMPLATE, CaseIndex, staged_changes
+from dochooks.utils.return_code import FAIL, PASS
+
+
+def git(*args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=dochooks", "-c", "user.email=dochooks@example.com", *args],
+        check=True,
+        capture_output=True,
+    )
+
+
+def commit_files(*paths: str) -> None:
+    for path in paths:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(path)
+    git("add", *paths)
+    git("commit", "-m", "update")
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    git("init")
+    return tmp_path
+
+
+class TestCaseIndex:
+    def test_not_a_repo(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test index is not available outside of a git repository"""
+        monkeypatch.chdir(tmp_path)
+        assert CaseIndex.open() is None
+
+    def test_unborn_head(self, repo: Path) -> None:
+        """Test index is not available before the first commit"""
+        assert CaseIndex.open() is None
+
+    def test_build_and_lookup(self, repo: Path) -> None:
+        """Test index is built under the git dir and looked up ignoring case"""
+        commit_files("README.md", "docs/Guide.md")
+        index = CaseIndex.open()
+        assert index is not None
+        assert index.lookup("readme.MD") == ["README.md"]
+        assert index.lookup("DOCS/guide.md") == ["docs/Guide.md"]
+        assert index.lookup("other.md") == []
+        index.close()
+        assert (repo / ".git" / INDEX_FILENAME_TEMPLATE.format(fold="lower")).exists()
+
+    def test_incremental_update(self, repo: Path) -> None:
+        """Test index follows HEAD when files are added and deleted"""
+        commit_files("a.md", "b.md")
+        index = CaseIndex.open()
+        assert index is not None
+        index.close()
+        commit_files("C.md")
+        git("rm", "a.md")
+        git("commit", "-m", "delete")
+        index = CaseIndex.open()
+        assert index is not None
+        assert index.lookup("c.md") == ["C.md"]
+        assert index.lookup("a.md") == []
+        assert index.lookup("b.md") == ["b.md"]
+        index.close()
+
+    def test_staged_changes(self, repo: Path) -> None:
+        """Test files added to and removed from the git index are reported"""
+        commit_files("a.md", "b.md")
+        git("rm", "--cached", "a.md")
+        Path("c.md").write_text("c")
+        git("add", "c.md")
+        assert staged_changes() == (["c.md"], {"a.md"})
+
+
+class TestCheckFilesWithIndex:
+    def test_conflict_with_existing_file(self, repo: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test new file conflicts with a file tracked in HEAD"""
+        commit_files("docs/file.md")
+        assert check_files(["docs/File.md"], use_index=True) == FAIL
+        captured = capsys.readouterr()
+        assert "docs/file.md" in captured.out
+        assert "docs/File.md [current commit]" in captured.out
+
+    def test_staged_files_checked_separately(self, repo: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test new conflicting files are found when pre-commit passes them to different runs"""
+        commit_files("other.md")
+        for path in ("README.md", "readme.md"):
+            Path(path).write_text(path)
+        git("add", "README.md", "readme.md")
+        assert check_files(["README.md"], use_index=True) == FAIL
+        assert check_files(["readme.md"], use_index=True) == FAIL
+        assert "README.md\n" in capsys.readouterr().out
+
+    def test_rename_case_only(self, repo: Path) -> None:
+        """Test renaming a file to a different case doesn't conflict with its old name"""
+        commit_files("readme.md")
+        git("mv", "readme.md", "README.md")
+        assert check_files(["README.md"], use_index=True) == PASS
+
+    def test_directory_conflict(self, repo: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test new file in a directory conflicting with a tracked directory"""
+        commit_files("Docs/a.md")
+        assert check_files(["docs/b.md"], use_index=True) == FAIL
+        captured = capsys.readouterr()
+        assert "Conflict group (lowercase: docs/):" in captured.out
+        assert "Docs/\n" in captured.out
+        assert "docs/ [current commit]" in captured.out
+
+    def test_file_conflicts_with_tracked_directory(self, repo: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test new file conflicting with a directory tracked in HEAD"""
+        commit_files("Docs/a.md")
+        assert check_files(["docs"], use_index=True) == FAIL
+        captured = capsys.readouterr()
+        assert "Docs/\n" in captured.out
+        assert "docs [current commit]" in captured.out
+
+    def test_directory_conflicts_with_tracked_file(self, repo: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test new file in a directory conflicting with a file tracked in HEAD"""
+        commit_files("readme")
+        assert check_files(["README/x.md"], use_index=True) == FAIL
+        captured = capsys.readouterr()
+        assert "readme\n" in captured.out
+        assert "README/ [current commit]" in captured.out
+
+    def test_rename_directory_case_only(self, repo: Path) -> None:
+        """Test renaming a directory to a different case doesn't conflict with its old name"""
+        commit_files("Docs/a.md", "Docs/b.md")
+        git("mv", "Docs", "docs")
+        assert check_files(["docs/a.md", "docs/b.md"], use_index=True) == PASS
+
+    def test_directory_count_after_update(self, repo: Path) -> None:
+        """Test directories are dropped from the index once their last file is deleted"""
+        commit_files("Docs/a.md", "Docs/b.md")
+        index = CaseIndex.open()
+        assert index is not None
+        assert index.lookup_directory("docs/") == [("Docs/", 2)]
+        index.close()
+        git("rm", "-r", "Docs")
+        commit_files("other.md")
+        index = CaseIndex.open()
+        assert index is not None
+        assert index.lookup_directory("docs/") == []
+        index.close()
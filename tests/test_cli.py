@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from dochooks.cli import main, run_rules
+from dochooks.insert_whitespace_between_cn_and_en_char.rule import WhitespaceBetweenCnAndEnChar
+from dochooks.rules import RULES, Rule, load_builtin_rules, register_rule
+from dochooks.utils.return_code import FAIL, PASS
+
+
+def test_builtin_rules_registered():
+    assert "whitespace-between-cn-and-en-char" in load_builtin_rules()
+    assert isinstance(RULES["whitespace-between-cn-and-en-char"], WhitespaceBetweenCnAndEnChar)
+
+
+def test_rule_must_check_lines():
+    class NoCheck(Rule):
+        name = "no-check"
+
+    with pytest.raises(TypeError, match="check_line"):
+        register_rule(NoCheck)
+    assert "no-check" not in RULES
+
+
+def test_run_rules():
+    rule = WhitespaceBetweenCnAndEnChar()
+    text = "中文English\n中文English # dochooks: skip-line\n中文 English\n"
+    diagnostics, fixed_text = run_rules(text, [rule])
+    assert diagnostics == [(1, rule, "中文English\n")]
+    assert fixed_text is None
+
+    diagnostics, fixed_text = run_rules(text, [rule], fix=True)
+    assert diagnostics == [(1, rule, "中文 English\n")]
+    assert fixed_text == "中文 English\n中文English # dochooks: skip-line\n中文 English\n"
+
+    assert run_rules("中文 English\n", [rule], fix=True) == ([], None)
+
+
+def test_run_rules_markup():
+    rule = WhitespaceBetweenCnAndEnChar()
+    text = "使用`pip`安装dochooks\n```\n中文English\n```\n"
+    diagnostics, fixed_text = run_rules(text, [rule], fix=True, syntax="markdown")
+    assert diagnostics == [(1, rule, "使用`pip`安装 dochooks\n")]
+    assert fixed_text == "使用`pip`安装 dochooks\n```\n中文English\n```\n"
+
+
+def test_run_rules_changed_lines():
+    rule = WhitespaceBetweenCnAndEnChar()
+    text = "中文a\n中文b\n中文c\n"
+    diagnostics, fixed_text = run_rules(text, [rule], fix=True, changed_lines=[(2, 2)])
+    assert diagnostics == [(2, rule, "中文 b\n")]
+    assert fixed_text == "中文a\n中文 b\n中文c\n"
+
+
+def test_main(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    path = tmp_path / "a.md"
+    path.write_text("中文English\n", encoding="utf8")
+    assert main(["run", "--jobs", "1", str(path)]) == FAIL
+    assert capsys.readouterr().out == f"No spaces between EN and CN chars detected at: {path}:1:\t中文English\n"
+    assert path.read_text(encoding="utf8") == "中文English\n"
+
+    assert main(["run", "--fix", "--rule", "whitespace-between-cn-and-en-char", str(path)]) == FAIL
+    assert capsys.readouterr().out == f"Add spaces between EN and CN chars in: {path}:1:\t中文 English\n"
+    assert path.read_text(encoding="utf8") == "中文 English\n"
+    assert main(["run", str(path)]) == PASS
+
+
+def test_main_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text('[tool.dochooks]\nextend-cn-chars = ["぀-ヿ"]\n', encoding="utf8")
+    path = tmp_path / "a.md"
+    path.write_text("カタカナabc\n", encoding="utf8")
+    assert main(["run", "--fix", "--jobs", "2", str(path)]) == FAIL
+    assert path.read_text(encoding="utf8") == "カタカナ abc\n"
+
+
+@pytest.mark.parametrize("io_threads", ["0", "4"])
+def test_main_skips_unscannable_files(
+    unscannable_files: dict[str, str], tmp_path: Path, io_threads: str, capsys: pytest.CaptureFixture[str]
+):
+    text = tmp_path / "a.md"
+    text.write_text("中文English\n", encoding="utf8")
+    contents = {path: Path(path).read_bytes() for path in unscannable_files}
+    assert main(["run", "--fix", "--io-threads", io_threads, *unscannable_files, str(text)]) == FAIL
+    out = capsys.readouterr().out
+    for path, reason in unscannable_files.items():
+        assert f"Skipped ({reason}): {path}" in out
+    assert out.endswith("4 files skipped\n")
+    assert text.read_text(encoding="utf8") == "中文 English\n"
+    assert {path: Path(path).read_bytes() for path in unscannable_files} == contents
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from dochooks import __version__
+from dochooks.daemon.client import main as client_main, run, send_request
+from dochooks.daemon.server import handle_request, serve
+from dochooks.utils.return_code import FAIL, PASS
+
+
+@pytest.fixture
+def socket_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> str:
+    # Unix socket paths are limited to ~100 chars, so don't put them into the (long) tmp_path
+    path = f"/tmp/dochooks-test-{id(tmp_path)}.sock"
+    monkeypatch.setenv("DOCHOOKS_DAEMON_SOCKET", path)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return path
+
+
+@pytest.fixture
+def daemon(socket_path: str) -> Iterator[str]:
+    thread = threading.Thread(target=serve, args=(socket_path, 10), daemon=True)
+    thread.start()
+    for _ in range(100):
+        if send_request({"command": "status"}, socket_path) is not None:
+            break
+        time.sleep(0.01)
+    yield socket_path
+    send_request({"command": "shutdown"}, socket_path)
+    thread.join()
+
+
+def test_fallback_without_daemon(socket_path: str, tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    path = tmp_path / "a.md"
+    path.write_text("中文English\n", encoding="utf8")
+    assert client_main(["check-whitespace-between-cn-and-en-char", str(path)]) == FAIL
+    assert "a.md:1" in capsys.readouterr().out
+
+
+def test_run_in_daemon(daemon: str, tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    path = tmp_path / "a.md"
+    path.write_text("中文English\n", encoding="utf8")
+    assert send_request({"command": "status"}, daemon) is not None
+    assert run("check-whitespace-between-cn-and-en-char", [str(path)]) == FAIL
+    assert "a.md:1" in capsys.readouterr().out
+    assert run("insert-whitespace-between-cn-and-en-char", [str(path)]) == FAIL
+    assert path.read_text(encoding="utf8") == "中文 English\n"
+    assert run("check-whitespace-between-cn-and-en-char", [str(path)]) == PASS
+
+
+def test_usage_errors_are_forwarded(daemon: str, capsys: pytest.CaptureFixture[str]):
+    assert run("check-case-conflict", ["--fold", "unknown"]) == 2
+    assert "invalid choice" in capsys.readouterr().err
+
+
+def test_invalid_requests(daemon: str):
+    for line in [b"not json\n", b"[1, 2]\n"]:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(daemon)
+            sock.sendall(line)
+            with sock.makefile("rb") as f:
+                assert "invalid request" in json.loads(f.readline())["error"]
+    request = {"version": __version__, "hook": "check-case-conflict", "argv": [], "cwd": "/nonexistent"}
+    assert "error" in handle_request(request)
+    assert send_request({"command": "status"}, daemon) is not None
+
+
+def test_hook_crash_is_reported(daemon: str, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]):
+    def crash(hook: str, argv: list[str]) -> int:
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr("dochooks.daemon.server.run_in_process", crash)
+    assert run("check-case-conflict", ["a.md"]) == FAIL
+    assert "RuntimeError: boom" in capsys.readouterr().err
+    assert send_request({"command": "status"}, daemon) is not None
+
+
+@pytest.mark.parametrize(("exit_code", "expected"), [(None, PASS), (3, 3), ("message", 1)])
+def test_hook_exit_codes(
+    daemon: str,
+    exit_code: int | str | None,
+    expected: int,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+):
+    def exit(hook: str, argv: list[str]) -> int:
+        sys.exit(exit_code)
+
+    monkeypatch.setattr("dochooks.daemon.server.run_in_process", exit)
+    assert run("check-case-conflict", ["a.md"]) == expected
+    assert capsys.readouterr().err == ("message\n" if exit_code == "message" else "")
+
+
+def test_environment_is_forwarded(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "daemon-cache"))
+    monkeypatch.delenv("DOCHOOKS_PROFILE", raising=False)
+    (tmp_path / "a.md").write_text("中文 English\n", encoding="utf8")
+    request = {
+        "version": __version__,
+        "hook": "check-whitespace-between-cn-and-en-char",
+        "argv": ["a.md"],
+        "cwd": str(tmp_path),
+        "env": {"XDG_CACHE_HOME": str(tmp_path / "client-cache"), "DOCHOOKS_PROFILE": "json"},
+    }
+    response = handle_request(request)
+    assert response["code"] == PASS
+    assert "timings" in json.loads(response["stderr"])
+    assert (tmp_path / "client-cache" / "dochooks").is_dir()
+    assert not (tmp_path / "daemon-cache").exists()
+    assert os.environ["XDG_CACHE_HOME"] == str(tmp_path / "daemon-cache")
+    assert "DOCHOOKS_PROFILE" not in os.environ
+
+    requests = []
+    monkeypatch.setattr("dochooks.daemon.client.send_request", lambda request, socket_path: requests.append(request))
+    monkeypatch.setenv("GIT_INDEX_FILE", str(tmp_path / "index"))
+    monkeypatch.chdir(tmp_path)
+    run("check-whitespace-between-cn-and-en-char", ["a.md"])
+    assert requests[0]["env"]["GIT_INDEX_FILE"] == str(tmp_path / "index")
+    assert requests[0]["env"]["DOCHOOKS_PROFILE"] is None
+
+
+def test_unknown_hook(capsys: pytest.CaptureFixture[str]):
+    assert client_main(["unknown-hook"]) == 2
+    assert "usage" in capsys.readouterr().err
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import dochooks
+from dochooks.entry_points import check_whitespace_between_cn_and_en_char, dochooks as dochooks_main, has_no_filenames
+from dochooks.utils.return_code import FAIL, PASS
+
+SRC_DIR = str(Path(dochooks.__file__).parent.parent)
+
+# Modules taking long to import, which the hooks must only import when they need them
+HEAVY_MODULES = {"asyncio", "concurrent.futures", "tomllib", "subprocess", "tempfile", "multiprocessing"}
+
+
+def imported_modules(code: str, cwd: Path) -> set[str]:
+    """The modules imported by running ``code``, as reported by ``python -X importtime``."""
+    env: dict[str, str] = {**os.environ, "PYTHONPATH": SRC_DIR}
+    env.pop("DOCHOOKS_PROFILE", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=cwd, env=env, capture_output=True, text=True
+    )
+    assert proc.returncode in (PASS, FAIL), proc.stderr
+    return {line.rsplit("|", 1)[1].strip() for line in proc.stderr.splitlines() if line.startswith("import time:")}
+
+
+@pytest.mark.parametrize(
+    ("hook", "argv", "expected"),
+    [
+        ("check-whitespace-between-cn-and-en-char", [], True),
+        ("check-whitespace-between-cn-and-en-char", ["--no-cache", "--changed-lines-only", "--"], True),
+        ("check-whitespace-between-cn-and-en-char", ["a.md"], False),
+        ("check-whitespace-between-cn-and-en-char", ["--", "--no-cache"], False),
+        ("check-whitespace-between-cn-and-en-char", ["--jobs", "2"], False),
+        ("check-whitespace-between-cn-and-en-char", ["--output-format=json"], False),
+        ("check-whitespace-between-cn-and-en-char", ["--help"], False),
+        ("check-case-conflict", ["--no-index"], True),
+        ("dochooks", ["run", "--fix"], True),
+        ("dochooks", [], False),
+        ("dochooks", ["run", "a.md"], False),
+    ],
+)
+def test_has_no_filenames(hook: str, argv: list[str], expected: bool, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv("DOCHOOKS_PROFILE", raising=False)
+    assert has_no_filenames(hook, argv) is expected
+    monkeypatch.setenv("DOCHOOKS_PROFILE", "1")
+    assert not has_no_filenames(hook, argv)
+
+
+def test_entry_points(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    (tmp_path / "a.md").write_text("中文English\n", encoding="utf8")
+    assert check_whitespace_between_cn_and_en_char([]) == PASS
+    assert check_whitespace_between_cn_and_en_char(["a.md"]) == FAIL
+    assert dochooks_main(["run", "--fix"]) == PASS
+    assert dochooks_main(["run", "--fix", "a.md"]) == FAIL
+    assert (tmp_path / "a.md").read_text(encoding="utf8") == "中文 English\n"
+    with pytest.raises(SystemExit):
+        dochooks_main([])
+    capsys.readouterr()
+
+
+def test_startup_without_files(tmp_path: Path):
+    modules = imported_modules(
+        "from dochooks.entry_points import check_whitespace_between_cn_and_en_char as main; raise SystemExit(main([]))",
+        tmp_path,
+    )
+    assert "dochooks.entry_points" in modules
+    assert not {"typing", "re", "argparse", "dochooks.insert_whitespace_between_cn_and_en_char.check"} & modules
+
+
+def test_case_conflict_imports_lazily(tmp_path: Path):
+    modules = imported_modules("import dochooks.check_case_conflict.check", tmp_path)
+    assert "dochooks.check_case_conflict.index" in modules
+    assert not {"sqlite3", "subprocess"} & modules
+
+
+@pytest.mark.parametrize(
+    "hook",
+    ["check_whitespace_between_cn_and_en_char", "insert_whitespace_between_cn_and_en_char", "dochooks"],
+)
+def test_startup_with_one_file(tmp_path: Path, hook: str):
+    (tmp_path / "a.md").write_text("中文 English\n", encoding="utf8")
+    argv = ["run", "a.md"] if hook == "dochooks" else ["--no-cache", "a.md"]
+    code = f"from dochooks.entry_points import {hook}; raise SystemExit({hook}({argv!r}))"
+    modules = imported_modules(code, tmp_path)
+    assert "dochooks.insert_whitespace_between_cn_and_en_char.markup" in modules
+    assert not HEAVY_MODULES & modules
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import io
+import random
+
+import pytest
+
+from dochooks.insert_whitespace_between_cn_and_en_char.batch import (
+    DocumentResult,
+    check_documents,
+    find_boundary_offsets,
+    insert_spaces_at,
+)
+from dochooks.insert_whitespace_between_cn_and_en_char.check import check_lines
+from dochooks.insert_whitespace_between_cn_and_en_char.format import format_lines
+from dochooks.insert_whitespace_between_cn_and_en_char.regex import char_classes_from_config
+
+
+def test_find_boundary_offsets():
+    assert list(find_boundary_offsets("中文English\n中文 English中文\n")) == [2, 20]
+    assert list(find_boundary_offsets("中文 English\n")) == []
+    assert list(find_boundary_offsets("`a中`中文a\n<!-- dochooks: skip-next-line -->\n中文a\n", "markdown")) == [6]
+
+
+def test_insert_spaces_at():
+    assert insert_spaces_at("中文English", [2]) == "中文 English"
+    assert insert_spaces_at("中a中", [1, 2]) == "中 a 中"
+    assert insert_spaces_at("中文", []) == "中文"
+
+
+@pytest.mark.parametrize("syntax", ["none", "markdown", "rst"])
+def test_batch_matches_check_and_format(syntax: str):
+    rng = random.Random(syntax)
+    alphabet = ["中", "文", "a", "Z", " ", "`", "```\n", "::\n", "    ", "\n", "dochooks: skip-next-line", "http://a中"]
+    documents = []
+    for i in range(500):
+        documents.append((i, "".join(rng.choices(alphabet, k=rng.randint(0, 30)))))
+    results = {result.id: result for result in check_documents(documents, syntax, fix=True)}
+    for i, text in documents:
+        need_format, formatted, _ = format_lines(io.StringIO(text, newline="\n"), syntax)
+        assert check_lines(io.StringIO(text, newline="\n"), syntax)[0] == need_format == (i in results)
+        if need_format:
+            assert results[i].formatted == formatted
+
+
+def test_check_documents():
+    documents = [("a.md", "中文English\n".encode()), ("b.md", "中文 English\n"), ("c.md", "カナabc")]
+    assert list(check_documents(documents)) == [DocumentResult("a.md", find_boundary_offsets("中文English\n"))]
+
+    char_classes = char_classes_from_config({"extend-cn-chars": ["぀-ヿ"]})
+    results = list(check_documents(documents, fix=True, char_classes=char_classes, jobs=2))
+    assert [(result.id, list(result.offsets), result.formatted) for result in results] == [
+        ("a.md", [2], "中文 English\n"),
+        ("c.md", [2], "カナ abc"),
+    ]
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import io
+import random
+
 import pytest
 
-from dochooks.insert_whitespace_between_cn_and_en_char.check import check
+from dochooks.insert_whitespace_between_cn_and_en_char.check import check, check_lines, check_text
 from dochooks.insert_whitespace_between_cn_and_en_char.format import format
 
 NEED_FORMAT: bool = True
@@ -58,3 +61,24 @@ def test_check_and_format(need_format: bool, unformatted: str, formatted: str):
     # Test format process is stable
     assert check(formatted)
     assert format(formatted) == formatted
+
+
+def test_check_text_matches_check_lines():
+    rng = random.Random(42)
+    alphabet = [
+        "中",
+        "文",
+        "a",
+        "Z",
+        "0",
+        " ",
+        "，",
+        "\n",
+        "\n",
+        "\r",
+        "dochooks: skip-line",
+        "dochooks: skip-next-line",
+    ]
+    for _ in range(2000):
+        text = "".join(rng.choices(alphabet, k=rng.randint(0, 20)))
+        assert check_text(text) == check_lines(io.StringIO(text, newline="\n"))
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from dochooks.insert_whitespace_between_cn_and_en_char import check as check_module
+from dochooks.insert_whitespace_between_cn_and_en_char.check import main as check_main
+from dochooks.insert_whitespace_between_cn_and_en_char.format import main as format_main
+from dochooks.utils.return_code import FAIL, PASS
+from dochooks.utils.sniff import SNIFF_SIZE
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_home(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("cache")))
+
+
+def _make_files(tmp_path: Path) -> list[str]:
+    contents = ["中文English\n", "中文 English\n", "第一行\nline二\n", "纯中文\n"]
+    filenames: list[str] = []
+    for i, content in enumerate(contents):
+        path = tmp_path / f"{i}.md"
+        path.write_text(content, encoding="utf8")
+        filenames.append(str(path))
+    return filenames
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_check_main_jobs(tmp_path: Path, jobs: str, capsys: pytest.CaptureFixture[str]):
+    filenames = _make_files(tmp_path)
+    assert check_main(["--jobs", jobs, *filenames]) == FAIL
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == [
+        f"No spaces between EN and CN chars detected at: {filenames[0]}:1:\t中文English",
+        f"No spaces between EN and CN chars detected at: {filenames[2]}:2:\tline二",
+    ]
+    assert check_main(["--jobs", jobs, filenames[1], filenames[3]]) == PASS
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_format_main_jobs(tmp_path: Path, jobs: str, capsys: pytest.CaptureFixture[str]):
+    filenames = _make_files(tmp_path)
+    assert format_main(["--jobs", jobs, *filenames]) == FAIL
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[:2] == [
+        f"Add spaces between EN and CN chars in: {filenames[0]}:1:\t中文 English",
+        f"Add spaces between EN and CN chars in: {filenames[2]}:2:\tline 二",
+    ]
+    assert Path(filenames[2]).read_text(encoding="utf8") == "第一行\nline 二\n"
+    assert format_main(["--jobs", jobs, *filenames]) == PASS
+
+
+def test_format_main_skips_unchanged_files(tmp_path: Path):
+    clean = tmp_path / "clean.md"
+    clean.write_text("中文 English\n", encoding="utf8")
+    os.utime(clean, ns=(0, 0))
+    assert format_main(["--jobs", "1", str(clean)]) == PASS
+    assert clean.stat().st_mtime_ns == 0
+
+
+def test_format_main_preserves_file_mode(tmp_path: Path):
+    dirty = tmp_path / "dirty.sh"
+    dirty.write_text("echo 中文English\n", encoding="utf8")
+    dirty.chmod(0o755)
+    assert format_main(["--jobs", "1", str(dirty)]) == FAIL
+    assert dirty.read_text(encoding="utf8") == "echo 中文 English\n"
+    assert stat.S_IMODE(dirty.stat().st_mode) == 0o755
+    assert [path.name for path in tmp_path.iterdir()] == ["dirty.sh"]
+
+
+@pytest.mark.parametrize("io_threads", ["0", "4"])
+def test_format_main_follows_links(tmp_path: Path, io_threads: str):
+    real, symlink, hardlink = tmp_path / "real.md", tmp_path / "symlink.md", tmp_path / "hardlink.md"
+    real.write_text("中文English\n", encoding="utf8")
+    symlink.symlink_to(real)
+    assert format_main(["--io-threads", io_threads, str(symlink)]) == FAIL
+    assert symlink.is_symlink()
+    assert real.read_text(encoding="utf8") == "中文 English\n"
+
+    real.write_text("中文English\n", encoding="utf8")
+    os.link(real, hardlink)
+    assert format_main(["--io-threads", io_threads, str(hardlink)]) == FAIL
+    assert os.path.samefile(real, hardlink)
+    assert real.read_text(encoding="utf8") == "中文 English\n"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["hardlink.md", "real.md", "symlink.md"]
+
+
+def test_check_main_cache(tmp_path: Path):
+    cache_dir = tmp_path / "cache"
+    clean = tmp_path / "clean.md"
+    clean.write_text("中文 English\n", encoding="utf8")
+    assert check_main(["--jobs", "1", "--cache-dir", str(cache_dir), str(clean)]) == PASS
+    assert len(list(cache_dir.rglob("*"))) == 3
+    assert check_main(["--jobs", "1", "--no-cache", "--cache-dir", str(tmp_path / "unused"), str(clean)]) == PASS
+    assert not (tmp_path / "unused").exists()
+
+    # A changed file never hits the entry cached for its old content
+    clean.write_text("中文English\n", encoding="utf8")
+    assert check_main(["--jobs", "1", "--cache-dir", str(cache_dir), str(clean)]) == FAIL
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_format_main_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, jobs: str):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".dochooks.toml").write_text('extend-cn-chars = ["぀-ヿ"]\n', encoding="utf8")
+    paths = [tmp_path / "a.md", tmp_path / "b.md"]
+    for path in paths:
+        path.write_text("カタカナabc\n", encoding="utf8")
+    assert format_main(["--jobs", jobs, *map(str, paths)]) == FAIL
+    assert all(path.read_text(encoding="utf8") == "カタカナ abc\n" for path in paths)
+
+    # The cache tells apart results of different char classes
+    (tmp_path / ".dochooks.toml").unlink()
+    paths[0].write_text("中文１２３\n", encoding="utf8")
+    assert check_main(["--jobs", "1", str(paths[0])]) == PASS
+    (tmp_path / ".dochooks.toml").write_text('extend-en-chars = ["０-９"]\n', encoding="utf8")
+    assert check_main(["--jobs", "1", str(paths[0])]) == FAIL
+
+
+def test_check_main_invalid_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".dochooks.toml").write_text('extend-cn-chars = ["a-"]\n', encoding="utf8")
+    with pytest.raises(SystemExit) as exc_info:
+        check_main([])
+    assert exc_info.value.code == 2
+    assert "extend-cn-chars" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(("jobs", "io_threads"), [("1", "0"), ("1", "4"), ("2", "4")])
+def test_main_skips_unscannable_files(
+    unscannable_files: dict[str, str], tmp_path: Path, jobs: str, io_threads: str, capsys: pytest.CaptureFixture[str]
+):
+    ok = tmp_path / "ok.md"
+    ok.write_text("中文English\n", encoding="utf8")
+    paths = [*unscannable_files, str(ok)]
+    contents = {path: Path(path).read_bytes() for path in unscannable_files}
+    assert check_main(["--jobs", jobs, "--io-threads", io_threads, *paths]) == FAIL
+    out = capsys.readouterr().out
+    for path, reason in unscannable_files.items():
+        assert f"Skipped ({reason}): {path}" in out
+    assert out.endswith("4 files skipped\n")
+
+    assert format_main(["--jobs", jobs, "--io-threads", io_threads, "--max-file-size", "14", *paths]) == FAIL
+    assert "4 files skipped\n" in capsys.readouterr().out
+    assert ok.read_text(encoding="utf8") == "中文 English\n"
+    assert {path: Path(path).read_bytes() for path in unscannable_files} == contents
+
+    assert check_main(["--max-file-size", "14", str(ok)]) == PASS
+    assert capsys.readouterr().out == f"Skipped (larger than 14 bytes): {ok}\n1 file skipped\n"
+
+
+def test_format_main_skips_invalid_utf8_beyond_sniffed_part(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+):
+    # Mmapped files without markup are only decoded around their hits while checking
+    monkeypatch.setattr(check_module, "MMAP_THRESHOLD", 1)
+    path = tmp_path / "a.txt"
+    content = b"a\n" * SNIFF_SIZE + b"\xff\n" + "中文English\n".encode()
+    path.write_bytes(content)
+    assert check_main(["--io-threads", "0", str(path)]) == FAIL
+    assert format_main(["--io-threads", "0", str(path)]) == PASS
+    assert capsys.readouterr().out.endswith(f"Skipped (not UTF-8 encoded): {path}\n1 file skipped\n")
+    assert path.read_bytes() == content
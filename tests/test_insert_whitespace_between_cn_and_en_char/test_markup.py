@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+
+from dochooks.insert_whitespace_between_cn_and_en_char.check import check_lines, check_text
+from dochooks.insert_whitespace_between_cn_and_en_char.format import format_lines
+from dochooks.insert_whitespace_between_cn_and_en_char.markup import detect_syntax
+
+markdown_cases = [
+    ("使用`pip`安装", "使用`pip`安装"),
+    ("使用``a`b``安装dochooks", "使用``a`b``安装 dochooks"),
+    ("参见[文档](https://example.com/中文a)和English", "参见[文档](https://example.com/中文a)和 English"),
+    ('<img alt="中文a" src="x.png">图片a', '<img alt="中文a" src="x.png">图片 a'),
+    ("访问https://example.com/path获取", "访问 https://example.com/path 获取"),
+    ("访问 https://example.com/a_b 获取", "访问 https://example.com/a_b 获取"),
+    ("见https://a.com和https://b.com", "见 https://a.com 和 https://b.com"),
+    (
+        "代码如下\n```python\nprint('中文a')\n```\n结束a\n",
+        "代码如下\n```python\nprint('中文a')\n```\n结束 a\n",
+    ),
+    (
+        "````\n```\n中文a\n````\n中文a\n",
+        "````\n```\n中文a\n````\n中文 a\n",
+    ),
+    ("~~~\n中文a\n~~~\n", "~~~\n中文a\n~~~\n"),
+]
+
+rst_cases = [
+    ("使用``pip``安装", "使用``pip``安装"),
+    ("访问https://example.com获取", "访问 https://example.com 获取"),
+    ("参见`文档 <https://example.com/中文a>`_和English", "参见`文档 <https://example.com/中文a>`_和 English"),
+    (
+        "示例如下::\n\n    print('中文a')\n\n结束a\n",
+        "示例如下::\n\n    print('中文a')\n\n结束 a\n",
+    ),
+    (
+        ".. code-block:: python\n   :linenos:\n\n   print('中文a')\n\n.. note::\n\n   注意a\n",
+        ".. code-block:: python\n   :linenos:\n\n   print('中文a')\n\n.. note::\n\n   注意 a\n",
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "syntax, unformatted, formatted",
+    [("markdown", *case) for case in markdown_cases] + [("rst", *case) for case in rst_cases],
+)
+def test_markup_check_and_format(syntax: str, unformatted: str, formatted: str):
+    lines = unformatted.splitlines(keepends=True)
+    need_format, formatted_text, _ = format_lines(lines, syntax)
+    assert formatted_text == formatted
+    assert need_format == (unformatted != formatted)
+    assert check_lines(lines, syntax)[0] == need_format
+    assert check_text(unformatted, syntax) == check_lines(io.StringIO(unformatted, newline="\n"), syntax)
+
+
+def test_markup_none_checks_everything():
+    text = "代码如下\n```\n中文a\n```\n"
+    assert check_text(text, "none") == (True, [(3, "中文a\n")])
+    assert check_text(text, "markdown") == (False, [])
+
+
+@pytest.mark.parametrize(
+    "file_path, syntax",
+    [("README.md", "markdown"), ("docs/index.RST", "rst"), ("notes.txt", "none"), ("Makefile", "none")],
+)
+def test_detect_syntax(file_path: str, syntax: str):
+    assert detect_syntax(file_path) == syntax
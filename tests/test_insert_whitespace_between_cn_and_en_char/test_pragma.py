@@ -4,6 +4,7 @@ import pytest
 
 from dochooks.insert_whitespace_between_cn_and_en_char.check import check_lines
 from dochooks.insert_whitespace_between_cn_and_en_char.format import format_lines
+from dochooks.insert_whitespace_between_cn_and_en_char.pragma import PragmaManager, scan_lines
 
 NEED_FORMAT: bool = True
 NEEDNT_FORMAT: bool = False
@@ -49,3 +50,13 @@ def test_check_and_format_lines(need_format: bool, unformatted: str, formatted:
     assert need_format_from_format == need_format
 
     assert formatted_text == formatted
+
+
+def test_scan_lines_matches_pragma_manager():
+    lines = cases[1][1].splitlines(keepends=True) + ["# dochooks: skip-next-line dochooks: skip-line\n", "a\n", "b\n"]
+    pragma_manager = PragmaManager()
+    expected: list[tuple[int, str, bool]] = []
+    for lineno, line in enumerate(lines, 1):
+        with pragma_manager.scan(line) as skip_line:
+            expected.append((lineno, line, skip_line))
+    assert list(scan_lines(lines)) == expected
@@ -1,13 +1,24 @@
 from __future__ import annotations
 
+import pickle
+import random
 import re
 
+import pytest
+
+from dochooks.insert_whitespace_between_cn_and_en_char.format import format
 from dochooks.insert_whitespace_between_cn_and_en_char.regex import (
+    DEFAULT_CHAR_CLASSES,
     REGEX_CN_CHAR_STR,
+    REGEX_CN_EN_BOUNDARY,
     REGEX_CN_WITH_EN,
     REGEX_EN_CHAR_STR,
     REGEX_EN_WITH_CN,
+    char_classes_from_config,
+    coalesce_ranges,
+    make_char_classes,
 )
+from dochooks.utils.config import ConfigError
 
 
 def test_pure_cn_chars_pattern():
@@ -40,3 +51,62 @@ def test_en_with_cn_pattern():
 def test_cn_with_punctuation_pattern():
     assert REGEX_CN_WITH_EN.sub(r"\g<cn> \g<en>", "带上标点符号试试，en。") == "带上标点符号试试，en。"
     assert REGEX_EN_WITH_CN.sub(r"\g<en> \g<cn>", "带上标点符号试试，en。") == "带上标点符号试试，en。"
+
+
+def _format_with_two_regexes(text: str) -> str:
+    text = REGEX_CN_WITH_EN.sub(r"\g<cn> \g<en>", text)
+    text = REGEX_EN_WITH_CN.sub(r"\g<en> \g<cn>", text)
+    return text
+
+
+def test_boundary_pattern_matches_two_regexes():
+    rng = random.Random(42)
+    alphabet = ["中", "文", "龥", "a", "Z", "0", " ", "，", "。", "\n", "\r", "-", "ä", "ｱ"]
+    for _ in range(5000):
+        text = "".join(rng.choices(alphabet, k=rng.randint(0, 12)))
+        has_boundary = REGEX_CN_WITH_EN.search(text) is not None or REGEX_EN_WITH_CN.search(text) is not None
+        assert (REGEX_CN_EN_BOUNDARY.search(text) is not None) == has_boundary
+        assert format(text) == _format_with_two_regexes(text)
+
+
+def test_coalesce_ranges():
+    assert coalesce_ranges([("a", "z"), ("0", "9"), ("A", "Z")]) == (("0", "9"), ("A", "Z"), ("a", "z"))
+    assert coalesce_ranges([("c", "e"), ("a", "c"), ("f", "f"), ("x", "y"), ("b", "b")]) == (("a", "f"), ("x", "y"))
+
+
+def test_char_classes_from_config():
+    assert char_classes_from_config({}) is DEFAULT_CHAR_CLASSES
+    char_classes = char_classes_from_config({"extend-cn-chars": ["぀-ヿ", "㐀-䶵"], "extend-en-chars": ["０-９"]})
+    assert char_classes.cn_ranges == (("぀", "ヿ"), ("㐀", "䶵"), ("一", "龥"))
+    assert char_classes.insert_spaces("カタカナabc１２３中文") == "カタカナ abc１２３ 中文"
+    assert char_classes_from_config({"cn-chars": ["一-龥"], "en-chars": ["a-z"]}).insert_spaces("中文A") == "中文A"
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"cn-chars": "一-龥"},
+        {"extend-en-chars": ["a-"]},
+        {"extend-en-chars": ["z-a"]},
+        {"cn-chars": []},
+        {"extend-en-chars": ["中"]},
+    ],
+)
+def test_char_classes_from_config_invalid(config: dict[str, object]):
+    with pytest.raises(ConfigError):
+        char_classes_from_config(config)
+
+
+def test_char_classes_compiled_once():
+    char_classes = make_char_classes((("一", "龥"), ("㐀", "䶵")), (("a", "z"),))
+    assert make_char_classes((("一", "龥"), ("㐀", "䶵")), (("a", "z"),)) is char_classes
+    assert pickle.loads(pickle.dumps(char_classes)) is make_char_classes(char_classes.cn_ranges, char_classes.en_ranges)
+
+
+def test_char_classes_compiled_lazily():
+    char_classes = make_char_classes((("一", "龥"),), (("a", "f"),))
+    assert "boundary" not in vars(char_classes)
+    assert char_classes.insert_spaces("中文abc") == "中文 abc"
+    assert "boundary" in vars(char_classes)
+    assert "cn_with_en" not in vars(char_classes)
+    assert REGEX_CN_EN_BOUNDARY is DEFAULT_CHAR_CLASSES.boundary
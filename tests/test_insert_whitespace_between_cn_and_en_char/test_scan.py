@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import io
+import mmap
+import random
+from pathlib import Path
+
+import pytest
+
+from dochooks.insert_whitespace_between_cn_and_en_char import check as check_module, scan
+from dochooks.insert_whitespace_between_cn_and_en_char.check import (
+    CHECK_MESSAGE,
+    _check_file,
+    check_buffer,
+    check_lines,
+    check_text,
+)
+from dochooks.insert_whitespace_between_cn_and_en_char.regex import char_classes_from_config
+from dochooks.utils.output import Diagnostic
+from dochooks.utils.return_code import FAIL
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1 << 20])
+def test_check_buffer_matches_check_text(monkeypatch: pytest.MonkeyPatch, chunk_size: int):
+    monkeypatch.setattr(scan, "CHUNK_SIZE", chunk_size)
+    rng = random.Random(chunk_size)
+    alphabet = ["中", "文", "龥", "䷀", "a", "Z", "0", " ", "，", "é", "\n", "\n", "\r", "dochooks: skip-line"]
+    for _ in range(1000):
+        text = "".join(rng.choices(alphabet, k=rng.randint(0, 30)))
+        assert check_buffer(text.encode("utf8")) == check_text(text)
+        assert check_buffer(text.encode("utf8"), "markdown") == check_text(text, "markdown")
+
+
+def test_check_buffer_huge_line(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(scan, "CHUNK_SIZE", 4)
+    text = "中文a" + "，English" * 10 + "\n中文\n中文b\n"
+    assert check_buffer(text.encode("utf8")) == check_lines(io.StringIO(text, newline="\n"))
+
+
+def test_check_buffer_mmap(tmp_path: Path):
+    path = tmp_path / "a.txt"
+    path.write_bytes("中文\n中文a\n".encode())
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        assert check_buffer(buf) == (True, [(2, "中文a\n")])
+
+
+def test_check_file_mmap(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(check_module, "MMAP_THRESHOLD", 1)
+    path = tmp_path / "a.txt"
+    path.write_bytes("中文\n中文a\n".encode())
+    assert _check_file(str(path)) == (
+        FAIL,
+        [Diagnostic("whitespace-between-cn-and-en-char", CHECK_MESSAGE, str(path), 2, (3,), "中文a")],
+    )
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"extend-cn-chars": ["぀-ヿ"]},
+        # Full-width digits are multi-byte, so these classes can only be scanned line by line
+        {"extend-cn-chars": ["぀-ヿ"], "extend-en-chars": ["０-９"]},
+    ],
+)
+def test_check_buffer_char_classes(monkeypatch: pytest.MonkeyPatch, config: dict[str, object]):
+    monkeypatch.setattr(scan, "CHUNK_SIZE", 3)
+    char_classes = char_classes_from_config(config)
+    assert (scan.make_byte_class_table(char_classes) is None) == ("extend-en-chars" in config)
+    rng = random.Random(0)
+    alphabet = ["中", "カ", "ひ", "a", "0", "１", " ", "，", "\n"]
+    for _ in range(1000):
+        text = "".join(rng.choices(alphabet, k=rng.randint(0, 20)))
+        assert check_buffer(text.encode("utf8"), char_classes=char_classes) == check_text(
+            text, char_classes=char_classes
+        )
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from dochooks.utils.cache import NUM_SHARDS, ResultCache
+
+
+def test_mark_and_lookup(tmp_path: Path):
+    cache = ResultCache(str(tmp_path), "hook", "config")
+    assert not cache.is_clean(b"content")
+    cache.mark_clean(b"content")
+    assert cache.is_clean(b"content")
+    assert not cache.is_clean(b"other content")
+
+
+def test_namespaces_are_isolated(tmp_path: Path):
+    ResultCache(str(tmp_path), "hook", "config").mark_clean(b"content")
+    assert not ResultCache(str(tmp_path), "hook", "other config").is_clean(b"content")
+    assert not ResultCache(str(tmp_path), "other hook", "config").is_clean(b"content")
+
+
+def test_eviction_bounds_each_shard(tmp_path: Path):
+    cache = ResultCache(str(tmp_path), "hook", "config", max_entries=2 * NUM_SHARDS)
+    for i in range(20 * NUM_SHARDS):
+        cache.mark_clean(str(i).encode())
+    for shard in os.listdir(cache.root):
+        assert len(os.listdir(os.path.join(cache.root, shard))) <= 2
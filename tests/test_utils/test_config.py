@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from dochooks.utils.config import ConfigError, load_config
+
+
+def test_load_config_pyproject(tmp_path: Path):
+    assert load_config(str(tmp_path)) == {}
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "docs"\n', encoding="utf8")
+    assert load_config(str(tmp_path)) == {}
+    (tmp_path / "pyproject.toml").write_text('[tool.dochooks]\nextend-cn-chars = ["぀-ヿ"]\n', encoding="utf8")
+    assert load_config(str(tmp_path)) == {"extend-cn-chars": ["぀-ヿ"]}
+
+
+def test_load_config_dochooks_toml(tmp_path: Path):
+    (tmp_path / "pyproject.toml").write_text('[tool.dochooks]\nextend-cn-chars = ["぀-ヿ"]\n', encoding="utf8")
+    (tmp_path / ".dochooks.toml").write_text('extend-en-chars = ["０-９"]\n', encoding="utf8")
+    assert load_config(str(tmp_path)) == {"extend-en-chars": ["０-９"]}
+
+
+def test_load_config_invalid(tmp_path: Path):
+    (tmp_path / ".dochooks.toml").write_text("extend-en-chars = [\n", encoding="utf8")
+    with pytest.raises(ConfigError, match=".dochooks.toml"):
+        load_config(str(tmp_path))
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "[project\n",
+        # Mentions dochooks, but has no dochooks config
+        '[project]\ndependencies = ["dochooks"\n',
+    ],
+)
+def test_load_config_invalid_pyproject_without_table(tmp_path: Path, content: str):
+    (tmp_path / "pyproject.toml").write_text(content, encoding="utf8")
+    assert load_config(str(tmp_path)) == {}
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        '[tool.dochooks]\nextend-cn-chars = ["぀-ヿ"\n',
+        "[project\n[tool.dochooks.rules]\n",
+        "tool.dochooks.extend-cn-chars = [\n",
+    ],
+)
+def test_load_config_invalid_pyproject_with_table(tmp_path: Path, content: str):
+    (tmp_path / "pyproject.toml").write_text(content, encoding="utf8")
+    with pytest.raises(ConfigError, match="pyproject.toml"):
+        load_config(str(tmp_path))
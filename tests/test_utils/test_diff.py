@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from dochooks.insert_whitespace_between_cn_and_en_char.check import main as check_main
+from dochooks.insert_whitespace_between_cn_and_en_char.format import main as format_main
+from dochooks.utils.diff import LineSelector, get_staged_changed_lines, parse_changed_lines
+from dochooks.utils.return_code import FAIL, PASS
+
+DIFF = b"""\
+diff --git a/a.md b/a.md
+index 1111111..2222222 100644
+--- a/a.md
++++ b/a.md
+@@ -2 +2 @@ title
+-old
++new
+@@ -5,0 +6,3 @@
++++ added line looking like a header
++x
++y
+@@ -9,2 +11,0 @@
+-deleted
+-deleted
+diff --git a/gone.md b/gone.md
+deleted file mode 100644
+--- a/gone.md
++++ /dev/null
+@@ -1 +0,0 @@
+-gone
+diff --git "a/\\344\\270\\255\\tb.md" "b/\\344\\270\\255\\tb.md"
+--- "a/\\344\\270\\255\\tb.md"
++++ "b/\\344\\270\\255\\tb.md"
+@@ -1 +1,2 @@
+-a
++b
++c
+diff --git a/x y.md b/x y.md
+--- a/x y.md\t
++++ b/x y.md\t
+@@ -0,0 +1 @@
++z
+"""
+
+
+def test_parse_changed_lines():
+    assert parse_changed_lines(DIFF) == {
+        "a.md": [(2, 2), (6, 8)],
+        "中\tb.md": [(1, 2)],
+        "x y.md": [(1, 1)],
+    }
+
+
+def test_line_selector():
+    selector = LineSelector([(6, 8), (2, 2)])
+    assert [lineno for lineno in range(1, 12) if selector.selects(lineno)] == [2, 6, 7, 8]
+
+
+def git(*args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=dochooks", "-c", "user.email=dochooks@example.com", *args],
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    git("init")
+    return tmp_path
+
+
+def test_get_staged_changed_lines(repo: Path):
+    Path("a.md").write_text("a\nb\nc\n", encoding="utf8")
+    git("add", "a.md")
+    git("commit", "-m", "init")
+    Path("a.md").write_text("a\nB\nc\nd\n", encoding="utf8")
+    git("add", "a.md")
+    Path("a.md").write_text("A\nB\nc\nd\n", encoding="utf8")
+    assert get_staged_changed_lines(["a.md"]) == {"a.md": [(2, 2), (4, 4)]}
+
+
+def test_get_staged_changed_lines_not_a_repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path.parent))
+    assert get_staged_changed_lines(["a.md"]) is None
+
+
+def test_changed_lines_only(repo: Path, capsys: pytest.CaptureFixture[str]):
+    legacy = "中文a\n# dochooks: skip-next-line\n中文b\n中文c\n"
+    Path("a.md").write_text(legacy, encoding="utf8")
+    git("add", "a.md")
+    git("commit", "-m", "init")
+    # Edit the line right after the pragma, which stays skipped, and add a line at the end
+    Path("a.md").write_text("中文a\n# dochooks: skip-next-line\n中文B\n中文c\n中文d\n", encoding="utf8")
+    git("add", "a.md")
+
+    assert check_main(["--changed-lines-only", "a.md"]) == FAIL
+    assert capsys.readouterr().out == "No spaces between EN and CN chars detected at: a.md:5:\t中文d\n"
+
+    assert format_main(["--changed-lines-only", "a.md"]) == FAIL
+    assert Path("a.md").read_text(encoding="utf8") == "中文a\n# dochooks: skip-next-line\n中文B\n中文c\n中文 d\n"
+    git("add", "a.md")
+    assert check_main(["--changed-lines-only", "a.md"]) == PASS
+    assert check_main(["a.md"]) == FAIL
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+
+from dochooks.utils.git import iter_nul_separated
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1 << 16])
+def test_iter_nul_separated(chunk_size: int):
+    paths = ["a.txt", "dir/b c.md", "with\nnewline", "中文/文件.md", "\udcff-invalid-utf8"]
+    stream = io.BytesIO(b"\0".join(path.encode("utf8", "surrogateescape") for path in paths) + b"\0")
+    assert list(iter_nul_separated(stream, chunk_size)) == paths
+
+
+def test_iter_nul_separated_without_trailing_nul():
+    assert list(iter_nul_separated(io.BytesIO(b"a\0b"))) == ["a", "b"]
+    assert list(iter_nul_separated(io.BytesIO(b""))) == []
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from dochooks.insert_whitespace_between_cn_and_en_char.check import main as check_main
+from dochooks.utils import output
+from dochooks.utils.output import Diagnostic, make_writer, skipped_file
+from dochooks.utils.return_code import FAIL
+
+DIAGNOSTICS = [
+    Diagnostic("rule", "Bad", "a.md", 1, (3, 5), "中文a和b"),
+    Diagnostic("rule", "Bad", "a.md", 2, (3,), "中文a"),
+    Diagnostic("rule", "Bad", "a.md", 3, (3,), "中文b"),
+]
+
+
+def write(output_format: str, max_per_file: int | None = None) -> str:
+    stream = io.StringIO()
+    with make_writer(output_format, max_per_file, stream) as writer:
+        writer.write_file(DIAGNOSTICS)
+        writer.write_file([])
+        writer.write_file([Diagnostic("other", "Conflict, bad", "b,c.md")])
+    return stream.getvalue()
+
+
+def test_text_writer():
+    assert write("text", 2) == (
+        "Bad: a.md:1:\t中文a和b\nBad: a.md:2:\t中文a\n... 1 more diagnostic omitted for a.md\nConflict, bad: b,c.md\n"
+    )
+
+
+def test_json_writer():
+    records = [json.loads(line) for line in write("json", 2).splitlines()]
+    assert records[0] == {
+        "rule": "rule",
+        "message": "Bad",
+        "path": "a.md",
+        "line": 1,
+        "columns": [3, 5],
+        "source": "中文a和b",
+    }
+    assert records[2] == {"omitted": {"path": "a.md", "count": 1}}
+    assert records[-1] == {"summary": {"files": 2, "diagnostics": 4, "omitted": 1, "skipped": 0}}
+
+
+def test_sarif_writer():
+    log = json.loads(write("sarif"))
+    run = log["runs"][0]
+    assert [rule["id"] for rule in run["tool"]["driver"]["rules"]] == ["rule", "other"]
+    assert len(run["results"]) == 4
+    assert run["results"][0]["locations"][0]["physicalLocation"]["region"] == {
+        "startLine": 1,
+        "startColumn": 3,
+        "snippet": {"text": "中文a和b"},
+    }
+    assert run["results"][0]["properties"] == {"columns": [3, 5]}
+    assert "region" not in run["results"][3]["locations"][0]["physicalLocation"]
+    assert run["properties"] == {"files": 2, "diagnostics": 4, "omitted": 0, "skipped": 0}
+
+
+def test_github_writer():
+    assert write("github").splitlines()[-1] == "::error file=b%2Cc.md,title=other::Conflict, bad"
+    assert write("github").splitlines()[0] == "::error file=a.md,line=1,col=3,title=rule::Bad"
+
+
+def test_writer_must_format_diagnostics():
+    class Writer(output.DiagnosticWriter):
+        pass
+
+    with pytest.raises(TypeError, match="format_diagnostic"):
+        Writer()
+
+
+def test_writer_batches_output(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(output, "FLUSH_SIZE", 30)
+    stream = io.StringIO()
+    writer = make_writer("text", stream=stream)
+    with writer:
+        writer.write_file(DIAGNOSTICS[:1])
+        assert stream.getvalue() == ""
+        writer.write_file(DIAGNOSTICS[1:])
+        assert stream.getvalue() != ""
+    assert stream.getvalue() == write("text")[: len(stream.getvalue())]
+
+
+def test_check_main_output_format(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    path = tmp_path / "a.txt"
+    path.write_text("中文a\n`中文b`\n", encoding="utf8")
+    assert check_main(["--no-cache", "--output-format", "json", str(path)]) == FAIL
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(record["line"], record["columns"]) for record in records[:-1]] == [(1, [3]), (2, [4])]
+
+
+def test_skipped_files():
+    def write_skipped(output_format: str) -> str:
+        stream = io.StringIO()
+        with make_writer(output_format, stream=stream) as writer:
+            writer.write_file(DIAGNOSTICS[:1])
+            writer.write_file([skipped_file("image.png", "binary")])
+        assert writer.summary() == {"files": 1, "diagnostics": 1, "omitted": 0, "skipped": 1}
+        return stream.getvalue()
+
+    assert write_skipped("text").splitlines()[1:] == ["Skipped (binary): image.png", "1 file skipped"]
+    assert json.loads(write_skipped("json").splitlines()[1]) == {
+        "skipped": {"path": "image.png", "message": "Skipped (binary)"}
+    }
+    assert len(json.loads(write_skipped("sarif"))["runs"][0]["results"]) == 1
+    assert write_skipped("github").splitlines()[1] == "::notice file=image.png::Skipped (binary)"
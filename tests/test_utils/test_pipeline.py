@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from dochooks.utils import parallel, pipeline
+from dochooks.utils.parallel import default_jobs, jobs_for_files, split_batches
+from dochooks.utils.pipeline import iter_pipeline, map_files_pipelined
+
+
+def upper(file_path: str, content: bytes | None) -> tuple[str, str | None]:
+    if content is None:
+        return f"{Path(file_path).name} unprefetched", None
+    text = content.decode("utf8")
+    return Path(file_path).name, text.upper() if text.islower() else None
+
+
+def make_files(tmp_path: Path, count: int) -> list[str]:
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"{i}.txt"
+        path.write_text("abc\n" if i % 2 else "ABC\n", encoding="utf8")
+        paths.append(str(path))
+    return paths
+
+
+def test_split_batches():
+    assert split_batches(list("abcde"), 2) == [list("abc"), list("de")]
+    assert split_batches(list("ab"), 4) == [["a"], ["b"]]
+    assert split_batches([], 4) == []
+
+
+def test_jobs_for_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    paths = make_files(tmp_path, 20)
+    assert jobs_for_files(paths[:4]) == 1
+    # 20 files, but only 80 bytes
+    assert jobs_for_files(paths) == 1
+    monkeypatch.setattr(parallel, "MIN_PARALLEL_BYTES", 80)
+    assert jobs_for_files(paths) == default_jobs()
+    assert jobs_for_files(paths[:4], 3) == 3
+
+
+def test_map_files_pipelined_small_run_in_process(tmp_path: Path):
+    paths = make_files(tmp_path, 4)
+    # A closure can't be pickled to workers, so this only passes without a pool
+    results = list(map_files_pipelined(lambda file_path, content: upper(file_path, content), paths))
+    assert results == [f"{i}.txt" for i in range(4)]
+
+
+def test_iter_pipeline(tmp_path: Path):
+    paths = make_files(tmp_path, 20)
+    assert list(iter_pipeline(upper, paths, io_threads=3)) == [f"{i}.txt" for i in range(20)]
+    assert all(Path(path).read_text(encoding="utf8") == "ABC\n" for path in paths)
+
+
+def test_iter_pipeline_prefetch_limit(tmp_path: Path):
+    paths = make_files(tmp_path, 2)
+    assert list(iter_pipeline(upper, paths, prefetch_limit=1)) == ["0.txt unprefetched", "1.txt unprefetched"]
+
+
+def test_iter_pipeline_backpressure(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    paths = make_files(tmp_path, 20)
+    reads: list[str] = []
+    processed: list[str] = []
+    read_file = pipeline.read_file
+
+    def tracked_read_file(file_path: str, limit: int) -> bytes | None:
+        reads.append(file_path)
+        return read_file(file_path, limit)
+
+    def process(file_path: str, content: bytes | None) -> tuple[int, None]:
+        processed.append(file_path)
+        # Only the reads started before the first one completed may run ahead
+        return len(reads) - len(processed), None
+
+    monkeypatch.setattr(pipeline, "read_file", tracked_read_file)
+    ahead = list(iter_pipeline(process, paths, io_threads=4, max_in_flight_bytes=1))
+    assert len(ahead) == 20
+    assert max(ahead) <= 5
+
+
+def test_iter_pipeline_error(tmp_path: Path):
+    paths = [*make_files(tmp_path, 3), str(tmp_path / "missing.txt")]
+    results = iter_pipeline(upper, paths)
+    assert next(results) == "0.txt"
+    with pytest.raises(FileNotFoundError):
+        list(results)
+
+
+def test_iter_pipeline_close(tmp_path: Path):
+    results = iter_pipeline(upper, make_files(tmp_path, 20), io_threads=2)
+    assert next(results) == "0.txt"
+    results.close()
+
+
+@pytest.mark.parametrize(("jobs", "io_threads"), [(1, 0), (2, 0), (2, 2)])
+def test_map_files_pipelined(tmp_path: Path, jobs: int, io_threads: int):
+    paths = make_files(tmp_path, 10)
+    results = list(map_files_pipelined(upper, paths, jobs, io_threads))
+    if io_threads:
+        assert results == [f"{i}.txt" for i in range(10)]
+        assert all(Path(path).read_text(encoding="utf8") == "ABC\n" for path in paths)
+    else:
+        assert results == [f"{i}.txt unprefetched" for i in range(10)]
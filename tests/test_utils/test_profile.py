@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+import pytest
+
+from dochooks.check_case_conflict.check import main as case_conflict_main
+from dochooks.cli import main as cli_main
+from dochooks.insert_whitespace_between_cn_and_en_char.check import main as check_main
+from dochooks.insert_whitespace_between_cn_and_en_char.format import main as format_main
+from dochooks.utils import profile
+from dochooks.utils.profile import PROFILE_ENV, count, phase, profiling
+from dochooks.utils.return_code import ReturnCode
+
+
+def test_disabled_is_noop():
+    assert profile.get_profiler() is None
+    with phase("scan"):
+        count("files_read")
+    assert profile.get_profiler() is None
+
+
+def test_profiling_text(capsys: pytest.CaptureFixture[str]):
+    with profiling("text") as profiler:
+        assert profiler is not None
+        with phase("scan"):
+            count("files_read", 2)
+    assert profile.get_profiler() is None
+    assert profiler.counters["files_read"] == 2
+    assert {"total", "scan"} <= profiler.timings.keys()
+    err = capsys.readouterr().err
+    assert "dochooks profile:" in err
+    assert "files_read" in err
+
+
+def test_profiling_from_env(monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]):
+    monkeypatch.setenv(PROFILE_ENV, "json")
+    with profiling(None) as profiler:
+        assert profiler is not None
+    report = json.loads(capsys.readouterr().err)
+    assert "total" in report["timings"]
+
+    monkeypatch.setenv(PROFILE_ENV, "")
+    with profiling(None) as profiler:
+        assert profiler is None
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_main_profile_file(tmp_path: Path, jobs: str):
+    paths = [tmp_path / "a.md", tmp_path / "b.md"]
+    for path in paths:
+        path.write_text("中文a\n<!-- dochooks: skip-next-line -->\n中文b\n", encoding="utf8")
+    report_path = tmp_path / "profile.json"
+    format_main(["--no-cache", "--jobs", jobs, "--profile-output", str(report_path), *map(str, paths)])
+
+    # Counters of worker processes are merged into the report
+    report = json.loads(report_path.read_text(encoding="utf8"))
+    assert report["counters"]["files_read"] == 2
+    assert report["counters"]["files_rewritten"] == 2
+    assert report["counters"]["lines_skipped_by_pragma"] == 4
+    assert {"total", "read", "scan", "write"} <= report["timings"].keys()
+
+
+def test_check_main_profile(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    path = tmp_path / "a.md"
+    path.write_text("中文 a\n", encoding="utf8")
+    check_main(["--no-cache", "--jobs", "1", "--profile", "--", str(path)])
+    err = capsys.readouterr().err
+    assert "bytes_scanned" in err
+    assert "lines_with_hits" in err
+
+
+@pytest.mark.parametrize(
+    ("main", "prefix"),
+    [
+        (check_main, ["--no-cache"]),
+        (format_main, ["--no-cache"]),
+        (case_conflict_main, ["--no-index"]),
+        (cli_main, ["run", "--fix"]),
+    ],
+)
+def test_profile_takes_no_value(
+    main: Callable[[Sequence[str]], ReturnCode],
+    prefix: list[str],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "a.md"
+    path.write_text("中文a\n", encoding="utf8")
+    main([*prefix, "--profile", "a.md"])
+    # The filename following --profile is checked, not overwritten with the report
+    assert path.read_text(encoding="utf8") in ("中文a\n", "中文 a\n")
+    assert "dochooks profile:" in capsys.readouterr().err
+
+
+def test_profile_format_and_output(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.md").write_text("中文 a\n", encoding="utf8")
+    check_main(["--no-cache", "--profile", "--profile-format", "json", "a.md"])
+    assert "total" in json.loads(capsys.readouterr().err)["timings"]
+    # A report file may be named like a format
+    check_main(["--no-cache", "--profile-output", "json", "a.md"])
+    assert capsys.readouterr().err == ""
+    assert "total" in json.loads((tmp_path / "json").read_text(encoding="utf8"))["timings"]
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import codecs
+import mmap
+from pathlib import Path
+
+import pytest
+
+from dochooks.utils.sniff import BINARY, NOT_UTF8, SNIFF_SIZE, sniff
+
+
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        ("中文 English\n".encode(), None),
+        (codecs.BOM_UTF8 + "中文 English\n".encode(), None),
+        (b"", None),
+        (b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR", BINARY),
+        ("中文English\n".encode("gbk"), NOT_UTF8),
+        (codecs.BOM_UTF16_LE + "中文English\n".encode("utf-16-le"), "UTF-16 encoded"),
+        (codecs.BOM_UTF32_LE + "中文English\n".encode("utf-32-le"), "UTF-32 encoded"),
+        # Only the head is sniffed, a char cut off at its end is fine, invalid UTF-8 after it isn't noticed
+        (b"a" * (SNIFF_SIZE - 1) + "中文".encode(), None),
+        (b"a" * SNIFF_SIZE + b"\0\xff", None),
+    ],
+)
+def test_sniff(content: bytes, expected: str | None):
+    assert sniff(content) == expected
+
+
+def test_sniff_max_size():
+    assert sniff(b"abc", max_size=3) is None
+    assert sniff(b"abcd", max_size=3) == "larger than 3 bytes"
+
+
+def test_sniff_mmap(tmp_path: Path):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"\0" * (SNIFF_SIZE * 2))
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        assert sniff(buf) == BINARY